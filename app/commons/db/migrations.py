@@ -0,0 +1,213 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, List
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+# Kept out of SQLModel.metadata so create_all and the migration history stay independent
+migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+def _create_model_indexes(table_name: str) -> Callable[[Connection], None]:
+    """Creates the indexes a model declares but an existing table predates."""
+    def upgrade(conn: Connection):
+        from sqlmodel import SQLModel
+        if not inspect(conn).has_table(table_name):
+            return  # create_all builds new tables with their indexes already
+        for index in SQLModel.metadata.tables[table_name].indexes:
+            index.create(conn, checkfirst=True)
+    return upgrade
+
+
+def has_index(conn: Connection, table_name: str, method: str, column: str) -> bool:
+    """True when `table_name` has an index of access `method` (gin, hnsw, ...) covering `column`."""
+    rows = conn.execute(
+        text("SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = :table"),
+        {"table": table_name},
+    ).scalars()
+    return any(f"USING {method} " in indexdef and column in indexdef for indexdef in rows)
+
+
+def _search_index_built_offline(conn: Connection):
+    """
+    Superseded: the HNSW and GIN search indexes can take longer than the statement timeout
+    on a large corpus and block writes while built, so they are no longer created in the
+    startup transaction. Build them with `python -m app.commons.db.migrations`.
+    """
+
+
+def _create_retrieval_tables(conn: Connection):
+    """
+    Creates the tables /ingest/ writes and /search reads on databases that predate them.
+    Existing tables (built by the earlier offline indexer) are left untouched.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    inspector = inspect(conn)
+    missing = {name for name in ("legal_documents", "legal_document_pages", "legal_document_chunks") if not inspector.has_table(name)}
+    if not missing:
+        return
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS legal_documents (
+            id UUID PRIMARY KEY,
+            title TEXT,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS legal_document_pages (
+            id BIGSERIAL PRIMARY KEY,
+            document_id UUID NOT NULL REFERENCES legal_documents (id) ON DELETE CASCADE,
+            page_number INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            full_text_search TSVECTOR
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS legal_document_chunks (
+            id BIGSERIAL PRIMARY KEY,
+            legal_document_id UUID NOT NULL REFERENCES legal_documents (id) ON DELETE CASCADE,
+            page_number INTEGER NOT NULL,
+            chunk_index INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            embedding VECTOR(1024)  -- bge-m3
+        )
+    """))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_legal_document_pages_document_id ON legal_document_pages (document_id, page_number)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_legal_document_chunks_document_id ON legal_document_chunks (legal_document_id, page_number)"
+    ))
+    for index in SEARCH_INDEXES:
+        if index.table in missing:
+            # Instant on a table created just now; existing tables are left to build_search_indexes
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index.name} ON {index.table} USING {index.definition}"))
+
+
+def _add_page_content_hash(conn: Connection):
+    """Per-page hash that lets re-indexing skip unchanged pages."""
+    if conn.dialect.name != "postgresql" or not inspect(conn).has_table("legal_document_pages"):
+        return
+    conn.execute(text("ALTER TABLE legal_document_pages ADD COLUMN IF NOT EXISTS content_hash TEXT"))
+
+
+@dataclass(frozen=True)
+class SearchIndex:
+    table: str
+    method: str  # Access method, e.g. gin or hnsw
+    column: str
+    name: str
+    definition: str  # Index expression after USING
+
+
+# Search indexes that must exist for retrieval to stay index-backed
+SEARCH_INDEXES: List[SearchIndex] = [
+    SearchIndex(
+        "legal_document_pages", "gin", "full_text_search",
+        "ix_legal_document_pages_full_text_search", "gin (full_text_search)",
+    ),
+    SearchIndex(
+        "legal_document_chunks", "hnsw", "embedding",
+        "ix_legal_document_chunks_embedding_hnsw", "hnsw (embedding vector_cosine_ops)",
+    ),
+]
+
+
+def check_search_indexes(conn: Connection):
+    """Warns at startup when a retrieval table lacks its index; startup never builds them."""
+    if conn.dialect.name != "postgresql":
+        return
+    inspector = inspect(conn)
+    for index in SEARCH_INDEXES:
+        if inspector.has_table(index.table) and not has_index(conn, index.table, index.method, index.column):
+            logger.warning(
+                "%s has no %s index on %s, searches will scan the whole table; "
+                "build it with `python -m app.commons.db.migrations`",
+                index.table, index.method, index.column,
+            )
+
+
+def build_search_indexes(engine: Engine):
+    """
+    Builds missing search indexes with CREATE INDEX CONCURRENTLY, so ingestion keeps writing
+    while they build. CONCURRENTLY cannot run inside a transaction, so this uses an autocommit
+    connection, with the statement timeout lifted since the build can take hours.
+    An invalid index left behind by an interrupted build is dropped and rebuilt.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SET statement_timeout = 0"))
+        inspector = inspect(conn)
+        for index in SEARCH_INDEXES:
+            if not inspector.has_table(index.table):
+                continue
+            invalid = conn.execute(
+                text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+                {"name": index.name},
+            ).scalar()
+            if invalid:
+                logger.warning("Dropping invalid index %s left by an interrupted build", index.name)
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}"))
+            elif has_index(conn, index.table, index.method, index.column):
+                continue  # Possibly created under another name by the earlier offline indexer
+            logger.info("Building %s on %s, this can take a while", index.name, index.table)
+            conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index.name} ON {index.table} USING {index.definition}"))
+
+
+# Append only: never edit or reorder a migration that has shipped
+MIGRATIONS: List[Migration] = [
+    Migration(1, "legaldocument author/time listing indexes", _create_model_indexes("legaldocument")),
+    Migration(2, "legal_document_chunks HNSW embedding index", _search_index_built_offline),
+    Migration(3, "legal_document_pages full text search GIN index", _search_index_built_offline),
+    Migration(4, "retrieval tables for /ingest/", _create_retrieval_tables),
+    Migration(5, "legal_document_pages content hash", _add_page_content_hash),
+]
+
+
+def run_migrations(conn: Connection, migrations: List[Migration] = MIGRATIONS):
+    """Applies every migration newer than the recorded schema version, in one transaction."""
+    if conn.dialect.name == "postgresql":
+        # Serialize concurrent uvicorn workers starting against the same database
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('schema_migrations'))"))
+    migration_metadata.create_all(conn)
+    applied = set(conn.execute(select(schema_migrations.c.version)).scalars())
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version in applied:
+            continue
+        logger.info("Applying migration %d: %s", migration.version, migration.description)
+        migration.upgrade(conn)
+        conn.execute(schema_migrations.insert().values(
+            version=migration.version,
+            description=migration.description,
+            applied_at=datetime.now(timezone.utc),
+        ))
+
+
+if __name__ == "__main__":
+    # Offline step after deploying on a large corpus, see build_search_indexes
+    from sqlalchemy import create_engine
+    from app.config.settings import settings
+
+    logging.basicConfig(level=logging.INFO)
+    build_search_indexes(create_engine(settings.DB_URL))
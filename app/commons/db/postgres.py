@@ -1,5 +1,19 @@
+import threading
+from typing import Dict, Optional
+from prometheus_client.core import GaugeMetricFamily, REGISTRY
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.config.settings import settings
+from app.commons.db.migrations import check_search_indexes, run_migrations
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
 
 class Postgres:
     init: bool = False
@@ -7,13 +21,126 @@ class Postgres:
     def __init__(self, url: str):
         if url is None:
             url = "sqlite:///:memory:"
-        self.engine = create_engine(url)
+        self.url = url
+        self._async_engine: Optional[AsyncEngine] = None
+        self._async_tables_ready = False
+        if url == "sqlite:///:memory:":
+            # Share one connection so every thread sees the same in-memory database
+            self.engine = create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        elif url.startswith("sqlite"):
+            self.engine = create_engine(url)
+        else:
+            self.engine = create_engine(url, **self.__pool_options())
         self.init = True
         self.__create_db_and_tables()
 
+    @staticmethod
+    def __pool_options() -> dict:
+        options = {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_pre_ping": settings.DB_POOL_PRE_PING,
+            "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        }
+        if settings.DB_STATEMENT_TIMEOUT_MS:
+            options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+        return options
+
     def __create_db_and_tables(self):
+        # Register every table model before create_all, whichever router builds the engine first
+        import app.model.legal_docs_generator  # noqa: F401
+        import app.model.risk_analysis_cache  # noqa: F401
+        import app.model.analysis_job  # noqa: F401
+        import app.model.search_index_generation  # noqa: F401
         SQLModel.metadata.create_all(self.engine)
+        with self.engine.begin() as conn:
+            run_migrations(conn)
+            check_search_indexes(conn)
 
     def get_session(self):
         with Session(self.engine) as session:   
-            yield session
\ No newline at end of file
+            yield session
+
+    @property
+    def async_engine(self) -> AsyncEngine:
+        """asyncpg (or aiosqlite) engine for handlers that must not block the event loop."""
+        if self._async_engine is None:
+            url = make_url(self.url)
+            url = url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+            if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+                self._async_engine = create_async_engine(url, poolclass=StaticPool)
+            elif url.get_backend_name() == "sqlite":
+                self._async_engine = create_async_engine(url)
+                self._async_tables_ready = True
+            else:
+                options = self.__pool_options()
+                options.pop("connect_args", None)
+                if settings.DB_STATEMENT_TIMEOUT_MS:
+                    options["connect_args"] = {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+                self._async_engine = create_async_engine(url, **options)
+                self._async_tables_ready = True
+        return self._async_engine
+
+    async def get_async_session(self):
+        engine = self.async_engine
+        if not self._async_tables_ready:
+            # The in-memory fallback is a separate database for the async driver
+            async with engine.begin() as conn:
+                await conn.run_sync(SQLModel.metadata.create_all)
+                await conn.run_sync(run_migrations)
+            self._async_tables_ready = True
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    async def dispose(self):
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+            self._async_engine = None
+            self._async_tables_ready = False
+        self.engine.dispose()
+
+
+_databases: Dict[Optional[str], Postgres] = {}
+_databases_lock = threading.Lock()
+
+def get_database(url: Optional[str] = None) -> Postgres:
+    """Returns the application-wide Postgres for `url`, so all routers share one engine and pool."""
+    with _databases_lock:
+        if url not in _databases:
+            _databases[url] = Postgres(url)
+        return _databases[url]
+
+async def dispose_databases():
+    """Closes every shared engine's connections, called on application shutdown."""
+    with _databases_lock:
+        databases = list(_databases.values())
+    for db in databases:
+        await db.dispose()
+
+
+class PoolCollector:
+    """Exposes connection pool utilization of every shared engine to Prometheus."""
+
+    METRICS = {
+        "db_pool_size": ("Configured connection pool size", "size"),
+        "db_pool_checked_out": ("Connections currently checked out of the pool", "checkedout"),
+        "db_pool_checked_in": ("Idle connections held in the pool", "checkedin"),
+        "db_pool_overflow": ("Connections opened beyond pool_size", "overflow"),
+    }
+
+    def collect(self):
+        with _databases_lock:
+            databases = list(_databases.values())
+        for name, (description, method) in self.METRICS.items():
+            family = GaugeMetricFamily(name, description, labels=["database", "engine"])
+            for db in databases:
+                engines = {"sync": db.engine}
+                if db._async_engine is not None:
+                    engines["async"] = db._async_engine.sync_engine
+                for kind, engine in engines.items():
+                    pool_stat = getattr(engine.pool, method, None)
+                    if pool_stat is not None:
+                        family.add_metric([engine.url.database or "", kind], pool_stat())
+            yield family
+
+REGISTRY.register(PoolCollector())
\ No newline at end of file
@@ -13,5 +13,89 @@ class Settings:
     AI_OUTPUT = os.getenv("AI_OUTPUT") # temporary aja sampe API self deployment done
     OLLAMA_URL = os.getenv("OLLAMA_URL")
     DB_URL = os.getenv("DB_URL")
+    CHARS_PER_TOKEN = int(os.getenv("CHARS_PER_TOKEN", "4"))  # Token estimate for chunking, avoids shipping a tokenizer
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))  # Per uvicorn worker
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))  # 0 disables
+    LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")  # "gemini" or "ollama" for legal document generation
+    LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))  # Keep-alive pool of the shared Gemini client
+    LLM_MAX_CONCURRENCY_PER_MODEL = int(os.getenv("LLM_MAX_CONCURRENCY_PER_MODEL", "8"))  # Match upstream quota
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
 
-settings = Settings()
\ No newline at end of file
+    # /legal-docs-generator/documents/ listing (keyset pagination)
+    LEGAL_DOCS_PAGE_SIZE = int(os.getenv("LEGAL_DOCS_PAGE_SIZE", "50"))
+    LEGAL_DOCS_MAX_PAGE_SIZE = int(os.getenv("LEGAL_DOCS_MAX_PAGE_SIZE", "500"))
+    LEGAL_DOCS_EXPORT_BATCH_SIZE = int(os.getenv("LEGAL_DOCS_EXPORT_BATCH_SIZE", "500"))  # Rows fetched per round trip
+    LEGAL_DOCS_BULK_BATCH_SIZE = int(os.getenv("LEGAL_DOCS_BULK_BATCH_SIZE", "1000"))  # Rows per bulk insert/delete statement, a request is one transaction
+    LEGAL_DOCS_BULK_MAX_ITEMS = int(os.getenv("LEGAL_DOCS_BULK_MAX_ITEMS", "10000"))  # Per request
+
+    # Dense retrieval ("ann" walks the HNSW index, "exact" scores every chunk)
+    DENSE_SEARCH_MODE = os.getenv("DENSE_SEARCH_MODE", "ann")
+    DENSE_ANN_CANDIDATES = int(os.getenv("DENSE_ANN_CANDIDATES", "100"))  # Nearest chunks fetched before page grouping
+    DENSE_ANN_EF_SEARCH = int(os.getenv("DENSE_ANN_EF_SEARCH", "100"))  # Keep >= DENSE_ANN_CANDIDATES
+    DENSE_SIMILARITY_THRESHOLD = float(os.getenv("DENSE_SIMILARITY_THRESHOLD", "0.5"))
+    DENSE_TOP_K = int(os.getenv("DENSE_TOP_K", "20"))
+    SPARSE_TS_CONFIG = os.getenv("SPARSE_TS_CONFIG", "indonesian")  # Text search configuration of full_text_search
+    SPARSE_TOP_K = int(os.getenv("SPARSE_TOP_K", "20"))
+    SPARSE_MAX_QUERY_CHARS = int(os.getenv("SPARSE_MAX_QUERY_CHARS", "256"))
+    HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))  # Reciprocal rank fusion damping constant
+    HYBRID_TOP_K = int(os.getenv("HYBRID_TOP_K", "20"))
+
+    # /search result cache, invalidated by the search_index_generation counter
+    SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2048"))
+    SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "600"))  # Bounds writes made outside the API
+
+    # Ingestion (/ingest/): page chunking and batched bge-m3 embedding
+    INGEST_CHUNK_TOKENS = int(os.getenv("INGEST_CHUNK_TOKENS", "512"))  # Estimated tokens per chunk
+    INGEST_CHUNK_OVERLAP_TOKENS = int(os.getenv("INGEST_CHUNK_OVERLAP_TOKENS", "64"))
+    INGEST_EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "32"))  # Chunks per embed call
+    INGEST_EMBED_CONCURRENCY = int(os.getenv("INGEST_EMBED_CONCURRENCY", "2"))  # Embed calls in flight per document
+    INGEST_JOB_WORKERS = int(os.getenv("INGEST_JOB_WORKERS", "1"))  # Concurrent ingestions per uvicorn worker, queued like /analyze/jobs
+
+    # Background /analyze/jobs and /ingest/ queue ("database" persists jobs in DB_URL, "memory" is per process)
+    JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "database")
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # Concurrent analyses per uvicorn worker
+    JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1"))
+    JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))  # Running jobs without a heartbeat for this long are requeued
+    JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "15"))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))  # Recovered jobs are failed after this many claims
+    JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))  # Finished jobs and results are then deleted
+
+    # Upload limits, enforced while the upload is copied (smaller uploads are parsed from memory)
+    UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(25 * 1024 * 1024)))
+    UPLOAD_MEMORY_MAX_BYTES = int(os.getenv("UPLOAD_MEMORY_MAX_BYTES", str(4 * 1024 * 1024)))
+
+    # Document parser worker pool ("process" for pdfplumber layout analysis, "thread" for debugging)
+    PARSER_POOL_MODE = os.getenv("PARSER_POOL_MODE", "process")
+    PARSER_POOL_WORKERS = int(os.getenv("PARSER_POOL_WORKERS", os.cpu_count() or 1))
+    PARSER_POOL_MAX_QUEUE = int(os.getenv("PARSER_POOL_MAX_QUEUE", "32"))  # Waiting jobs before rejecting
+    PARSER_TIMEOUT_SECONDS = float(os.getenv("PARSER_TIMEOUT_SECONDS", "120"))
+
+    # Extraction cache keyed by upload SHA-256 (set EXTRACTION_CACHE_DIR, e.g. uploads/.extraction_cache, to persist)
+    EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "256"))
+    EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR")
+
+    # Dense retrieval query embedding cache (set EMBEDDING_CACHE_DIR to persist float32 vectors)
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "4096"))  # ~16 KB each for bge-m3
+    EMBEDDING_CACHE_TTL_SECONDS = float(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", str(24 * 3600)))
+    EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR")
+    EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))  # Queries per embed call
+    EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5"))  # Coalescing window
+
+    # AI risk analysis response cache (stored in the DB_URL database)
+    RISK_CACHE_TTL_SECONDS = int(os.getenv("RISK_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    RISK_CACHE_MAX_ENTRIES = int(os.getenv("RISK_CACHE_MAX_ENTRIES", "10000"))
+
+    # Shared async OpenRouter client
+    OPENROUTER_MAX_CONNECTIONS = int(os.getenv("OPENROUTER_MAX_CONNECTIONS", "64"))  # Keep-alive pool size
+    OPENROUTER_MAX_CONCURRENCY = int(os.getenv("OPENROUTER_MAX_CONCURRENCY", "32"))  # In-flight analyses per worker
+    OPENROUTER_TIMEOUT_SECONDS = float(os.getenv("OPENROUTER_TIMEOUT_SECONDS", "180"))
+
+    # Chunked (map-reduce) risk analysis for long contracts
+    RISK_CHUNK_TOKEN_BUDGET = int(os.getenv("RISK_CHUNK_TOKEN_BUDGET", "6000"))  # Estimated tokens per window
+    RISK_CHUNK_CONCURRENCY = int(os.getenv("RISK_CHUNK_CONCURRENCY", "4"))
+    RISK_CHUNK_RETRIES = int(os.getenv("RISK_CHUNK_RETRIES", "1"))  # Extra attempts for a window whose model call failed
+
+settings = Settings()
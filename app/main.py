@@ -1,6 +1,6 @@
 from fastapi import FastAPI
 from app.routers import health_check, analyze
-from app.routers.retrieval import search
+from app.routers.retrieval import search, ingest
 from app.routers.metrics import autometrics
 from app.routers.legal_docs_generator import deepseek, legal_docs
 from fastapi.middleware.cors import CORSMiddleware
@@ -10,6 +10,13 @@ from slowapi.errors import RateLimitExceeded
 from prometheus_fastapi_instrumentator import Instrumentator
 from contextlib import asynccontextmanager
 from app.config.graylog import logger
+from app.utils.parser_pool import parser_pool
+from app.utils.ai_client import AIClient
+from app.services.legal_docs_generator.generation_service import generation_service
+from app.commons.db.postgres import dispose_databases
+from app.services.retrieval.embedder import embedder
+from app.routers.analyze import analysis_workers
+from app.routers.retrieval.ingest import ingestion_workers
 
 limiter = Limiter(key_func=get_remote_address)
 
@@ -18,7 +25,20 @@ instrumentator = Instrumentator()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     instrumentator.expose(app)
+    parser_pool.start()
+    AIClient.start()
+    generation_service.start()
+    embedder.start()
+    await analysis_workers.start()
+    await ingestion_workers.start()
     yield
+    await ingestion_workers.stop()
+    await analysis_workers.stop()
+    await generation_service.close()
+    await embedder.close()
+    await AIClient.close()
+    await dispose_databases()
+    parser_pool.shutdown()
 
 app = FastAPI(lifespan=lifespan)
 app.state.limiter = limiter
@@ -46,6 +66,7 @@ app.include_router(deepseek.router)
 app.include_router(legal_docs.router)
 app.include_router(analyze.router)
 app.include_router(search.router)
+app.include_router(ingest.router)
 app.include_router(autometrics.router)
 
 # Add CORS middleware
@@ -0,0 +1,25 @@
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+from typing import Optional
+import uuid
+from uuid import UUID
+
+class AnalysisJob(SQLModel, table=True):
+    __tablename__ = "analysis_jobs"
+
+    id: UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    kind: str = Field(default="analysis", index=True)  # analysis, ingestion; each kind has its own queue and workers
+    status: str = Field(default="queued", index=True)  # queued, running, succeeded, failed
+    file_type: str
+    file_path: Optional[str] = None  # Upload spooled to disk, cleared once the finished job's file is removed
+    content_hash: str
+    bypass_cache: bool = False
+    chunked: Optional[bool] = None  # None picks the mode from the document length
+    params: Optional[str] = None  # JSON of kind-specific arguments, e.g. the document id and title to ingest
+    result: Optional[str] = None  # JSON of the /analyze/ response
+    error: Optional[str] = None
+    owner: Optional[str] = None  # Worker pool holding the lease while running
+    lease_expires_at: Optional[datetime] = Field(default=None, index=True)  # Extended by the owner's heartbeat
+    attempts: int = 0
+    created_at: datetime = Field(index=True)
+    updated_at: datetime
\ No newline at end of file
@@ -1,12 +1,32 @@
+from sqlalchemy import Index, desc
 from sqlmodel import SQLModel, Field
 from datetime import date
+from typing import List
 import uuid
 from uuid import UUID
 
-class LegalDocument(SQLModel, table=True):
-    id: UUID = Field(default_factory=uuid.uuid4, primary_key=True, index=True)
+class LegalDocumentBase(SQLModel):
     title: str
     prompt: str
     content: str
     time: date
-    author: str
\ No newline at end of file
+    author: str
+
+class LegalDocument(LegalDocumentBase, table=True):
+    __table_args__ = (
+        # Keyset listings order by (time, id) newest first, optionally filtered by author
+        Index("ix_legaldocument_author_time", "author", desc("time"), desc("id")),
+        Index("ix_legaldocument_time", desc("time"), desc("id")),
+    )
+
+    id: UUID = Field(default_factory=uuid.uuid4, primary_key=True, index=True)
+
+class LegalDocumentSummary(SQLModel):
+    """Listing projection of `LegalDocument` without the large `prompt` and `content` columns."""
+    id: UUID
+    title: str
+    time: date
+    author: str
+
+class LegalDocumentBulkDelete(SQLModel):
+    ids: List[UUID]
\ No newline at end of file
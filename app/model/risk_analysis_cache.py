@@ -0,0 +1,12 @@
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+
+class RiskAnalysisCache(SQLModel, table=True):
+    __tablename__ = "risk_analysis_cache"
+
+    cache_key: str = Field(primary_key=True)  # sha256(model, prompt version, normalized text hash)
+    model: str
+    prompt_version: str
+    ai_response: str
+    created_at: datetime = Field(index=True)
+    last_accessed_at: datetime = Field(index=True)
@@ -0,0 +1,7 @@
+from sqlmodel import SQLModel, Field
+
+class SearchIndexGeneration(SQLModel, table=True):
+    __tablename__ = "search_index_generation"
+
+    id: int = Field(default=1, primary_key=True)  # Single row
+    generation: int = 0  # Bumped in the same transaction as every indexed-content write
\ No newline at end of file
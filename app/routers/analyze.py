@@ -1,58 +1,325 @@
+import asyncio
+import json
 import os
-import shutil
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from app.utils.parsers import ParserFactory
-from app.utils.ai_client import AIClient
+import time
+from typing import Iterator, Optional, Union
+from uuid import UUID
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Header
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from app.utils.parsers import ParserFactory, PDFParser, PageRange, parse_page_range, select_pages
+from app.utils.parser_pool import parser_pool, ParserCrashedError, ParserPoolFullError, ParserSlot
+from app.utils.extraction_cache import extraction_cache, ExtractionCache
+from app.utils.uploads import SpooledUpload, UploadTooLargeError, save_upload, spool_upload, unique_upload_path
+from app.services.risk_analysis.risk_analysis_service import risk_analysis_service
 from app.utils.risk_parser import RiskParser
+from app.config.settings import settings
+from app.commons.db.postgres import get_database
+from app.model.analysis_job import AnalysisJob
+from app.services.jobs.job_queue import create_job_queue, job_status, JobWorkerPool, TERMINAL_STATUSES
 
 router = APIRouter()
 
-UPLOAD_DIR = "uploads"
+async def receive_upload(file: UploadFile, file_extension: str) -> SpooledUpload:
+    """
+    Spools the upload (in memory when small), rejecting oversized files with 413.
+    The copy and hashing run in the threadpool so large uploads don't block the event loop.
+    """
+    try:
+        return await run_in_threadpool(
+            spool_upload, file, file_extension, settings.UPLOAD_MAX_BYTES, settings.UPLOAD_MEMORY_MAX_BYTES
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+async def extract_in_pool(file_extension: str, file_path: Union[str, bytes], bounded: bool = True, **options):
+    """Runs the parser off the event loop, mapping pool back-pressure to HTTP errors."""
+    try:
+        return await parser_pool.extract_text(file_extension, file_path, bounded=bounded, **options)
+    except (ParserPoolFullError, ParserCrashedError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="❌ Pemrosesan dokumen melebihi batas waktu.")
+
+async def extract_cached(file_extension: str, file_path: Union[str, bytes], content_hash: str, bounded: bool = True):
+    """
+    Returns cached pages for previously seen uploads, parsing (and caching) only on a miss.
+    Background jobs pass `bounded=False` to wait for a parser slot instead of failing with a 503.
+    """
+    cache_key = ExtractionCache.make_key(content_hash, file_extension)
+    cached = extraction_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    extracted = await extract_in_pool(file_extension, file_path, bounded=bounded)
+    extraction_cache.set(cache_key, extracted)
+    return extracted
+
+async def extract_selected(file_extension: str, file_path: Union[str, bytes], content_hash: str,
+                           page_range: Optional[PageRange], max_pages: Optional[int]):
+    """
+    Serves a page selection from a cached full extraction when there is one; otherwise parses
+    only the selected pages. Partial results are not cached, the cache holds whole documents.
+    """
+    cached = extraction_cache.get(ExtractionCache.make_key(content_hash, file_extension))
+    if cached is not None:
+        return select_pages(cached, page_range, max_pages)
+    return await extract_in_pool(file_extension, file_path, page_range=page_range, max_pages=max_pages)
+
+def parse_page_selection(file_extension: str, pages: Optional[str], max_pages: Optional[int]) -> Optional[PageRange]:
+    """Validates the `pages` / `max_pages` query, mapping bad input to 400."""
+    if pages is None and max_pages is None:
+        return None
+    if file_extension != "pdf":
+        raise HTTPException(status_code=400, detail="❌ Pemilihan halaman hanya didukung untuk PDF.")
+    try:
+        return parse_page_range(pages) if pages is not None else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/extract_text/")
-async def extract_text_from_document(file: UploadFile = File(...)):
-    """Handles document text extraction request."""
+async def extract_text_from_document(
+    file: UploadFile = File(...),
+    pages: Optional[str] = Query(None, description="PDF pages to extract, e.g. 1-3,7,10-"),
+    max_pages: Optional[int] = Query(None, ge=1, description="Stop after this many (selected) PDF pages"),
+):
+    """
+    Handles document text extraction request. For PDFs, `pages` and `max_pages` restrict
+    extraction to the requested pages, returned in document order; other pages are skipped.
+    """
     file_extension = file.filename.split(".")[-1].lower()
+    page_range = parse_page_selection(file_extension, pages, max_pages)
 
-    # Save file temporarily
-    temp_file_path = file.filename
-    with open(temp_file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    upload = await receive_upload(file, file_extension)
 
     # Extract text
-    parser = ParserFactory.get_parser(file_extension)
-    # extracted_text = parser.extract_text(temp_file_path)
-    pages_text = parser.extract_text(temp_file_path)
-
-    # Cleanup temp file
-    os.remove(temp_file_path)
+    try:
+        if pages is None and max_pages is None:
+            pages_text = await extract_cached(file_extension, upload.source, upload.content_hash)
+        else:
+            pages_text = await extract_selected(file_extension, upload.source, upload.content_hash, page_range, max_pages)
+    finally:
+        # Cleanup temp file, if the upload was too large to keep in memory
+        upload.cleanup()
 
-    # return {"extracted_text": extracted_text}
-    print(pages_text)
     return { "pages_text": pages_text }
 
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+def stream_pages(
+    parser,
+    upload: SpooledUpload,
+    stream_format: str,
+    cache_key: Optional[str] = None,
+    cached: Optional[Union[list, str]] = None,
+    slot: Optional[ParserSlot] = None,
+) -> Iterator[str]:
+    """
+    Formats pages as NDJSON lines or SSE events while they are parsed, then removes the temp file
+    and releases the parser pool `slot`. Parsing stops once it exceeds the pool's job timeout.
+    """
+    try:
+        if cached is not None:
+            pages = cached if isinstance(cached, list) else [cached]
+        else:
+            pages = parser.iter_pages(upload.source)
+
+        deadline = time.monotonic() + parser_pool.timeout
+        page_texts = []
+        for page_number, text in enumerate(pages, start=1):
+            if cached is None and time.monotonic() > deadline:
+                raise TimeoutError("❌ Pemrosesan dokumen melebihi batas waktu.")
+            page_texts.append(text)
+            payload = json.dumps({"page": page_number, "text": text})
+            yield f"event: page\ndata: {payload}\n\n" if stream_format == "sse" else payload + "\n"
+
+        if cached is None and cache_key:
+            # Store the same shape extract_text returns: a page list for PDF, one string otherwise
+            extraction_cache.set(cache_key, page_texts if isinstance(parser, PDFParser) else "".join(page_texts))
+        if stream_format == "sse":
+            yield f"event: done\ndata: {json.dumps({'pages': len(page_texts)})}\n\n"
+    except Exception as e:
+        # Headers are already sent, so report the failure in-band
+        payload = json.dumps({"error": str(e)})
+        yield f"event: error\ndata: {payload}\n\n" if stream_format == "sse" else payload + "\n"
+    finally:
+        upload.cleanup()
+        if slot is not None:
+            slot.release()
+
+@router.post("/extract_text/stream")
+async def stream_text_from_document(
+    file: UploadFile = File(...),
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+):
+    """Streams extracted text page by page so clients can render the first pages immediately."""
+    file_extension = file.filename.split(".")[-1].lower()
+    try:
+        parser = ParserFactory.get_parser(file_extension)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Spilled to a temp file only when large, removed once the stream is exhausted
+    upload = await receive_upload(file, file_extension)
+    cache_key = ExtractionCache.make_key(upload.content_hash, file_extension)
+    cached = extraction_cache.get(cache_key)
+
+    # Parsing happens outside the pool's executor, but still takes a pool slot (or a 503)
+    slot = None
+    if cached is None:
+        try:
+            slot = parser_pool.acquire()
+        except ParserPoolFullError as e:
+            upload.cleanup()
+            raise HTTPException(status_code=503, detail=str(e))
+
+    def release():
+        # The generator's finally never runs if the client leaves before streaming starts
+        upload.cleanup()
+        if slot is not None:
+            slot.release()
+
+    # Sync generator: Starlette iterates it in a worker thread, keeping the event loop free
+    return StreamingResponse(
+        stream_pages(parser, upload, format, cache_key, cached, slot),
+        media_type=STREAM_MEDIA_TYPES[format],
+        background=BackgroundTask(release),
+    )
+
 @router.post("/analyze/")
-async def analyze_document(file: UploadFile = File(...)):
-    """Handles document analysis request."""
+async def analyze_document(
+    file: UploadFile = File(...),
+    x_cache_bypass: Optional[str] = Header(None),
+    chunked: Optional[bool] = Query(None),
+):
+    """
+    Handles document analysis request. Send `X-Cache-Bypass: true` to force a fresh AI analysis.
+    Long documents are analyzed in chunks automatically; `?chunked=true|false` forces the mode.
+    """
     file_extension = file.filename.split(".")[-1].lower()
 
-    # Save file temporarily
-    temp_file_path = os.path.join(UPLOAD_DIR, file.filename)
-    with open(temp_file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    upload = await receive_upload(file, file_extension)
 
     # Extract text
-    parser = ParserFactory.get_parser(file_extension)
-    extracted_text = parser.extract_text(temp_file_path)
+    try:
+        extracted_text = await extract_cached(file_extension, upload.source, upload.content_hash)
+    finally:
+        # Cleanup temp file, if the upload was too large to keep in memory
+        upload.cleanup()
 
-    # Cleanup temp file
-    os.remove(temp_file_path)
+    return await analyze_text(extracted_text, parse_bypass(x_cache_bypass), chunked)
 
-    ai_response = AIClient.analyze_risk(extracted_text)
+def parse_bypass(x_cache_bypass: Optional[str]) -> bool:
+    return x_cache_bypass is not None and x_cache_bypass.lower() in ("1", "true", "yes")
 
-    parsed_risks = RiskParser.parse_ai_risk_analysis(ai_response)
+async def analyze_text(extracted_text: Union[list, str], bypass_cache: bool, chunked: Optional[bool]) -> dict:
+    """Runs the AI risk analysis shared by /analyze/ and background analysis jobs."""
+    if chunked is None:
+        chunked = risk_analysis_service.needs_chunking(extracted_text)
+
+    if chunked:
+        ai_response, parsed_risks, failed_chunks = await risk_analysis_service.analyze_chunked(
+            extracted_text, bypass_cache=bypass_cache
+        )
+    else:
+        ai_response = await risk_analysis_service.analyze(extracted_text, bypass_cache=bypass_cache)
+        parsed_risks = RiskParser.parse_ai_risk_analysis(ai_response)
+        failed_chunks = [1] if risk_analysis_service.is_failed(ai_response) else []
     return {
             "extracted_text": extracted_text,  # Original text extracted from the document
             "ai_response": ai_response,  # The raw AI response for transparency
-            "risks": parsed_risks  # The parsed risks from the AI response
-        }
\ No newline at end of file
+            "risks": parsed_risks,  # The parsed risks from the AI response
+            "failed_chunks": failed_chunks  # Parts of the document the AI could not analyze, empty when complete
+        }
+
+async def run_analysis_job(job: AnalysisJob) -> dict:
+    """Job handler: same pipeline as /analyze/. The worker pool removes the upload once the outcome is recorded."""
+    extracted_text = await extract_cached(job.file_type, job.file_path, job.content_hash, bounded=False)
+    return await analyze_text(extracted_text, job.bypass_cache, job.chunked)
+
+analysis_queue = create_job_queue(
+    settings.JOB_QUEUE_BACKEND, get_database(settings.DB_URL), settings.JOB_LEASE_SECONDS, settings.JOB_MAX_ATTEMPTS
+)
+analysis_workers = JobWorkerPool(
+    analysis_queue,
+    run_analysis_job,
+    workers=settings.JOB_WORKERS,
+    poll_interval=settings.JOB_POLL_INTERVAL_SECONDS,
+    heartbeat_interval=settings.JOB_HEARTBEAT_SECONDS,
+    retention_seconds=settings.JOB_RETENTION_SECONDS,
+)
+
+async def get_job_or_404(job_id: UUID) -> AnalysisJob:
+    job = await analysis_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/analyze/jobs", status_code=202)
+async def submit_analysis_job(
+    file: UploadFile = File(...),
+    x_cache_bypass: Optional[str] = Header(None),
+    chunked: Optional[bool] = Query(None),
+):
+    """
+    Queues a document analysis and returns immediately with a job id.
+    Poll `GET /analyze/jobs/{job_id}` or subscribe to `/analyze/jobs/{job_id}/events` for the result.
+    """
+    file_extension = file.filename.split(".")[-1].lower()
+    try:
+        ParserFactory.get_parser(file_extension)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Always on disk, the file outlives this request until a worker picks the job up
+    temp_file_path = unique_upload_path(file_extension)
+    try:
+        content_hash = await run_in_threadpool(save_upload, file, temp_file_path, max_bytes=settings.UPLOAD_MAX_BYTES)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    job = AnalysisJob(
+        file_type=file_extension,
+        file_path=temp_file_path,
+        content_hash=content_hash,
+        bypass_cache=parse_bypass(x_cache_bypass),
+        chunked=chunked,
+    )
+    try:
+        job = await analysis_queue.enqueue(job)
+    except Exception:
+        os.remove(temp_file_path)
+        raise
+    analysis_workers.notify()
+    return {"job_id": str(job.id), "status": job.status}
+
+@router.get("/analyze/jobs/{job_id}")
+async def get_analysis_job(job_id: UUID):
+    """Returns the job status, plus the analysis result or the error once it has finished."""
+    return job_status(await get_job_or_404(job_id))
+
+async def job_events(job_id: UUID):
+    """Emits a `status` event on every transition, then a final `result` or `error` event."""
+    last_status = None
+    while True:
+        job = await analysis_queue.get(job_id)
+        if job.status != last_status:
+            last_status = job.status
+            yield f"event: status\ndata: {json.dumps({'status': job.status})}\n\n"
+        if job.status in TERMINAL_STATUSES:
+            body = job_status(job)
+            event = "result" if job.status == "succeeded" else "error"
+            payload = body["result"] if event == "result" else {"error": body.get("error")}
+            yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+            return
+        await asyncio.sleep(settings.JOB_POLL_INTERVAL_SECONDS)
+
+@router.get("/analyze/jobs/{job_id}/events")
+async def stream_analysis_job(job_id: UUID):
+    """Server-sent events for a job, so clients don't have to poll."""
+    await get_job_or_404(job_id)
+    return StreamingResponse(job_events(job_id), media_type="text/event-stream")
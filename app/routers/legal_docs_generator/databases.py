@@ -1,49 +1,173 @@
-from fastapi import FastAPI, Depends, HTTPException
-from sqlmodel import SQLModel, Field, Session, select
+import base64
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from prometheus_client import Histogram
+from sqlalchemy import delete, insert, tuple_
+from sqlmodel import SQLModel, Field, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import date
-from typing import List
+from typing import List, Literal, Optional, Union
 from uuid import UUID, uuid4
-from app.model.legal_docs_generator import LegalDocument
+from app.model.legal_docs_generator import LegalDocument, LegalDocumentBase, LegalDocumentBulkDelete, LegalDocumentSummary
 from app.config.settings import settings
 from fastapi import APIRouter
-from app.commons.db.postgres import Postgres
+from app.commons.db.postgres import get_database
 
-postgres_db = Postgres(settings.DB_URL)
+postgres_db = get_database(settings.DB_URL)
 PATH = "/legal-docs-generator"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
 
-def get_session():
-    return next(postgres_db.get_session())  # use generator from Postgres
+BULK_BATCH_SECONDS = Histogram(
+    "legal_docs_bulk_batch_seconds", "Duration of one bulk create/delete batch statement", ["operation"]
+)
+
+async def get_session():
+    async for session in postgres_db.get_async_session():  # use async generator from Postgres
+        yield session
 
 router = APIRouter()
 
+def encode_cursor(doc_time: date, doc_id: UUID) -> str:
+    return base64.urlsafe_b64encode(f"{doc_time.isoformat()}|{doc_id}".encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        doc_time, doc_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return date.fromisoformat(doc_time), UUID(doc_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def document_listing(fields: str, author: Optional[str] = None):
+    """Newest-first select over (time, id), optionally projected to the summary columns."""
+    if fields == "summary":
+        statement = select(LegalDocument.id, LegalDocument.title, LegalDocument.time, LegalDocument.author)
+    else:
+        statement = select(LegalDocument)
+    if author is not None:
+        statement = statement.where(LegalDocument.author == author)
+    return statement.order_by(LegalDocument.time.desc(), LegalDocument.id.desc())
+
+async def read_page(session: AsyncSession, response: Response, statement, limit: int, cursor: Optional[str]):
+    """Keyset pagination: fetches one extra row to decide whether to emit the next cursor."""
+    if cursor is not None:
+        statement = statement.where(tuple_(LegalDocument.time, LegalDocument.id) < decode_cursor(cursor))
+    rows = (await session.exec(statement.limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].time, rows[-1].id)
+    return rows
+
+PageSize = Query(settings.LEGAL_DOCS_PAGE_SIZE, ge=1, le=settings.LEGAL_DOCS_MAX_PAGE_SIZE)
+Fields = Query("full", description="`summary` omits the prompt and content columns")
+
 @router.post(PATH + "/documents/", response_model=LegalDocument)
-def create_doc(doc: LegalDocument, session: Session = Depends(get_session)):
+async def create_doc(doc: LegalDocument, session: AsyncSession = Depends(get_session)):
     session.add(doc)
-    session.commit()
-    session.refresh(doc)
+    await session.commit()
+    await session.refresh(doc)
     return doc
 
-@router.get(PATH + "/documents/", response_model=List[LegalDocument])
-def read_all_docs(session: Session = Depends(get_session)):
-    return session.exec(select(LegalDocument)).all()
+def check_bulk_size(count: int):
+    if count > settings.LEGAL_DOCS_BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.LEGAL_DOCS_BULK_MAX_ITEMS} documents per request")
+
+def batches(items: list):
+    size = settings.LEGAL_DOCS_BULK_BATCH_SIZE
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+@asynccontextmanager
+async def commit_or_rollback(session: AsyncSession):
+    """Commits the whole bulk request, or rolls it back so a failed batch leaves nothing behind."""
+    try:
+        yield
+        await session.commit()
+    except BaseException:
+        await session.rollback()
+        raise
+
+@router.post(PATH + "/documents/bulk", response_model=dict)
+async def create_docs_bulk(docs: List[LegalDocumentBase], session: AsyncSession = Depends(get_session)):
+    """
+    Inserts documents with one executemany per batch, skipping the per-row refresh.
+    The request is a single transaction: either every document is created or none is.
+    """
+    check_bulk_size(len(docs))
+    rows = [{"id": uuid4(), **doc.model_dump()} for doc in docs]
+    async with commit_or_rollback(session):
+        for batch in batches(rows):
+            started = time.perf_counter()
+            await session.execute(insert(LegalDocument), batch)
+            BULK_BATCH_SECONDS.labels("create").observe(time.perf_counter() - started)
+    return {"created": len(rows), "ids": [row["id"] for row in rows]}
+
+@router.post(PATH + "/documents/bulk-delete", response_model=dict)
+async def delete_docs_bulk(request: LegalDocumentBulkDelete, session: AsyncSession = Depends(get_session)):
+    """Deletes in batches within a single transaction: either every batch applies or none does."""
+    check_bulk_size(len(request.ids))
+    deleted = 0
+    async with commit_or_rollback(session):
+        for batch in batches(request.ids):
+            started = time.perf_counter()
+            result = await session.execute(delete(LegalDocument).where(LegalDocument.id.in_(batch)))
+            BULK_BATCH_SECONDS.labels("delete").observe(time.perf_counter() - started)
+            deleted += result.rowcount
+    return {"deleted": deleted}
+
+@router.get(PATH + "/documents/", response_model=List[Union[LegalDocument, LegalDocumentSummary]])
+async def read_all_docs(
+    response: Response,
+    limit: int = PageSize,
+    cursor: Optional[str] = None,
+    fields: Literal["full", "summary"] = Fields,
+    session: AsyncSession = Depends(get_session),
+):
+    return await read_page(session, response, document_listing(fields), limit, cursor)
+
+@router.get(PATH + "/documents/export")
+async def export_docs(fields: Literal["full", "summary"] = Fields):
+    """Streams every document as one JSON array without holding the table in memory."""
+    async def generate():
+        # The request-scoped session is closed before a streamed body is sent, so open our own
+        async for session in postgres_db.get_async_session():
+            rows = await session.stream(
+                document_listing(fields).execution_options(yield_per=settings.LEGAL_DOCS_EXPORT_BATCH_SIZE)
+            )
+            yield "["
+            separator = ""
+            async for row in rows:
+                item = row[0] if fields == "full" else LegalDocumentSummary.model_validate(row._mapping)
+                yield separator + item.model_dump_json()
+                separator = ","
+            yield "]"
+
+    return StreamingResponse(generate(), media_type="application/json")
 
 @router.get(PATH + "/documents/{doc_id}", response_model=LegalDocument)
-def read_doc(doc_id: UUID, session: Session = Depends(get_session)):
-    doc = session.get(LegalDocument, doc_id)
+async def read_doc(doc_id: UUID, session: AsyncSession = Depends(get_session)):
+    doc = await session.get(LegalDocument, doc_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
     return doc
 
-@router.get(PATH + "/documents/author/{author}", response_model=List[LegalDocument])
-def read_docs_by_author(author: str, session: Session = Depends(get_session)):
-    statement = select(LegalDocument).where(LegalDocument.author == author)
-    return session.exec(statement).all()
+@router.get(PATH + "/documents/author/{author}", response_model=List[Union[LegalDocument, LegalDocumentSummary]])
+async def read_docs_by_author(
+    author: str,
+    response: Response,
+    limit: int = PageSize,
+    cursor: Optional[str] = None,
+    fields: Literal["full", "summary"] = Fields,
+    session: AsyncSession = Depends(get_session),
+):
+    return await read_page(session, response, document_listing(fields, author), limit, cursor)
 
 @router.delete(PATH + "/documents/{doc_id}", response_model=dict)
-def delete_doc(doc_id: UUID, session: Session = Depends(get_session)):
-    doc = session.get(LegalDocument, doc_id)
+async def delete_doc(doc_id: UUID, session: AsyncSession = Depends(get_session)):
+    doc = await session.get(LegalDocument, doc_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
-    session.delete(doc)
-    session.commit()
+    await session.delete(doc)
+    await session.commit()
     return {"message": "Deleted successfully"}
\ No newline at end of file
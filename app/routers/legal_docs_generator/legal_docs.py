@@ -1,29 +1,22 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from app.routers.legal_docs_generator.dtos import LegalDocumentFormRequest
-from app.routers.legal_docs_generator.deepseek import deepseek_stream_response
-from fastapi.responses import PlainTextResponse
-import httpx
+from app.services.legal_docs_generator.generation_service import generation_service, prefetch_first_token
+from slowapi import Limiter
+from slowapi.util import get_remote_address
 import html
 
+limiter = Limiter(key_func=get_remote_address)
 router = APIRouter()
 
-async def fetch_deepseek_response(request_data, request: Request):
-    """Send request to DeepSeek and stream the response"""
-    base_url = str(request.base_url).rstrip("/")  # Extract base URL
-    deepseek_api_url = f"{base_url}/deepseek"
-
-    async with httpx.AsyncClient() as client:
-        response = await client.post(deepseek_api_url, json=request_data)
-        return html.escape(response.text)
-
-    # async with httpx.AsyncClient() as client:
-    #     async with client.stream("POST", deepseek_api_url , json=request_data) as response:
-    #         async for chunk in response.aiter_text():
-    #             yield html.escape(chunk)
+async def fetch_deepseek_response(request_data):
+    """Generate the document in-process and stream the escaped response"""
+    async for chunk in generation_service.stream(request_data["system_prompt"], request_data["query"]):
+        yield html.escape(chunk)
 
 
 @router.post("/legal-docs-generator/generate", response_class=StreamingResponse)
+@limiter.limit("5/minute")
 async def generate_legal_document(data: LegalDocumentFormRequest, request: Request):
     """
         Process user input and send request to DeepSeek
@@ -85,7 +78,8 @@ async def generate_legal_document(data: LegalDocumentFormRequest, request: Reque
         ])
     }
 
-    result = await fetch_deepseek_response(deepseek_payload, request)
-    return PlainTextResponse(result, media_type="text/plain")
-
-    # return StreamingResponse(fetch_deepseek_response(deepseek_payload, request), media_type="text/plain")
\ No newline at end of file
+    try:
+        tokens = await prefetch_first_token(fetch_deepseek_response(deepseek_payload))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"❌ Gagal membuat dokumen: {e}")
+    return StreamingResponse(tokens, media_type="text/plain")
\ No newline at end of file
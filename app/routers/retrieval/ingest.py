@@ -0,0 +1,84 @@
+import json
+import os
+from dataclasses import asdict
+from typing import Optional
+from uuid import UUID, uuid4
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from app.commons.db.postgres import get_database
+from app.model.analysis_job import AnalysisJob
+from app.services.ingestion.ingestion_service import ingestion_service
+from app.services.jobs.job_queue import create_job_queue, job_status, JobWorkerPool
+from app.utils.parsers import ParserFactory
+from app.config.settings import settings
+from app.utils.uploads import UploadTooLargeError, save_upload, unique_upload_path
+
+router = APIRouter()
+
+async def run_ingestion_job(job: AnalysisJob) -> dict:
+    """Job handler for /ingest/. The worker pool removes the upload once the outcome is recorded."""
+    params = json.loads(job.params)
+    result = await ingestion_service.run(job.file_type, job.file_path, UUID(params["document_id"]), params["title"])
+    return {**asdict(result), "document_id": str(result.document_id)}
+
+ingestion_queue = create_job_queue(
+    settings.JOB_QUEUE_BACKEND,
+    get_database(settings.DB_URL),
+    settings.JOB_LEASE_SECONDS,
+    settings.JOB_MAX_ATTEMPTS,
+    kind="ingestion",
+)
+ingestion_workers = JobWorkerPool(
+    ingestion_queue,
+    run_ingestion_job,
+    workers=settings.INGEST_JOB_WORKERS,
+    poll_interval=settings.JOB_POLL_INTERVAL_SECONDS,
+    heartbeat_interval=settings.JOB_HEARTBEAT_SECONDS,
+    retention_seconds=settings.JOB_RETENTION_SECONDS,
+)
+
+@router.post("/ingest/", status_code=202)
+async def ingest_document(
+    file: UploadFile = File(...),
+    title: Optional[str] = Form(None),
+    document_id: Optional[UUID] = Form(None),
+):
+    """
+    Queues a document for indexing in /search. Pass an existing `document_id` to re-index
+    it; its previous pages and chunks are replaced. Poll `GET /ingest/jobs/{job_id}` for the outcome.
+    """
+    file_extension = file.filename.split(".")[-1].lower()
+    try:
+        ParserFactory.get_parser(file_extension)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    document_id = document_id or uuid4()
+    # Unique name, the file outlives this request until a worker has indexed it
+    temp_file_path = unique_upload_path(file_extension)
+    try:
+        content_hash = await run_in_threadpool(save_upload, file, temp_file_path, max_bytes=settings.UPLOAD_MAX_BYTES)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    job = AnalysisJob(
+        file_type=file_extension,
+        file_path=temp_file_path,
+        content_hash=content_hash,
+        params=json.dumps({"document_id": str(document_id), "title": title or file.filename}),
+    )
+    try:
+        job = await ingestion_queue.enqueue(job)
+    except Exception:
+        os.remove(temp_file_path)
+        raise
+    ingestion_workers.notify()
+    return {"job_id": str(job.id), "document_id": document_id, "status": job.status}
+
+@router.get("/ingest/jobs/{job_id}")
+async def get_ingestion_job(job_id: UUID):
+    """Returns the ingestion status, plus the page/chunk counts or the error once it has finished."""
+    job = await ingestion_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_status(job)
\ No newline at end of file
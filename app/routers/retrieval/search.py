@@ -1,15 +1,16 @@
 from fastapi import APIRouter, Depends
-from sqlmodel import Session
-from app.commons.db.postgres import Postgres
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.commons.db.postgres import get_database
 from app.services.retrieval.retrieval_service import RetrievalService, RetrievalServiceFactory
+from app.services.retrieval.search_cache import search_cache
 from app.config.settings import settings
 
-postgres_db = Postgres(settings.DB_URL)
-def get_retrieval_strategy(method: str, db: Session = Depends(postgres_db.get_session)):    
-    yield RetrievalService(RetrievalServiceFactory(method).create(db))
+postgres_db = get_database(settings.DB_URL)
+async def get_retrieval_strategy(method: str, db: AsyncSession = Depends(postgres_db.get_async_session)):    
+    yield RetrievalService(RetrievalServiceFactory(method).create(db), cache=search_cache)
 
 router = APIRouter()
 
 @router.get("/search")
 async def search(query: str, retriever: RetrievalService = Depends(get_retrieval_strategy)):
-    return retriever.retrieve(query)
\ No newline at end of file
+    return await retriever.retrieve(query)
\ No newline at end of file
@@ -0,0 +1,31 @@
+from typing import List
+
+from app.config.settings import settings
+
+
+def chunk_page(text: str, chunk_tokens: int, overlap_tokens: int) -> List[str]:
+    """
+    Splits one page into windows of about `chunk_tokens` estimated tokens, each repeating
+    the last `overlap_tokens` of the previous one so clauses cut at a boundary stay searchable.
+    Cuts fall on whitespace where possible.
+    """
+    text = text.strip()
+    max_chars = chunk_tokens * settings.CHARS_PER_TOKEN
+    overlap_chars = min(overlap_tokens * settings.CHARS_PER_TOKEN, max_chars // 2)
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        if end < len(text):
+            cut = max(text.rfind("\n", start, end), text.rfind(" ", start, end))
+            if cut > start + overlap_chars:
+                end = cut
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        next_start = end - overlap_chars
+        space = text.find(" ", next_start, end)
+        start = space + 1 if space != -1 else next_start
+    return chunks
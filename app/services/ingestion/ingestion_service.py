@@ -0,0 +1,199 @@
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Tuple, Union
+from uuid import UUID
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import bindparam
+from sqlmodel import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.commons.db.postgres import Postgres, get_database
+from app.config.settings import settings
+from app.services.ingestion.chunking import chunk_page
+from app.services.retrieval.embedder import EMBEDDING_MODEL, embedder
+from app.services.retrieval.search_cache import bump_generation
+from app.utils.parser_pool import parser_pool
+
+logger = logging.getLogger(__name__)
+
+INGEST_PAGES = Counter("ingest_pages", "Pages written to legal_document_pages (rate() gives pages/sec)")
+INGEST_CHUNKS = Counter("ingest_chunks", "Chunks embedded and written to legal_document_chunks (rate() gives chunks/sec)")
+INGEST_PAGES_UNCHANGED = Counter("ingest_pages_unchanged", "Re-indexed pages skipped because their content hash matched")
+INGEST_STAGE_SECONDS = Histogram("ingest_stage_seconds", "Time spent per ingestion stage", ["stage"])
+
+UPSERT_DOCUMENT = text("""
+    INSERT INTO legal_documents (id, title) VALUES (:id, :title)
+    ON CONFLICT (id) DO UPDATE SET title = EXCLUDED.title
+""")
+SELECT_PAGE_HASHES = text("SELECT page_number, content_hash FROM legal_document_pages WHERE document_id = :document_id")
+DELETE_PAGES = text(
+    "DELETE FROM legal_document_pages WHERE document_id = :document_id AND page_number IN :page_numbers"
+).bindparams(bindparam("page_numbers", expanding=True))
+DELETE_CHUNKS = text(
+    "DELETE FROM legal_document_chunks WHERE legal_document_id = :document_id AND page_number IN :page_numbers"
+).bindparams(bindparam("page_numbers", expanding=True))
+INSERT_PAGE = text("""
+    INSERT INTO legal_document_pages (document_id, page_number, content, content_hash, full_text_search)
+    VALUES (:document_id, :page_number, :content, :content_hash, to_tsvector(CAST(:lang AS regconfig), :content))
+""")
+INSERT_CHUNK = text("""
+    INSERT INTO legal_document_chunks (legal_document_id, page_number, chunk_index, content, embedding)
+    VALUES (:document_id, :page_number, :chunk_index, :content, CAST(:embedding AS vector))
+""")
+
+
+@dataclass
+class Chunk:
+    page_number: int
+    chunk_index: int
+    content: str
+
+
+@dataclass
+class IngestionResult:
+    document_id: UUID
+    pages: int
+    chunks: int
+    pages_changed: int
+
+
+def to_vector_literal(embedding) -> str:
+    # asyncpg has no list -> vector codec, pass pgvector's text form instead
+    return "[" + ",".join(str(v) for v in embedding) + "]"
+
+
+class IngestionService:
+    """
+    Indexes a parsed document for retrieval: pages get a tsvector for sparse search, and
+    overlapping chunks of each page get a bge-m3 embedding for dense search.
+
+    Re-indexing is incremental: each page stores a hash of its text (and of the chunking
+    and embedding setup), and only pages whose hash changed are re-embedded and rewritten.
+    Embeddings are requested in batches (a few in flight at once) and all rows are written
+    with executemany in a single transaction.
+    """
+
+    def __init__(self, db: Postgres, chunk_tokens: int, overlap_tokens: int, embed_batch_size: int, embed_concurrency: int):
+        self.db = db
+        self.chunk_tokens = max(1, chunk_tokens)
+        self.overlap_tokens = max(0, overlap_tokens)
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.embed_concurrency = max(1, embed_concurrency)
+
+    def chunk_pages(self, pages: Dict[int, str]) -> List[Chunk]:
+        return [
+            Chunk(page_number, chunk_index, content)
+            for page_number, page in pages.items()
+            for chunk_index, content in enumerate(chunk_page(page, self.chunk_tokens, self.overlap_tokens))
+        ]
+
+    def page_hash(self, content: str) -> str:
+        # Changing the model or chunking must re-embed unchanged text as well
+        setup = f"{EMBEDDING_MODEL}\0{self.chunk_tokens}\0{self.overlap_tokens}\0{settings.SPARSE_TS_CONFIG}"
+        return hashlib.sha256(f"{setup}\0{content}".encode("utf-8")).hexdigest()
+
+    async def embed_chunks(self, chunks: List[Chunk]) -> List[List[float]]:
+        semaphore = asyncio.Semaphore(self.embed_concurrency)
+
+        async def embed_batch(batch: List[Chunk]):
+            async with semaphore:
+                response = await embedder.get_client().embed(model=EMBEDDING_MODEL, input=[c.content for c in batch])
+                return response.embeddings
+
+        batches = [chunks[i:i + self.embed_batch_size] for i in range(0, len(chunks), self.embed_batch_size)]
+        results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+        return [embedding for batch in results for embedding in batch]
+
+    async def ingest(self, session: AsyncSession, document_id: UUID, title: str, pages: Union[List[str], str]) -> IngestionResult:
+        if isinstance(pages, str):
+            pages = [pages]
+
+        conn = await session.connection()
+        stored = dict((await conn.execute(SELECT_PAGE_HASHES, {"document_id": document_id})).all())
+        hashes = {page_number: self.page_hash(content) for page_number, content in enumerate(pages, start=1)}
+        changed = {page_number: pages[page_number - 1] for page_number, page_hash in hashes.items() if stored.get(page_number) != page_hash}
+        removed = [page_number for page_number in stored if page_number > len(pages)]
+        INGEST_PAGES_UNCHANGED.inc(len(pages) - len(changed))
+
+        chunks = self.chunk_pages(changed)
+        started = time.perf_counter()
+        embeddings = await self.embed_chunks(chunks)
+        INGEST_STAGE_SECONDS.labels("embed").observe(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await self.write(session, document_id, title, changed, hashes, removed, list(zip(chunks, embeddings)))
+        INGEST_STAGE_SECONDS.labels("write").observe(time.perf_counter() - started)
+
+        INGEST_PAGES.inc(len(changed))
+        INGEST_CHUNKS.inc(len(chunks))
+        return IngestionResult(document_id=document_id, pages=len(pages), chunks=len(chunks), pages_changed=len(changed))
+
+    async def write(
+        self,
+        session: AsyncSession,
+        document_id: UUID,
+        title: str,
+        changed: Dict[int, str],
+        hashes: Dict[int, str],
+        removed: List[int],
+        chunks: List[Tuple[Chunk, list]],
+    ):
+        """Rewrites only the changed pages; their old chunks and those of removed pages go in one bulk delete."""
+        conn = await session.connection()
+        await conn.execute(UPSERT_DOCUMENT, {"id": document_id, "title": title})
+        stale = sorted(set(changed) | set(removed))
+        if stale:
+            await conn.execute(DELETE_CHUNKS, {"document_id": document_id, "page_numbers": stale})
+            await conn.execute(DELETE_PAGES, {"document_id": document_id, "page_numbers": stale})
+        if changed:
+            await conn.execute(INSERT_PAGE, [
+                {
+                    "document_id": document_id,
+                    "page_number": page_number,
+                    "content": content,
+                    "content_hash": hashes[page_number],
+                    "lang": settings.SPARSE_TS_CONFIG,
+                }
+                for page_number, content in changed.items()
+            ])
+        if chunks:
+            await conn.execute(INSERT_CHUNK, [
+                {
+                    "document_id": document_id,
+                    "page_number": chunk.page_number,
+                    "chunk_index": chunk.chunk_index,
+                    "content": chunk.content,
+                    "embedding": to_vector_literal(embedding),
+                }
+                for chunk, embedding in chunks
+            ])
+        if stale:
+            await bump_generation(session)
+        await session.commit()
+
+    async def run(self, file_type: str, file_path: str, document_id: UUID, title: str) -> IngestionResult:
+        """Job entry point: parses the upload and indexes it. The worker pool removes the upload and records the outcome."""
+        started = time.perf_counter()
+        pages = await parser_pool.extract_text(file_type, file_path, bounded=False)  # Queued job, wait for a slot
+        INGEST_STAGE_SECONDS.labels("parse").observe(time.perf_counter() - started)
+
+        async for session in self.db.get_async_session():
+            result = await self.ingest(session, document_id, title, pages)
+        logger.info(
+            "Indexed document %s: %d/%d pages changed, %d chunks embedded",
+            document_id, result.pages_changed, result.pages, result.chunks,
+        )
+        return result
+
+
+ingestion_service = IngestionService(
+    db=get_database(settings.DB_URL),
+    chunk_tokens=settings.INGEST_CHUNK_TOKENS,
+    overlap_tokens=settings.INGEST_CHUNK_OVERLAP_TOKENS,
+    embed_batch_size=settings.INGEST_EMBED_BATCH_SIZE,
+    embed_concurrency=settings.INGEST_EMBED_CONCURRENCY,
+)
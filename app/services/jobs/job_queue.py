@@ -0,0 +1,479 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set
+from uuid import UUID, uuid4
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import delete, update
+from sqlmodel import select
+
+from app.commons.db.postgres import Postgres
+from app.model.analysis_job import AnalysisJob
+
+logger = logging.getLogger(__name__)
+
+JOBS_FINISHED = Counter("background_jobs_finished", "Background jobs that finished", ["status"])
+JOB_WAIT_SECONDS = Histogram("background_job_wait_seconds", "Time a background job waited in the queue before a worker claimed it")
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+FINISH_ATTEMPTS = 3
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class JobQueue(ABC):
+    """
+    Storage for background jobs of one `kind`. Workers claim queued jobs one at a time and
+    hold a lease on them, extended by heartbeats; jobs whose lease expires are requeued by
+    `recover`. Queues of different kinds share the table but never see each other's jobs.
+    """
+
+    def __init__(self, lease_seconds: float, max_attempts: int, kind: str = "analysis"):
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max(1, max_attempts)
+        self.kind = kind
+
+    @abstractmethod
+    async def enqueue(self, job: AnalysisJob) -> AnalysisJob:
+        pass
+
+    @abstractmethod
+    async def claim(self, owner: str) -> Optional[AnalysisJob]:
+        """Leases the oldest queued job to `owner` and returns it, or None when the queue is empty."""
+
+    @abstractmethod
+    async def heartbeat(self, owner: str, job_ids: Iterable[UUID]):
+        """Extends the leases `owner` still holds on `job_ids`."""
+
+    @abstractmethod
+    async def finish(self, job_id: UUID, owner: str, result: Optional[dict] = None, error: Optional[str] = None) -> bool:
+        """Records the outcome; False when `owner` no longer holds the lease."""
+
+    @abstractmethod
+    async def get(self, job_id: UUID) -> Optional[AnalysisJob]:
+        pass
+
+    @abstractmethod
+    async def recover(self):
+        """Requeues running jobs whose lease expired, failing those out of attempts."""
+
+    @abstractmethod
+    async def unreaped(self, limit: int) -> List[AnalysisJob]:
+        """Finished jobs whose upload has not been removed yet."""
+
+    @abstractmethod
+    async def mark_reaped(self, job_ids: Iterable[UUID]):
+        pass
+
+    @abstractmethod
+    async def purge(self, finished_before: datetime) -> int:
+        """Deletes finished jobs (upload already removed) last updated before `finished_before`."""
+
+    def _abandoned_error(self) -> str:
+        return f"❌ Pemrosesan dihentikan setelah {self.max_attempts} percobaan."
+
+
+class InMemoryJobQueue(JobQueue):
+    """Per-process queue, jobs are lost on restart. Meant for development and tests."""
+
+    def __init__(self, lease_seconds: float = 60, max_attempts: int = 3, kind: str = "analysis"):
+        super().__init__(lease_seconds, max_attempts, kind)
+        self._jobs: Dict[UUID, AnalysisJob] = {}
+        self._queued: Deque[UUID] = deque()
+
+    async def enqueue(self, job: AnalysisJob) -> AnalysisJob:
+        job.kind = self.kind
+        job.created_at = job.updated_at = _utcnow()
+        self._jobs[job.id] = job
+        self._queued.append(job.id)
+        return job
+
+    async def claim(self, owner: str) -> Optional[AnalysisJob]:
+        if not self._queued:
+            return None
+        job = self._jobs[self._queued.popleft()]
+        job.status, job.owner, job.attempts = "running", owner, job.attempts + 1
+        job.updated_at = _utcnow()
+        job.lease_expires_at = job.updated_at + self.lease
+        return job
+
+    async def heartbeat(self, owner: str, job_ids: Iterable[UUID]):
+        for job_id in job_ids:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status == "running" and job.owner == owner:
+                job.lease_expires_at = _utcnow() + self.lease
+
+    async def finish(self, job_id: UUID, owner: str, result: Optional[dict] = None, error: Optional[str] = None) -> bool:
+        job = self._jobs[job_id]
+        if job.status != "running" or job.owner != owner:
+            return False
+        job.status = "failed" if error is not None else "succeeded"
+        job.result = json.dumps(result) if result is not None else None
+        job.error = error
+        job.owner = job.lease_expires_at = None
+        job.updated_at = _utcnow()
+        return True
+
+    async def get(self, job_id: UUID) -> Optional[AnalysisJob]:
+        return self._jobs.get(job_id)
+
+    async def recover(self):
+        now = _utcnow()
+        for job in self._jobs.values():
+            if job.status != "running" or job.lease_expires_at >= now:
+                continue
+            job.owner = job.lease_expires_at = None
+            job.updated_at = now
+            if job.attempts >= self.max_attempts:
+                job.status, job.error = "failed", self._abandoned_error()
+            else:
+                job.status = "queued"
+                self._queued.append(job.id)
+
+    async def unreaped(self, limit: int) -> List[AnalysisJob]:
+        finished = [job for job in self._jobs.values() if job.status in TERMINAL_STATUSES and job.file_path]
+        return finished[:limit]
+
+    async def mark_reaped(self, job_ids: Iterable[UUID]):
+        for job_id in job_ids:
+            self._jobs[job_id].file_path = None
+
+    async def purge(self, finished_before: datetime) -> int:
+        expired = [
+            job.id for job in self._jobs.values()
+            if job.status in TERMINAL_STATUSES and not job.file_path and job.updated_at < finished_before
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        return len(expired)
+
+
+class DatabaseJobQueue(JobQueue):
+    """
+    Persists jobs in the `analysis_jobs` table of the application database, so queued work
+    survives restarts and is shared by every uvicorn worker.
+
+    A claim is a conditional UPDATE (status still 'queued'), so concurrent workers never run
+    the same job; on Postgres the candidate row is also locked with SKIP LOCKED. Heartbeats
+    and outcomes only apply while the caller still owns the job, so a worker whose lease
+    expired cannot overwrite the run that took over.
+    """
+
+    def __init__(self, db: Postgres, lease_seconds: float, max_attempts: int, kind: str = "analysis"):
+        super().__init__(lease_seconds, max_attempts, kind)
+        self.db = db
+
+    @asynccontextmanager
+    async def _session(self):
+        sessions = self.db.get_async_session()
+        try:
+            yield await sessions.__anext__()  # Builtin anext() needs Python 3.10, the image runs 3.9
+        finally:
+            await sessions.aclose()
+
+    async def enqueue(self, job: AnalysisJob) -> AnalysisJob:
+        job.kind = self.kind
+        job.created_at = job.updated_at = _utcnow()
+        async with self._session() as session:
+            session.add(job)
+            await session.commit()
+        return job
+
+    async def claim(self, owner: str) -> Optional[AnalysisJob]:
+        while True:
+            async with self._session() as session:
+                candidate = (await session.exec(
+                    select(AnalysisJob.id)
+                    .where(AnalysisJob.kind == self.kind, AnalysisJob.status == "queued")
+                    .order_by(AnalysisJob.created_at)
+                    .limit(1)
+                    .with_for_update(skip_locked=True)
+                )).first()
+                if candidate is None:
+                    await session.commit()
+                    return None
+                now = _utcnow()
+                claimed = await session.exec(
+                    update(AnalysisJob)
+                    .where(AnalysisJob.id == candidate, AnalysisJob.status == "queued")
+                    .values(
+                        status="running",
+                        owner=owner,
+                        lease_expires_at=now + self.lease,
+                        attempts=AnalysisJob.attempts + 1,
+                        updated_at=now,
+                    )
+                )
+                await session.commit()
+                if claimed.rowcount == 1:
+                    return await session.get(AnalysisJob, candidate)
+            # Another worker won the race for this job, try the next one
+
+    async def heartbeat(self, owner: str, job_ids: Iterable[UUID]):
+        job_ids = list(job_ids)
+        if not job_ids:
+            return
+        async with self._session() as session:
+            await session.exec(
+                update(AnalysisJob)
+                .where(AnalysisJob.id.in_(job_ids), AnalysisJob.owner == owner, AnalysisJob.status == "running")
+                .values(lease_expires_at=_utcnow() + self.lease)
+            )
+            await session.commit()
+
+    async def finish(self, job_id: UUID, owner: str, result: Optional[dict] = None, error: Optional[str] = None) -> bool:
+        async with self._session() as session:
+            finished = await session.exec(
+                update(AnalysisJob)
+                .where(AnalysisJob.id == job_id, AnalysisJob.owner == owner, AnalysisJob.status == "running")
+                .values(
+                    status="failed" if error is not None else "succeeded",
+                    result=json.dumps(result) if result is not None else None,
+                    error=error,
+                    owner=None,
+                    lease_expires_at=None,
+                    updated_at=_utcnow(),
+                )
+            )
+            await session.commit()
+            return finished.rowcount == 1
+
+    async def get(self, job_id: UUID) -> Optional[AnalysisJob]:
+        async with self._session() as session:
+            job = await session.get(AnalysisJob, job_id)
+            return job if job is not None and job.kind == self.kind else None
+
+    async def recover(self):
+        now = _utcnow()
+        expired = (AnalysisJob.kind == self.kind, AnalysisJob.status == "running", AnalysisJob.lease_expires_at < now)
+        async with self._session() as session:
+            abandoned = await session.exec(
+                update(AnalysisJob)
+                .where(*expired, AnalysisJob.attempts >= self.max_attempts)
+                .values(status="failed", error=self._abandoned_error(), owner=None, lease_expires_at=None, updated_at=now)
+            )
+            requeued = await session.exec(
+                update(AnalysisJob)
+                .where(*expired)
+                .values(status="queued", owner=None, lease_expires_at=None, updated_at=now)
+            )
+            await session.commit()
+            if requeued.rowcount:
+                logger.warning("Requeued %d %s jobs whose lease expired", requeued.rowcount, self.kind)
+            if abandoned.rowcount:
+                logger.error("Failed %d %s jobs after %d attempts", abandoned.rowcount, self.kind, self.max_attempts)
+
+    async def unreaped(self, limit: int) -> List[AnalysisJob]:
+        async with self._session() as session:
+            return list((await session.exec(
+                select(AnalysisJob)
+                .where(
+                    AnalysisJob.kind == self.kind,
+                    AnalysisJob.status.in_(TERMINAL_STATUSES),
+                    AnalysisJob.file_path.is_not(None),
+                )
+                .limit(limit)
+            )).all())
+
+    async def mark_reaped(self, job_ids: Iterable[UUID]):
+        job_ids = list(job_ids)
+        if not job_ids:
+            return
+        async with self._session() as session:
+            await session.exec(update(AnalysisJob).where(AnalysisJob.id.in_(job_ids)).values(file_path=None))
+            await session.commit()
+
+    async def purge(self, finished_before: datetime) -> int:
+        async with self._session() as session:
+            purged = await session.exec(
+                delete(AnalysisJob).where(
+                    AnalysisJob.kind == self.kind,
+                    AnalysisJob.status.in_(TERMINAL_STATUSES),
+                    AnalysisJob.file_path.is_(None),
+                    AnalysisJob.updated_at < finished_before,
+                )
+            )
+            await session.commit()
+            return purged.rowcount
+
+
+class JobWorkerPool:
+    """
+    Runs `handler` for queued jobs on `workers` asyncio tasks inside this process.
+
+    Workers wake up immediately for jobs enqueued here (see `notify`) and poll every
+    `poll_interval` seconds for jobs enqueued by other processes or recovered after a crash.
+    Every `heartbeat_interval` the pool extends the leases of the jobs it is running,
+    requeues jobs whose owner stopped heartbeating and removes uploads of finished jobs;
+    finished jobs older than `retention_seconds` (when set) are deleted with their results.
+
+    A job's upload is only removed once its outcome is recorded, so a job recovered after
+    a crash still finds its file.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handler: Callable[[AnalysisJob], Awaitable[dict]],
+        workers: int,
+        poll_interval: float,
+        heartbeat_interval: float,
+        retention_seconds: Optional[float] = None,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.retention = timedelta(seconds=retention_seconds) if retention_seconds is not None else None
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self._running: Set[UUID] = set()
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def start(self):
+        if self._tasks:
+            return
+        try:
+            await self.queue.recover()
+            await self.reap()
+            await self.purge()
+        except Exception as e:
+            # Retried by the heartbeat, don't block startup on it
+            logger.error("Background job recovery failed: %s", e)
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._maintain()))
+        logger.info("Background job workers started, workers=%d owner=%s", self.workers, self.owner)
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _work(self):
+        while True:
+            try:
+                job = await self.queue.claim(self.owner)
+            except Exception as e:
+                logger.error("Failed to claim a background job: %s", e)
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            try:
+                await self.run(job)
+            except Exception:
+                # Never let one job take the worker down with it
+                logger.exception("Background job worker failed while running job %s", job.id)
+
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.queue.heartbeat(self.owner, set(self._running))
+                await self.queue.recover()
+                await self.reap()
+                await self.purge()
+            except Exception as e:
+                logger.error("Background job heartbeat failed: %s", e)
+
+    async def run(self, job: AnalysisJob):
+        created_at = job.created_at if job.created_at.tzinfo else job.created_at.replace(tzinfo=timezone.utc)
+        JOB_WAIT_SECONDS.observe((_utcnow() - created_at).total_seconds())
+        self._running.add(job.id)
+        try:
+            try:
+                result = await self.handler(job)
+            except Exception as e:
+                logger.exception("Background job %s failed", job.id)
+                JOBS_FINISHED.labels("failed").inc()
+                await self._finish(job, error=getattr(e, "detail", None) or str(e))
+                return
+            JOBS_FINISHED.labels("succeeded").inc()
+            await self._finish(job, result=result)
+        finally:
+            self._running.discard(job.id)
+
+    async def reap(self, limit: int = 100):
+        """Removes uploads of finished jobs, including ones failed by `recover` or left behind by a crash."""
+        jobs = await self.queue.unreaped(limit)
+        for job in jobs:
+            try:
+                if os.path.exists(job.file_path):
+                    os.remove(job.file_path)
+            except OSError as e:
+                logger.warning("Failed to remove upload %s of job %s: %s", job.file_path, job.id, e)
+        await self.queue.mark_reaped(job.id for job in jobs)
+
+    async def purge(self):
+        """Deletes finished jobs past the retention period, so the table does not grow forever."""
+        if self.retention is None:
+            return
+        purged = await self.queue.purge(_utcnow() - self.retention)
+        if purged:
+            logger.info("Deleted %d finished %s jobs past retention", purged, self.queue.kind)
+
+    async def _finish(self, job: AnalysisJob, result: Optional[dict] = None, error: Optional[str] = None) -> bool:
+        """Records the outcome, retrying transient storage errors before giving up."""
+        for attempt in range(1, FINISH_ATTEMPTS + 1):
+            try:
+                if await self.queue.finish(job.id, self.owner, result=result, error=error):
+                    await self._remove_upload(job)
+                    return True
+                logger.warning("Lost the lease on job %s, another worker took it over", job.id)
+                return False
+            except Exception as e:
+                logger.warning("Recording the outcome of job %s failed (attempt %d/%d): %s", job.id, attempt, FINISH_ATTEMPTS, e)
+                if attempt < FINISH_ATTEMPTS:
+                    await asyncio.sleep(self.poll_interval * attempt)
+        logger.error("Gave up recording the outcome of job %s, it is requeued once its lease expires", job.id)
+        return False
+
+    async def _remove_upload(self, job: AnalysisJob):
+        if not job.file_path:
+            return
+        try:
+            if os.path.exists(job.file_path):
+                os.remove(job.file_path)
+            await self.queue.mark_reaped([job.id])
+        except Exception as e:
+            # The periodic reap retries
+            logger.warning("Failed to remove upload of job %s: %s", job.id, e)
+
+
+def job_status(job: AnalysisJob) -> dict:
+    """Response body for job status endpoints: the result or the error once the job has finished."""
+    body = {"job_id": str(job.id), "status": job.status}
+    if job.result is not None:
+        body["result"] = json.loads(job.result)
+    if job.error is not None:
+        body["error"] = job.error
+    return body
+
+
+def create_job_queue(backend: str, db: Postgres, lease_seconds: float, max_attempts: int, kind: str = "analysis") -> JobQueue:
+    if backend == "database":
+        return DatabaseJobQueue(db, lease_seconds, max_attempts, kind)
+    if backend == "memory":
+        return InMemoryJobQueue(lease_seconds, max_attempts, kind)
+    raise ValueError(f"Invalid job queue backend: {backend}, must be one of ['database', 'memory']")
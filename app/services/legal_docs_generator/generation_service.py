@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import os
+import time
+from typing import AsyncIterator, Callable, Dict, Optional
+
+import httpx
+import ollama
+from google import genai
+from google.genai import types
+from prometheus_client import Histogram
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from request to the first streamed token of a generated document",
+    ["backend"],
+)
+
+GEMINI_MODEL = "gemini-2.0-flash-lite"
+OLLAMA_MODEL = "deepseek-r1:8b"
+
+# Appended in-band when generation fails mid-document, the 200 status is already sent by then
+STREAM_INTERRUPTED_MARKER = "\n\n[ERROR] ❌ Pembuatan dokumen terhenti, dokumen tidak lengkap. Silakan coba lagi."
+
+
+async def prefetch_first_token(tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Awaits the first token before the response starts, so a generation failing up front
+    raises here (and can become a 5xx) instead of turning into an empty 200.
+    """
+    try:
+        first = await tokens.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def chained():
+        if first is not None:
+            yield first
+        async for token in tokens:
+            yield token
+
+    return chained()
+
+
+class LegalDocumentGenerationService:
+    """
+    Generates documents in-process so every router makes exactly one upstream LLM call.
+    Rate limiting stays with the routers.
+
+    The Gemini and Ollama clients are created once (in the app lifespan) and reused,
+    so their pooled keep-alive connections survive between requests. Each model has
+    its own semaphore, bounding concurrent generations to what its quota allows.
+    """
+
+    def __init__(self, backends: Optional[Dict[str, Callable[[str, str], AsyncIterator[str]]]] = None):
+        self.backends = backends or {
+            "gemini": self.gemini_stream,
+            "ollama": self.ollama_stream,
+        }
+        self._gemini: Optional[genai.Client] = None
+        self._ollama: Optional[ollama.AsyncClient] = None
+        self._model_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def start(self):
+        if os.environ.get("GEMINI_API_KEY"):
+            self.get_gemini_client()
+        else:
+            logger.warning("GEMINI_API_KEY is not set, Gemini generation will fail over to Ollama if configured")
+        self.get_ollama_client()
+
+    async def close(self):
+        gemini, self._gemini = self._gemini, None
+        ollama_client, self._ollama = self._ollama, None
+        if gemini is not None:
+            await gemini.aio.aclose()
+        if ollama_client is not None:
+            await ollama_client.close()
+        self._model_semaphores = {}
+
+    def get_gemini_client(self) -> genai.Client:
+        if self._gemini is None:
+            self._gemini = genai.Client(
+                api_key=os.environ.get("GEMINI_API_KEY"),
+                http_options=types.HttpOptions(
+                    timeout=int(settings.LLM_TIMEOUT_SECONDS * 1000),  # milliseconds
+                    async_client_args={
+                        "limits": httpx.Limits(
+                            max_connections=settings.LLM_MAX_CONNECTIONS,
+                            max_keepalive_connections=settings.LLM_MAX_CONNECTIONS,
+                        ),
+                    },
+                ),
+            )
+        return self._gemini
+
+    def get_ollama_client(self) -> ollama.AsyncClient:
+        if self._ollama is None:
+            self._ollama = ollama.AsyncClient(host=settings.OLLAMA_URL, timeout=settings.LLM_TIMEOUT_SECONDS)
+        return self._ollama
+
+    def model_semaphore(self, model: str) -> asyncio.Semaphore:
+        if model not in self._model_semaphores:
+            self._model_semaphores[model] = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY_PER_MODEL)
+        return self._model_semaphores[model]
+
+    async def gemini_stream(self, system_prompt: str, query: str) -> AsyncIterator[str]:
+        """Streams tokens from the Gemini API."""
+        async with self.model_semaphore(GEMINI_MODEL):
+            stream = await self.get_gemini_client().aio.models.generate_content_stream(
+                model=GEMINI_MODEL,
+                config=types.GenerateContentConfig(
+                    system_instruction=system_prompt
+                ),
+                contents=[query]
+            )
+            async for chunk in stream:
+                if chunk.text:
+                    yield chunk.text
+
+    async def ollama_stream(self, system_prompt: str, query: str) -> AsyncIterator[str]:
+        """Streams tokens from a locally deployed DeepSeek model through ollama."""
+        async with self.model_semaphore(OLLAMA_MODEL):
+            stream = await self.get_ollama_client().chat(
+                model=OLLAMA_MODEL,
+                messages=[
+                    {'role': 'system', 'content': system_prompt},
+                    {'role': 'user', 'content': query}
+                ],
+                stream=True
+            )
+            async for chunk in stream:
+                yield chunk['message']['content']
+
+    async def stream(self, system_prompt: str, query: str) -> AsyncIterator[str]:
+        """
+        Streams the generated document token by token from the configured backend.
+        If the primary backend fails before sending anything, retries on the Ollama fallback.
+        A failure after the first token ends the stream with `STREAM_INTERRUPTED_MARKER`.
+        """
+        backends = [settings.LLM_BACKEND]
+        if settings.LLM_BACKEND != "ollama" and settings.OLLAMA_URL:
+            backends.append("ollama")
+
+        for attempt, backend in enumerate(backends, start=1):
+            started = time.perf_counter()
+            sent_first_token = False
+            try:
+                async for token in self.backends[backend](system_prompt, query):
+                    if not sent_first_token:
+                        LLM_TIME_TO_FIRST_TOKEN.labels(backend=backend).observe(time.perf_counter() - started)
+                        sent_first_token = True
+                    yield token
+                return
+            except Exception as e:
+                if sent_first_token:
+                    # Tokens already reached the client: no model switch mid-document, flag the truncation
+                    logger.exception("Generation backend %s failed mid-document", backend)
+                    yield STREAM_INTERRUPTED_MARKER
+                    return
+                if attempt == len(backends):
+                    raise
+                logger.warning("Generation backend %s failed before streaming, falling back: %s", backend, e)
+
+
+generation_service = LegalDocumentGenerationService()
@@ -1,34 +1,79 @@
 from app.services.retrieval.retrieval_strategy import RetrievalStrategy
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.config.settings import settings
 from sqlmodel import text
-from ollama import Client
+from app.services.retrieval.embedder import EMBEDDING_MODEL, embedder
+from app.services.retrieval.embedding_cache import embedding_cache
+
+# Exact scan: every chunk is scored, then thresholded and grouped by page
+EXACT_SEARCH = text("""
+    SELECT chunk.page_number, chunk.legal_document_id, 1 - MIN(chunk.distance) AS similarity
+    FROM (
+        SELECT page_number, legal_document_id, embedding <=> CAST(:query_embedding AS vector) AS distance
+        FROM legal_document_chunks
+        WHERE embedding IS NOT NULL
+    ) AS chunk
+    JOIN legal_documents AS doc ON doc.id = chunk.legal_document_id
+    WHERE chunk.distance < 1 - :threshold
+    GROUP BY chunk.page_number, chunk.legal_document_id
+    ORDER BY similarity DESC
+    LIMIT :top_k;
+""")
+
+# ANN scan: a bare ORDER BY distance LIMIT lets Postgres walk the HNSW index; the
+# threshold and page de-duplication then run on the small candidate set only
+ANN_SEARCH = text("""
+    WITH candidates AS (
+        SELECT page_number, legal_document_id, embedding <=> CAST(:query_embedding AS vector) AS distance
+        FROM legal_document_chunks
+        WHERE embedding IS NOT NULL
+        ORDER BY distance
+        LIMIT :candidates
+    )
+    SELECT chunk.page_number, chunk.legal_document_id, 1 - MIN(chunk.distance) AS similarity
+    FROM candidates AS chunk
+    JOIN legal_documents AS doc ON doc.id = chunk.legal_document_id
+    WHERE chunk.distance < 1 - :threshold
+    GROUP BY chunk.page_number, chunk.legal_document_id
+    ORDER BY similarity DESC
+    LIMIT :top_k;
+""")
+
+# Transaction-scoped, so pooled connections don't keep another request's setting
+SET_EF_SEARCH = text("SELECT set_config('hnsw.ef_search', :ef_search, true)")
 
 class DenseRetrieval(RetrievalStrategy):
-    def __init__(self, db_session: Session):
-        self.ollama_client = Client(host=settings.OLLAMA_URL)
+    @property
+    def top_k(self):
+        return settings.DENSE_TOP_K
+
+    def __init__(self, db_session: AsyncSession):
+        # Strategies are built per request, the Ollama client lives with the shared embedder
+        self.embedder = embedder
         super().__init__(db_session)
 
-    def __embed_query(self, query: str) -> list[int]:
-        return self.ollama_client.embed(model='bge-m3', input=query).embeddings[0]
-
-    def retrieve(self, query: str):
-        doc_embedding = self.__embed_query(query)
-        statement = (
-            text("""
-            SELECT chunk.page_number, chunk.legal_document_id,
-            MAX((1 - (chunk.embedding <=> CAST(:query_embedding AS vector)))) AS similarity
-            FROM legal_document_chunks AS chunk
-            JOIN legal_documents AS doc ON doc.id = chunk.legal_document_id
-            WHERE chunk.embedding IS NOT NULL AND (1 - (chunk.embedding <=> CAST(:query_embedding AS vector))) > 0.5
-            GROUP BY chunk.page_number, chunk.legal_document_id
-            ORDER BY similarity DESC
-            LIMIT 20;
-            """)
-        )
-        res = self.db_session.exec(statement, params={
-            "query_embedding": doc_embedding,
-        }).all()
+    async def __embed_query(self, query: str) -> list[float]:
+        return await self.embedder.embed(query)
+
+    async def retrieve(self, query: str):
+        cache_key = embedding_cache.make_key(EMBEDDING_MODEL, query)
+        doc_embedding = embedding_cache.get(cache_key)
+        if doc_embedding is None:
+            embedding = await self.__embed_query(embedding_cache.normalize_query(query))
+            doc_embedding = embedding_cache.set(cache_key, embedding)
+
+        params = {
+            # asyncpg has no list -> vector codec, pass pgvector's text form instead
+            "query_embedding": "[" + ",".join(str(v) for v in doc_embedding) + "]",
+            "threshold": settings.DENSE_SIMILARITY_THRESHOLD,
+            "top_k": settings.DENSE_TOP_K,
+        }
+        if settings.DENSE_SEARCH_MODE == "ann":
+            await self.db_session.exec(SET_EF_SEARCH, params={"ef_search": str(settings.DENSE_ANN_EF_SEARCH)})
+            statement = ANN_SEARCH
+            params["candidates"] = settings.DENSE_ANN_CANDIDATES
+        else:
+            statement = EXACT_SEARCH
+        res = (await self.db_session.exec(statement, params=params)).all()
 
         return [{"document_id": r[1], "page_number": r[0]} for r in res]
-        
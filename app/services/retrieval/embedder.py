@@ -0,0 +1,104 @@
+import asyncio
+import logging
+from typing import List, Optional, Set, Tuple
+
+import ollama
+from prometheus_client import Histogram
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BATCH_SIZE = Histogram(
+    "embedding_batch_size",
+    "Queries coalesced into one embedding model call",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+
+EMBEDDING_MODEL = "bge-m3"
+
+
+class BatchingEmbedder:
+    """
+    Embeds queries with one app-lifetime Ollama client, coalescing concurrent requests.
+
+    The first query waits up to `max_wait_ms` for others to arrive; the batch is then
+    sent as a single `embed(input=[...])` call, or sooner once `max_batch_size` is reached.
+    """
+
+    def __init__(self, model: str, max_batch_size: int, max_wait_ms: float):
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._client: Optional[ollama.AsyncClient] = None
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # The loop only keeps weak references to tasks, hold on to in-flight batches
+        self._batches: Set[asyncio.Task] = set()
+
+    def start(self):
+        self.get_client()
+
+    async def close(self):
+        """Fails queries still waiting for a batch, lets in-flight batches finish, then closes the client."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Embedder is shutting down"))
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+        client, self._client = self._client, None
+        if client is not None:
+            await client.close()
+
+    def get_client(self) -> ollama.AsyncClient:
+        if self._client is None:
+            self._client = ollama.AsyncClient(host=settings.OLLAMA_URL, timeout=settings.LLM_TIMEOUT_SECONDS)
+        return self._client
+
+    async def embed(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._embed_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _embed_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        # Identical queries in one window are embedded once
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        EMBEDDING_BATCH_SIZE.observe(len(texts))
+        try:
+            response = await self.get_client().embed(model=self.model, input=texts)
+            embeddings = dict(zip(texts, response.embeddings))
+        except Exception as e:
+            logger.error("Embedding batch of %d queries failed: %s", len(texts), e)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for text, future in batch:
+            if not future.done():
+                future.set_result(embeddings[text])
+
+
+embedder = BatchingEmbedder(
+    model=EMBEDDING_MODEL,
+    max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+    max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+)
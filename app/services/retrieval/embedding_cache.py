@@ -0,0 +1,66 @@
+import hashlib
+import re
+from array import array
+from typing import Optional, Sequence
+
+from prometheus_client import Counter
+
+from app.config.settings import settings
+from app.utils.lru_cache import LRUCache
+
+EMBEDDING_CACHE_HITS = Counter("embedding_cache_hits", "Query embeddings served from the cache", ["tier"])
+EMBEDDING_CACHE_MISSES = Counter("embedding_cache_misses", "Query embeddings that required the embedding model")
+EMBEDDING_CACHE_EVICTIONS = Counter("embedding_cache_evictions", "Entries evicted from the in-memory embedding cache")
+
+
+class EmbeddingCache(LRUCache[array]):
+    """
+    Caches query embeddings by model and normalized query text.
+
+    Vectors are kept as float32 `array`s (4 bytes per dimension instead of a list of
+    boxed floats) and, when `disk_dir` is set, written there as raw float32 files.
+    """
+
+    name = "embedding"
+    disk_suffix = ".f32"
+
+    def __init__(self, max_entries: int, ttl_seconds: float, disk_dir: Optional[str] = None):
+        super().__init__(max_entries, ttl_seconds, disk_dir)
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        return re.sub(r"\s+", " ", query).strip().lower()
+
+    @staticmethod
+    def make_key(model: str, query: str) -> str:
+        normalized = EmbeddingCache.normalize_query(query)
+        return hashlib.sha256(f"{model}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def set(self, key: str, embedding: Sequence[float]) -> array:
+        vector = embedding if isinstance(embedding, array) else array("f", embedding)
+        super().set(key, vector)
+        return vector
+
+    def _encode(self, vector: array) -> bytes:
+        return vector.tobytes()
+
+    def _decode(self, data: bytes) -> array:
+        vector = array("f")
+        vector.frombytes(data)
+        return vector
+
+    def _on_hit(self, tier: str):
+        EMBEDDING_CACHE_HITS.labels(tier=tier).inc()
+
+    def _on_miss(self):
+        EMBEDDING_CACHE_MISSES.inc()
+
+    def _on_evict(self):
+        EMBEDDING_CACHE_EVICTIONS.inc()
+
+
+embedding_cache = EmbeddingCache(
+    max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+    disk_dir=settings.EMBEDDING_CACHE_DIR,
+)
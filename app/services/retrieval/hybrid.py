@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Dict, List, Tuple
+
+from prometheus_client import Histogram
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config.settings import settings
+from app.services.retrieval.dense import DenseRetrieval
+from app.services.retrieval.retrieval_strategy import RetrievalStrategy
+from app.services.retrieval.sparse import SparseRetrieval
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_LEG_SECONDS = Histogram(
+    "retrieval_leg_seconds",
+    "Latency of each leg of a hybrid retrieval",
+    ["leg"],
+)
+
+
+def reciprocal_rank_fusion(rankings: List[List[dict]], k: int) -> List[dict]:
+    """Merges ranked `{document_id, page_number}` lists, scoring each page by sum(1 / (k + rank))."""
+    scores: Dict[Tuple, float] = {}
+    for ranking in rankings:
+        for rank, ref in enumerate(ranking, start=1):
+            key = (ref["document_id"], ref["page_number"])
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [{"document_id": document_id, "page_number": page_number} for (document_id, page_number), _ in fused]
+
+
+class HybridRetrieval(RetrievalStrategy):
+    """
+    Runs dense and sparse retrieval concurrently and fuses their rankings with RRF.
+
+    An AsyncSession cannot run two statements at once, so the sparse leg gets its own
+    session on the same engine. If one leg fails the other's results are still returned,
+    with `degraded` set so they are not cached past the failing leg's recovery.
+    """
+
+    @property
+    def top_k(self):
+        return settings.HYBRID_TOP_K
+
+    def __init__(self, db_session: AsyncSession):
+        super().__init__(db_session)
+        self.dense = DenseRetrieval(db_session)
+
+    async def retrieve(self, query: str):
+        async with AsyncSession(self.db_session.bind, expire_on_commit=False) as sparse_session:
+            results = await asyncio.gather(
+                self._timed("dense", self.dense.retrieve(query)),
+                self._timed("sparse", SparseRetrieval(sparse_session).retrieve(query)),
+                return_exceptions=True,
+            )
+
+        rankings = []
+        for leg, result in zip(("dense", "sparse"), results):
+            if isinstance(result, BaseException):
+                logger.warning("Hybrid retrieval %s leg failed: %s", leg, result)
+                self.degraded = True
+            else:
+                rankings.append(result)
+        if not rankings:
+            raise results[0]
+        return reciprocal_rank_fusion(rankings, k=settings.HYBRID_RRF_K)[:settings.HYBRID_TOP_K]
+
+    @staticmethod
+    async def _timed(leg: str, retrieval: Awaitable[list]) -> list:
+        started = time.perf_counter()
+        try:
+            return await retrieval
+        finally:
+            RETRIEVAL_LEG_SECONDS.labels(leg).observe(time.perf_counter() - started)
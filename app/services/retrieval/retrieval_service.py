@@ -1,20 +1,34 @@
 from app.services.retrieval.retrieval_strategy import RetrievalStrategy
 from app.services.retrieval.dense import DenseRetrieval
 from app.services.retrieval.sparse import SparseRetrieval
-from sqlmodel import Session
+from app.services.retrieval.hybrid import HybridRetrieval
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Optional
+from app.services.retrieval.search_cache import SearchResultCache, current_generation
 
 class RetrievalService:
-    def __init__(self, strategy: RetrievalStrategy):
+    def __init__(self, strategy: RetrievalStrategy, cache: Optional[SearchResultCache] = None):
         self.strategy: RetrievalStrategy = strategy
+        self.cache = cache
 
-    def retrieve(self, query: str):
-        return self.strategy.retrieve(query)
+    async def retrieve(self, query: str):
+        if self.cache is None:
+            return await self.strategy.retrieve(query)
+        generation = await current_generation(self.strategy.db_session)
+        key = self.cache.make_key(type(self.strategy).__name__, query, self.strategy.top_k, generation)
+        results = self.cache.get(key)
+        if results is None:
+            results = await self.strategy.retrieve(query)
+            if not self.strategy.degraded:
+                self.cache.set(key, results)
+        return results
     
 class RetrievalServiceFactory:
     def __init__(self, method: str):
         self.strategies = {
             "dense": DenseRetrieval,
             "sparse": SparseRetrieval,
+            "hybrid": HybridRetrieval,
         }
         if method is None:
             raise ValueError("Method cannot be None")
@@ -22,6 +36,6 @@ class RetrievalServiceFactory:
             raise ValueError(f"Invalid retrieval method: {method}, must be one of {list(self.strategies.keys())}")
         self.method = method
 
-    def create(self, db: Session) -> RetrievalStrategy:
+    def create(self, db: AsyncSession) -> RetrievalStrategy:
         strategy_class = self.strategies[self.method]
         return strategy_class(db)
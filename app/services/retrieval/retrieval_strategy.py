@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from sqlmodel import Session
+from typing import Optional
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 @dataclass
 class DocumentRef:
@@ -8,9 +9,12 @@ class DocumentRef:
     page_number: int
 
 class RetrievalStrategy(ABC):
-    def __init__(self, db_session: Session):
+    top_k: Optional[int] = None  # Results returned, part of the search cache key
+    degraded: bool = False  # Set by `retrieve` when results are partial; those are not cached
+
+    def __init__(self, db_session: AsyncSession):
         self.db_session = db_session
     
     @abstractmethod
-    def retrieve(self, query: str) -> list[DocumentRef]:
+    async def retrieve(self, query: str) -> list[DocumentRef]:
         pass
\ No newline at end of file
@@ -0,0 +1,69 @@
+import hashlib
+from typing import List, Optional
+
+from prometheus_client import Counter
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config.settings import settings
+from app.model.search_index_generation import SearchIndexGeneration
+from app.services.retrieval.embedding_cache import EmbeddingCache
+from app.utils.lru_cache import LRUCache
+
+SEARCH_CACHE_HITS = Counter("search_cache_hits", "Search requests served from the result cache")
+SEARCH_CACHE_MISSES = Counter("search_cache_misses", "Search requests that ran the retrieval queries")
+
+
+async def current_generation(session: AsyncSession) -> int:
+    generation = (await session.exec(
+        select(SearchIndexGeneration.generation).where(SearchIndexGeneration.id == 1)
+    )).first()
+    return generation or 0
+
+
+async def bump_generation(session: AsyncSession):
+    """
+    Invalidates every cached search result; call inside the transaction that changes the corpus.
+    A single upsert, so concurrent first writers cannot both try to insert the row.
+    """
+    insert = sqlite_insert if session.get_bind().dialect.name == "sqlite" else postgresql_insert
+    statement = insert(SearchIndexGeneration).values(id=1, generation=1)
+    await session.exec(statement.on_conflict_do_update(
+        index_elements=[SearchIndexGeneration.id],
+        set_={"generation": SearchIndexGeneration.generation + 1},
+    ))
+
+
+class SearchResultCache(LRUCache[List[dict]]):
+    """
+    Caches search results by (method, normalized query, k, corpus generation).
+
+    The generation lives in the database and is bumped by the ingestion service whenever
+    indexed content changes, so all workers stop serving a result the moment the search
+    corpus changes; stale generations simply age out of the LRU. The TTL only bounds
+    writes made outside the ingestion pipeline.
+    """
+
+    name = "search"
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        super().__init__(max_entries, ttl_seconds)
+
+    @staticmethod
+    def make_key(method: str, query: str, k: Optional[int], generation: int) -> str:
+        normalized = EmbeddingCache.normalize_query(query)
+        return hashlib.sha256(f"{method}\0{normalized}\0{k}\0{generation}".encode("utf-8")).hexdigest()
+
+    def _on_hit(self, tier: str):
+        SEARCH_CACHE_HITS.inc()
+
+    def _on_miss(self):
+        SEARCH_CACHE_MISSES.inc()
+
+
+search_cache = SearchResultCache(
+    max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SEARCH_CACHE_TTL_SECONDS,
+)
@@ -1,32 +1,52 @@
+import re
 from app.services.retrieval.retrieval_strategy import RetrievalStrategy
-from sqlmodel import Session, text
+from app.config.settings import settings
+from sqlmodel import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# The tsquery is built once in the CTE and reused for the GIN-indexed match and the ranking
+SPARSE_SEARCH = text("""
+    WITH search AS (
+        SELECT websearch_to_tsquery(CAST(:lang AS regconfig), :query) AS query
+    )
+    SELECT page.document_id, page.page_number, MAX(ts_rank_cd(page.full_text_search, search.query)) AS rank
+    FROM legal_document_pages AS page, search
+    WHERE page.full_text_search @@ search.query
+    GROUP BY page.document_id, page.page_number
+    ORDER BY rank DESC
+    LIMIT :top_k;
+""")
+
+def build_search_query(query: str) -> str:
+    """
+    Normalizes user input for `websearch_to_tsquery`, which accepts any text (quotes,
+    `or`, `-` negation) without raising. Words of two characters or fewer are dropped
+    as before (except the `or` operator), and the query is capped at SPARSE_MAX_QUERY_CHARS.
+    """
+    query = re.sub(r"[\x00-\x1f\x7f]", " ", query[:settings.SPARSE_MAX_QUERY_CHARS])
+    words = [word for word in query.split() if len(word) > 2 or word.lower() == "or"]
+    if not any(re.search(r"\w", word) for word in words):
+        return ""
+    return " ".join(words)
 
 class SparseRetrieval(RetrievalStrategy):
-    def __init__(self, db_session: Session):
+    @property
+    def top_k(self):
+        return settings.SPARSE_TOP_K
+
+    def __init__(self, db_session: AsyncSession):
         super().__init__(db_session)
 
-    def retrieve(self, query: str):
-        # Clean and prepare the query for PostgreSQL ts_query
-        # Remove special characters and convert to ts_query format
-        clean_query = ' & '.join(word for word in query.split() if len(word) > 2)
-        
-        if not clean_query:
+    async def retrieve(self, query: str):
+        search_query = build_search_query(query)
+
+        if not search_query:
             return []
-            
-        # Use PostgreSQL's ts_rank to score documents against the query using the indexed tsvector
-        statement = text("""
-            SELECT DISTINCT document_id, page_number, MAX(ts_rank_cd(full_text_search, to_tsquery(:lang, :ts_query))) AS rank
-            FROM legal_document_pages
-            WHERE full_text_search @@ to_tsquery(:lang, :ts_query)
-            GROUP BY document_id, page_number
-            ORDER BY rank DESC
-            LIMIT 20;
-        """)
-
-        res = self.db_session.exec(statement, params={
-            "lang": "indonesian",
-            "ts_query": clean_query
-        }).all()
 
-        return [{"document_id": r[0], "page_number": r[1]} for r in res]
+        res = (await self.db_session.exec(SPARSE_SEARCH, params={
+            "lang": settings.SPARSE_TS_CONFIG,
+            "query": search_query,
+            "top_k": settings.SPARSE_TOP_K,
+        })).all()
 
+        return [{"document_id": r[0], "page_number": r[1]} for r in res]
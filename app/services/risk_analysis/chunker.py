@@ -0,0 +1,42 @@
+import math
+from typing import List, Union
+
+from app.config.settings import settings
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / settings.CHARS_PER_TOKEN)
+
+
+def split_text(text: str, token_budget: int) -> List[str]:
+    """Splits a single oversized page on whitespace so every piece fits the budget."""
+    max_chars = token_budget * settings.CHARS_PER_TOKEN
+    pieces = []
+    while len(text) > max_chars:
+        cut = max(text.rfind("\n", 0, max_chars), text.rfind(" ", 0, max_chars))
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(text[:cut].strip())
+        text = text[cut:]
+    if text.strip():
+        pieces.append(text.strip())
+    return pieces
+
+
+def chunk_pages(pages: Union[List[str], str], token_budget: int) -> List[str]:
+    """Packs consecutive pages into windows of at most `token_budget` estimated tokens."""
+    if isinstance(pages, str):
+        pages = [pages]
+
+    chunks, current, current_tokens = [], [], 0
+    for page in pages:
+        for piece in split_text(page, token_budget):
+            piece_tokens = estimate_tokens(piece)
+            if current and current_tokens + piece_tokens > token_budget:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+from typing import Dict, List, Tuple, Union
+from starlette.concurrency import run_in_threadpool
+from app.commons.db.postgres import get_database
+from app.config.settings import settings
+from app.services.risk_analysis.chunker import chunk_pages
+from app.services.risk_analysis.risk_cache import RiskCache
+from app.utils.ai_client import AIClient
+from app.utils.risk_parser import RiskParser
+
+logger = logging.getLogger(__name__)
+
+FAILED_ANALYSIS_MARKER = "Gagal menganalisis dokumen"
+
+
+class RiskAnalysisService:
+    """Runs AI risk analysis, serving byte-identical (after normalization) documents from the cache."""
+
+    def __init__(self, cache: RiskCache, chunk_token_budget: int = 6000, chunk_concurrency: int = 4, chunk_retries: int = 1):
+        self.cache = cache
+        self.chunk_token_budget = chunk_token_budget
+        self.chunk_concurrency = chunk_concurrency
+        self.chunk_retries = max(0, chunk_retries)
+
+    @staticmethod
+    def is_failed(ai_response: str) -> bool:
+        return FAILED_ANALYSIS_MARKER in ai_response
+
+    async def analyze(self, text: Union[list, str], bypass_cache: bool = False) -> str:
+        if isinstance(text, list):
+            text = "\n".join(text)
+
+        if not bypass_cache:
+            cached = await run_in_threadpool(self.cache.get, AIClient.MODEL, AIClient.PROMPT_VERSION, text)
+            if cached is not None:
+                return cached
+
+        ai_response = await AIClient.analyze_risk(text)
+
+        # Never cache failures, the next request should retry the model
+        if not self.is_failed(ai_response):
+            await run_in_threadpool(self.cache.set, AIClient.MODEL, AIClient.PROMPT_VERSION, text, ai_response)
+        return ai_response
+
+    def needs_chunking(self, pages: Union[list, str]) -> bool:
+        return len(chunk_pages(pages, self.chunk_token_budget)) > 1
+
+    async def analyze_chunked(
+        self, pages: Union[list, str], bypass_cache: bool = False
+    ) -> Tuple[str, List[Dict[str, str]], List[int]]:
+        """
+        Map-reduce analysis: windows of pages are analyzed concurrently (at most
+        `chunk_concurrency` at a time) and their risks merged by clause number.
+        Each window goes through the cache on its own, so unchanged windows are reused.
+
+        A window whose model call fails is retried `chunk_retries` times. Windows that still
+        fail are left out of the merge and returned (1-based) as the third element, so
+        callers can tell a partial risk list from a complete one.
+        """
+        chunks = chunk_pages(pages, self.chunk_token_budget)
+        semaphore = asyncio.Semaphore(self.chunk_concurrency)
+
+        async def analyze_chunk(chunk: str) -> str:
+            async with semaphore:
+                response = await self.analyze(chunk, bypass_cache=bypass_cache)
+                for _ in range(self.chunk_retries):
+                    if not self.is_failed(response):
+                        break
+                    response = await self.analyze(chunk, bypass_cache=True)
+                return response
+
+        responses = await asyncio.gather(*(analyze_chunk(chunk) for chunk in chunks))
+        failed_chunks = [number for number, response in enumerate(responses, start=1) if self.is_failed(response)]
+        if failed_chunks:
+            logger.warning("Risk analysis failed for %d of %d chunks: %s", len(failed_chunks), len(chunks), failed_chunks)
+        risks = RiskParser.merge_risks([
+            RiskParser.parse_ai_risk_analysis(response) for response in responses if not self.is_failed(response)
+        ])
+        return "\n\n".join(responses), risks, failed_chunks
+
+
+risk_analysis_service = RiskAnalysisService(
+    RiskCache(
+        get_database(settings.DB_URL),
+        ttl_seconds=settings.RISK_CACHE_TTL_SECONDS,
+        max_entries=settings.RISK_CACHE_MAX_ENTRIES,
+    ),
+    chunk_token_budget=settings.RISK_CHUNK_TOKEN_BUDGET,
+    chunk_concurrency=settings.RISK_CHUNK_CONCURRENCY,
+    chunk_retries=settings.RISK_CHUNK_RETRIES,
+)
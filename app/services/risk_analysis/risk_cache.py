@@ -0,0 +1,92 @@
+import hashlib
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Union
+
+from prometheus_client import Counter
+from sqlalchemy import delete, func
+from sqlmodel import Session, select
+
+from app.commons.db.postgres import Postgres
+from app.model.risk_analysis_cache import RiskAnalysisCache
+
+logger = logging.getLogger(__name__)
+
+RISK_CACHE_HITS = Counter("risk_analysis_cache_hits", "Risk analyses served from the response cache")
+RISK_CACHE_MISSES = Counter("risk_analysis_cache_misses", "Risk analyses that required an LLM call")
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class RiskCache:
+    """Persists AI risk analyses keyed on (model, prompt version, normalized document text)."""
+
+    def __init__(self, db: Postgres, ttl_seconds: int, max_entries: int):
+        self.db = db
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_entries = max_entries
+
+    @staticmethod
+    def normalize_text(text: Union[list, str]) -> str:
+        """Joins pages and collapses whitespace so layout-only differences share one entry."""
+        if isinstance(text, list):
+            text = "\n".join(text)
+        return re.sub(r"\s+", " ", text).strip()
+
+    @staticmethod
+    def make_key(model: str, prompt_version: str, text: Union[list, str]) -> str:
+        text_hash = hashlib.sha256(RiskCache.normalize_text(text).encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{model}\0{prompt_version}\0{text_hash}".encode("utf-8")).hexdigest()
+
+    def get(self, model: str, prompt_version: str, text: Union[list, str]) -> Optional[str]:
+        key = self.make_key(model, prompt_version, text)
+        try:
+            with Session(self.db.engine) as session:
+                entry = session.get(RiskAnalysisCache, key)
+                if entry is None or entry.created_at < _utcnow() - self.ttl:
+                    RISK_CACHE_MISSES.inc()
+                    return None
+                entry.last_accessed_at = _utcnow()
+                session.add(entry)
+                session.commit()
+                RISK_CACHE_HITS.inc()
+                return entry.ai_response
+        except Exception as e:
+            # The cache must never break an analysis, treat failures as a miss
+            logger.warning("Risk cache lookup failed: %s", e)
+            RISK_CACHE_MISSES.inc()
+            return None
+
+    def set(self, model: str, prompt_version: str, text: Union[list, str], ai_response: str):
+        key = self.make_key(model, prompt_version, text)
+        now = _utcnow()
+        try:
+            with Session(self.db.engine) as session:
+                entry = session.get(RiskAnalysisCache, key) or RiskAnalysisCache(
+                    cache_key=key, model=model, prompt_version=prompt_version,
+                    ai_response=ai_response, created_at=now, last_accessed_at=now,
+                )
+                entry.ai_response = ai_response
+                entry.created_at = now
+                entry.last_accessed_at = now
+                session.add(entry)
+                session.commit()
+                self._evict(session)
+        except Exception as e:
+            logger.warning("Risk cache write failed: %s", e)
+
+    def _evict(self, session: Session):
+        """Drops expired entries, then the least recently used ones beyond `max_entries`."""
+        session.execute(delete(RiskAnalysisCache).where(RiskAnalysisCache.created_at < _utcnow() - self.ttl))
+        overflow = session.exec(select(func.count()).select_from(RiskAnalysisCache)).one() - self.max_entries
+        if overflow > 0:
+            oldest = (
+                select(RiskAnalysisCache.cache_key)
+                .order_by(RiskAnalysisCache.last_accessed_at)
+                .limit(overflow)
+            )
+            session.execute(delete(RiskAnalysisCache).where(RiskAnalysisCache.cache_key.in_(oldest)))
+        session.commit()
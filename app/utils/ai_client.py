@@ -1,58 +1,101 @@
-from openai import OpenAI
+import asyncio
+import logging
+import httpx
+from typing import Optional
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 from app.config.settings import settings  # Import secure settings
 
+logger = logging.getLogger(__name__)
+
 class AIClient:
     """Handles AI requests and responses for risk analysis."""
 
+    MODEL = "qwen/qwen2.5-vl-72b-instruct:free"  # ✅ Use Qwen LLM
+    PROMPT_VERSION = "1"  # Bump whenever AI_RISK_ANALYSIS_PROMPT changes so cached analyses are not reused
+
+    # Hardcoded AI risk analysis prompt
+    AI_RISK_ANALYSIS_PROMPT = (
+        "Analisis dokumen berikut untuk mengidentifikasi klausul yang berpotensi berisiko bagi pihak kedua. Risiko mencakup, namun tidak terbatas pada:\n\n"
+        "* Ketidakseimbangan hak dan kewajiban antara pihak pertama dan pihak kedua\n"
+        "* Klausul pembatalan yang merugikan\n"
+        "* Klausul pembayaran yang berpotensi memberatkan\n"
+        "* Klausul tanggung jawab yang bisa menyebabkan kerugian sepihak\n"
+        "* Klausul force majeure yang tidak melindungi kepentingan pihak kedua\n"
+        "* Klausul ambigu atau multi-tafsir yang bisa disalahgunakan\n"
+        "* Klausul lain yang dapat menyebabkan dampak hukum negatif bagi pihak kedua\n\n"
+        "Format hasil yang diharapkan:\n"
+        "Klausul \\{nomor\\}: \"\\{kalimat atau kata-kata berisiko\\}\". Alasan: \"\\{penjelasan mengapa klausul ini berisiko\\}\".\n\n"
+        "Jika dokumen memiliki bahasa yang tidak dikenali, tampilkan pesan \"Bahasa tidak didukung\". "
+        "Jika tidak ditemukan klausul berisiko, tampilkan pesan \"Tidak ditemukan klausul yang dapat dianalisis\". "
+        "Jika terjadi kesalahan sistem, tampilkan pesan \"Gagal menganalisis dokumen, coba lagi nanti\".\n\n"
+        "Setiap klausul yang ditandai harus memiliki minimal satu alasan mengapa klausul tersebut berisiko, "
+        "tetapi jangan berikan rekomendasi perbaikan terlebih dahulu."
+    )
+
+    # Shared for the app's lifetime so requests reuse pooled keep-alive connections
+    _client: Optional[AsyncOpenAI] = None
+    _semaphore: Optional[asyncio.Semaphore] = None
+
+    @classmethod
+    def get_client(cls) -> AsyncOpenAI:
+        """Returns the shared OpenRouter client, creating it on first use (normally in the app lifespan)."""
+        if cls._client is None:
+            cls._client = AsyncOpenAI(
+                base_url="https://openrouter.ai/api/v1",
+                api_key=settings.OPENROUTER_API_KEY,  # 🔐 Use secure API key
+                timeout=settings.OPENROUTER_TIMEOUT_SECONDS,
+                http_client=DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=settings.OPENROUTER_MAX_CONNECTIONS,
+                        max_keepalive_connections=settings.OPENROUTER_MAX_CONNECTIONS,
+                    ),
+                ),
+            )
+            cls._semaphore = asyncio.Semaphore(settings.OPENROUTER_MAX_CONCURRENCY)
+        return cls._client
+
+    @classmethod
+    def start(cls):
+        """Warms the shared client at startup; without an API key it is created lazily on first use."""
+        if settings.OPENROUTER_API_KEY:
+            cls.get_client()
+
+    @classmethod
+    async def close(cls):
+        if cls._client is not None:
+            await cls._client.close()
+        cls._client = None
+        cls._semaphore = None
+
     @staticmethod
-    def analyze_risk(text: str) -> str:
+    async def analyze_risk(text: str) -> str:
         """Sends extracted text to AI for risk analysis using Qwen on OpenRouter."""
-        client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=settings.OPENROUTER_API_KEY,  # 🔐 Use secure API key
-        )
-
-        # Hardcoded AI risk analysis prompt
-        AI_RISK_ANALYSIS_PROMPT = (
-            "Analisis dokumen berikut untuk mengidentifikasi klausul yang berpotensi berisiko bagi pihak kedua. Risiko mencakup, namun tidak terbatas pada:\n\n"
-            "* Ketidakseimbangan hak dan kewajiban antara pihak pertama dan pihak kedua\n"
-            "* Klausul pembatalan yang merugikan\n"
-            "* Klausul pembayaran yang berpotensi memberatkan\n"
-            "* Klausul tanggung jawab yang bisa menyebabkan kerugian sepihak\n"
-            "* Klausul force majeure yang tidak melindungi kepentingan pihak kedua\n"
-            "* Klausul ambigu atau multi-tafsir yang bisa disalahgunakan\n"
-            "* Klausul lain yang dapat menyebabkan dampak hukum negatif bagi pihak kedua\n\n"
-            "Format hasil yang diharapkan:\n"
-            "Klausul \\{nomor\\}: \"\\{kalimat atau kata-kata berisiko\\}\". Alasan: \"\\{penjelasan mengapa klausul ini berisiko\\}\".\n\n"
-            "Jika dokumen memiliki bahasa yang tidak dikenali, tampilkan pesan \"Bahasa tidak didukung\". "
-            "Jika tidak ditemukan klausul berisiko, tampilkan pesan \"Tidak ditemukan klausul yang dapat dianalisis\". "
-            "Jika terjadi kesalahan sistem, tampilkan pesan \"Gagal menganalisis dokumen, coba lagi nanti\".\n\n"
-            "Setiap klausul yang ditandai harus memiliki minimal satu alasan mengapa klausul tersebut berisiko, "
-            "tetapi jangan berikan rekomendasi perbaikan terlebih dahulu."
-        )
+        client = AIClient.get_client()
 
         # Combine extracted text with the hardcoded prompt
-        full_prompt = f"{AI_RISK_ANALYSIS_PROMPT}\n\n{text}"
-        print(full_prompt)
+        full_prompt = f"{AIClient.AI_RISK_ANALYSIS_PROMPT}\n\n{text}"
+        # Never log the contract itself, only its size
+        logger.debug("Risk analysis request: %d prompt chars", len(full_prompt))
         
         try:
-            response = client.chat.completions.create(
-                extra_headers={
-                    "HTTP-Referer": settings.SITE_URL,  # Optional for OpenRouter rankings
-                    "X-Title": settings.SITE_NAME,  # Optional for OpenRouter rankings
-                },
-                extra_body={},
-                model="qwen/qwen2.5-vl-72b-instruct:free",  # ✅ Use Qwen LLM
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [{"type": "text", "text": full_prompt}]
-                    }
-                ],
-            )
+            async with AIClient._semaphore:  # Bound in-flight analyses per worker
+                response = await client.chat.completions.create(
+                    extra_headers={
+                        "HTTP-Referer": settings.SITE_URL,  # Optional for OpenRouter rankings
+                        "X-Title": settings.SITE_NAME,  # Optional for OpenRouter rankings
+                    },
+                    extra_body={},
+                    model=AIClient.MODEL,
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": [{"type": "text", "text": full_prompt}]
+                        }
+                    ],
+                )
 
             ai_output = response.choices[0].message.content.strip()
-            print(ai_output)
+            logger.debug("Risk analysis response: %d chars", len(ai_output))
             # Temporary hardcode karena API sedang error, dan self deployed API in progress
             # ai_output = settings.AI_OUTPUT
 
@@ -0,0 +1,45 @@
+from typing import Optional, Union
+
+from prometheus_client import Counter
+
+from app.config.settings import settings
+from app.utils.lru_cache import LRUCache
+
+EXTRACTION_CACHE_HITS = Counter("extraction_cache_hits", "Extraction cache hits", ["tier"])
+EXTRACTION_CACHE_MISSES = Counter("extraction_cache_misses", "Extraction cache misses")
+EXTRACTION_CACHE_EVICTIONS = Counter("extraction_cache_evictions", "Entries evicted from the in-memory extraction cache")
+
+Extracted = Union[list, str]
+
+
+class ExtractionCache(LRUCache[Extracted]):
+    """
+    Caches parser output by the SHA-256 of the uploaded bytes.
+
+    Entries never expire (the key is the content hash); when `disk_dir` is set they are
+    also written there as JSON so they survive restarts and are shared between workers.
+    """
+
+    name = "extraction"
+
+    def __init__(self, max_entries: int, disk_dir: Optional[str] = None):
+        super().__init__(max_entries, disk_dir=disk_dir)
+
+    @staticmethod
+    def make_key(content_hash: str, file_type: str) -> str:
+        return f"{content_hash}.{file_type.lower()}"
+
+    def _on_hit(self, tier: str):
+        EXTRACTION_CACHE_HITS.labels(tier=tier).inc()
+
+    def _on_miss(self):
+        EXTRACTION_CACHE_MISSES.inc()
+
+    def _on_evict(self):
+        EXTRACTION_CACHE_EVICTIONS.inc()
+
+
+extraction_cache = ExtractionCache(
+    max_entries=settings.EXTRACTION_CACHE_MAX_ENTRIES,
+    disk_dir=settings.EXTRACTION_CACHE_DIR,
+)
@@ -0,0 +1,118 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Generic, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """
+    Bounded in-memory LRU with an optional TTL and an optional disk tier.
+
+    When `disk_dir` is set, entries are also written there (atomically, via a temp file
+    and `os.replace`) so they are shared between workers and survive restarts; a disk
+    hit is promoted back into memory. Subclasses choose the on-disk encoding by
+    overriding `disk_suffix`, `_encode` and `_decode` (JSON by default), and report
+    metrics through the `_on_hit` / `_on_miss` / `_on_evict` hooks.
+    """
+
+    name = "lru"
+    disk_suffix = ".json"
+
+    def __init__(self, max_entries: int, ttl_seconds: Optional[float] = None, disk_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[str, Tuple[Optional[float], V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def get(self, key: str) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._on_hit("memory")
+                    return value
+                del self._entries[key]
+
+        value = self._read_disk(key)
+        if value is not None:
+            self._on_hit("disk")
+            self._remember(key, value)
+            return value
+
+        self._on_miss()
+        return None
+
+    def set(self, key: str, value: V):
+        self._remember(key, value)
+        self._write_disk(key, value)
+
+    def clear(self):
+        """Empties the memory tier; disk entries are left for other workers."""
+        with self._lock:
+            self._entries.clear()
+
+    def _on_hit(self, tier: str):
+        pass
+
+    def _on_miss(self):
+        pass
+
+    def _on_evict(self):
+        pass
+
+    def _encode(self, value: V) -> bytes:
+        return json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+    def _decode(self, data: bytes) -> V:
+        return json.loads(data.decode("utf-8"))
+
+    def _remember(self, key: str, value: V):
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._on_evict()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}{self.disk_suffix}")
+
+    def _read_disk(self, key: str) -> Optional[V]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            if self.ttl_seconds is not None and os.path.getmtime(path) + self.ttl_seconds < time.time():
+                return None
+            with open(path, "rb") as f:
+                return self._decode(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable %s cache entry %s: %s", self.name, key, e)
+            return None
+
+    def _write_disk(self, key: str, value: V):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(self._encode(value))
+            os.replace(temp_path, path)  # Atomic, so concurrent readers never see a partial file
+        except OSError as e:
+            logger.warning("Failed to persist %s cache entry %s: %s", self.name, key, e)
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import threading
+from functools import partial
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+from prometheus_client import Gauge
+
+from app.config.settings import settings
+from app.utils.parsers import ParserFactory
+
+logger = logging.getLogger(__name__)
+
+PARSER_JOBS_QUEUED = Gauge("parser_jobs_queued", "Document parse jobs waiting for a free parser worker")
+PARSER_JOBS_RUNNING = Gauge("parser_jobs_running", "Document parse jobs currently executing in the parser pool")
+
+CRASHED_MESSAGE = "❌ Pemroses dokumen berhenti tak terduga, coba lagi."
+
+
+class ParserPoolFullError(RuntimeError):
+    """Raised when the parser queue is full and a new parse job is rejected."""
+
+
+class ParserCrashedError(RuntimeError):
+    """Raised when a parser worker process died (e.g. OOM or segfault) while the job was in the pool."""
+
+
+class ParserSlot:
+    """A reserved pool slot for parsing that runs outside the executor; `release` is idempotent."""
+
+    def __init__(self, pool: "ParserPool"):
+        self._pool = pool
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self):
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._pool._on_done(None)
+
+
+class ParserPool:
+    """
+    Runs blocking document parsers on a bounded worker pool so the event loop stays responsive.
+
+    Jobs beyond `workers` wait inside the executor; once `max_queue` jobs are waiting,
+    new submissions are rejected with `ParserPoolFullError` instead of piling up.
+    If a worker process dies, the broken executor is replaced so later jobs still run;
+    the jobs that were in it fail with `ParserCrashedError`.
+    """
+
+    def __init__(self, mode: str, workers: int, max_queue: int, timeout: float):
+        if mode not in ("process", "thread"):
+            raise ValueError(f"Invalid parser pool mode: {mode}, must be one of ['process', 'thread']")
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = self._create_executor()
+            logger.info("Parser pool started, mode=%s workers=%d", self.mode, self.workers)
+
+    def _create_executor(self) -> Executor:
+        if self.mode == "process":
+            return ProcessPoolExecutor(max_workers=self.workers)
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="parser")
+
+    def _replace_broken(self, broken: Executor):
+        """Swaps in a fresh executor, once, however many jobs of the broken one report it."""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = self._create_executor()
+        logger.error("A parser worker died, replaced the parser pool")
+        broken.shutdown(wait=False)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def extract_text(self, file_type: str, file_path, bounded: bool = True, **options):
+        """
+        Parses a document in the pool. Unsupported formats fail fast without taking a slot.
+        `options` (e.g. a PDF page selection) are passed on to the parser's `extract_text`.
+        """
+        parser = ParserFactory.get_parser(file_type)
+        return await self.submit(partial(parser.extract_text, **options), file_path, bounded=bounded)
+
+    def acquire(self) -> ParserSlot:
+        """
+        Reserves a slot for parsing done outside the executor (page streaming iterates the
+        parser in Starlette's threadpool), so it counts against the same queue limit.
+        """
+        with self._lock:
+            self._admit()
+        return ParserSlot(self)
+
+    async def submit(self, fn: Callable, *args, bounded: bool = True):
+        """
+        Runs `fn(*args)` in the pool, bounded by the queue limit and the per-job timeout.
+        Background jobs pass `bounded=False` to wait in the queue rather than be rejected;
+        their own worker count already bounds how many of them can be waiting.
+        """
+        self.start()
+        try:
+            with self._lock:
+                self._admit(bounded)
+                executor = self._executor
+                try:
+                    future = executor.submit(fn, *args)
+                except BaseException:
+                    self._in_flight -= 1
+                    self._update_gauges()
+                    raise
+        except BrokenProcessPool as e:
+            self._replace_broken(executor)
+            raise ParserCrashedError(CRASHED_MESSAGE) from e
+        future.add_done_callback(self._on_done)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except BrokenProcessPool as e:
+            self._replace_broken(executor)
+            raise ParserCrashedError(CRASHED_MESSAGE) from e
+        except asyncio.TimeoutError:
+            # Only jobs still waiting in the queue can be cancelled; a running
+            # job keeps its worker (and its slot) until it finishes.
+            future.cancel()
+            logger.warning("Parser job timed out after %.1fs", self.timeout)
+            raise
+
+    def _admit(self, bounded: bool = True):
+        if bounded and self._in_flight >= self.workers + self.max_queue:
+            raise ParserPoolFullError("❌ Antrean pemrosesan dokumen penuh, coba lagi nanti.")
+        self._in_flight += 1
+        self._update_gauges()
+
+    def _on_done(self, _: Optional[Future]):
+        with self._lock:
+            self._in_flight -= 1
+            self._update_gauges()
+
+    def _update_gauges(self):
+        PARSER_JOBS_RUNNING.set(min(self._in_flight, self.workers))
+        PARSER_JOBS_QUEUED.set(max(0, self._in_flight - self.workers))
+
+
+parser_pool = ParserPool(
+    mode=settings.PARSER_POOL_MODE,
+    workers=settings.PARSER_POOL_WORKERS,
+    max_queue=settings.PARSER_POOL_MAX_QUEUE,
+    timeout=settings.PARSER_TIMEOUT_SECONDS,
+)
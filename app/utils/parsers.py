@@ -1,21 +1,91 @@
+import io
+import re
 import pdfplumber
 import docx
 from abc import ABC, abstractmethod
+from typing import IO, Iterator, List, Optional, Tuple, Union
+
+# Parsers take a file path, or the raw bytes of a small upload that was kept in memory
+Source = Union[str, bytes]
+
+def open_source(source: Source) -> Union[str, IO[bytes]]:
+    """Wraps in-memory uploads in a file object; paths are passed through unchanged."""
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+# Inclusive, 1-based page spans; an end of None runs to the last page
+PageRange = List[Tuple[int, Optional[int]]]
+
+MAX_PAGE_NUMBER = 100_000
+
+def parse_page_range(spec: str) -> PageRange:
+    """Parses a selection such as "1-3,7,10-" into page spans."""
+    spans = []
+    for part in spec.split(","):
+        match = re.fullmatch(r"(\d+)(?:-(\d*))?", part.strip())
+        if not match:
+            raise ValueError(f"❌ Rentang halaman tidak valid: {part.strip()!r}")
+        start = int(match.group(1))
+        end = start if match.group(2) is None else int(match.group(2)) if match.group(2) else None
+        if start < 1 or (end is not None and end < start) or max(start, end or 0) > MAX_PAGE_NUMBER:
+            raise ValueError(f"❌ Rentang halaman tidak valid: {part.strip()!r}")
+        spans.append((start, end))
+    return spans
+
+def page_selected(page_number: int, page_range: Optional[PageRange]) -> bool:
+    return page_range is None or any(
+        start <= page_number and (end is None or page_number <= end) for start, end in page_range
+    )
+
+def pages_to_open(page_range: Optional[PageRange], max_pages: Optional[int]) -> Optional[List[int]]:
+    """
+    Page numbers to hand to pdfplumber so the other pages are never loaded, or None when
+    the selection is open-ended and has to be filtered while iterating.
+    """
+    if page_range is None:
+        return list(range(1, max_pages + 1)) if max_pages is not None else None
+    if any(end is None for _, end in page_range):
+        return None
+    numbers = sorted({number for start, end in page_range for number in range(start, end + 1)})
+    return numbers[:max_pages] if max_pages is not None else numbers
+
+def select_pages(pages: List[str], page_range: Optional[PageRange], max_pages: Optional[int]) -> List[str]:
+    """Applies a page selection to an already extracted page list."""
+    selected = [text for number, text in enumerate(pages, start=1) if page_selected(number, page_range)]
+    return selected[:max_pages] if max_pages is not None else selected
 
 class DocumentParser(ABC):
     """Abstract class for document parsing (SOLID - Open/Closed Principle)."""
     @abstractmethod
-    def extract_text(self, file_path: str) -> str:
+    def extract_text(self, file_path: Source) -> str:
         """Extracts text from a document file."""
         raise NotImplementedError("Subclasses must implement `extract_text`.")
 
+    def iter_pages(self, file_path: Source) -> Iterator[str]:
+        """Yields the document text page by page. Formats without pages yield a single item."""
+        yield self.extract_text(file_path)
+
 class PDFParser(DocumentParser):
     """Concrete class for parsing PDF files."""
-    def extract_text(self, file_path: str):
+    def extract_text(self, file_path: Source, page_range: Optional[PageRange] = None, max_pages: Optional[int] = None):
+        return list(self.iter_pages(file_path, page_range, max_pages))
+
+    def iter_pages(self, file_path: Source, page_range: Optional[PageRange] = None, max_pages: Optional[int] = None) -> Iterator[str]:
+        """
+        Yields each page's text as soon as it is parsed, releasing the page's layout cache afterwards.
+        With `page_range` / `max_pages`, only the selected pages are laid out and extracted.
+        """
         try:
-            with pdfplumber.open(file_path) as pdf:
-                page_texts = [page.extract_text() or "" for page in pdf.pages]
-                return page_texts
+            with pdfplumber.open(open_source(file_path), pages=pages_to_open(page_range, max_pages)) as pdf:
+                yielded = 0
+                for page in pdf.pages:
+                    if max_pages is not None and yielded >= max_pages:
+                        break
+                    if not page_selected(page.page_number, page_range):
+                        continue
+                    yielded += 1
+                    text = page.extract_text() or ""
+                    page.close()  # Drop cached chars/layout objects so memory stays flat
+                    yield text
         except FileNotFoundError as e:
             raise FileNotFoundError(f"❌ File PDF tidak ditemukan: {str(e)}") from e
         except ValueError as e:  # Catch possible corrupted file issues
@@ -27,9 +97,9 @@ class PDFParser(DocumentParser):
 
 class DOCXParser(DocumentParser):
     """Concrete class for parsing DOCX files."""
-    def extract_text(self, file_path: str) -> str:
+    def extract_text(self, file_path: Source) -> str:
         try:
-            doc = docx.Document(file_path)
+            doc = docx.Document(open_source(file_path))
             extracted_text = "\n".join([para.text for para in doc.paragraphs if para.text.strip()])
             return extracted_text.strip() if extracted_text.strip() else "❌ Gagal mengekstrak teks atau dokumen kosong."
         except FileNotFoundError as e:
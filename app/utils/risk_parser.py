@@ -58,3 +58,30 @@ class RiskParser:
                 "risky_text": "Parsing gagal",
                 "reason": "Kesalahan sistem saat mengolah dokumen"
             }]
+
+    @staticmethod
+    def merge_risks(risk_lists: List[List[Dict[str, str]]]) -> List[Dict[str, str]]:
+        """
+        Merges risks parsed from several chunks of the same document.
+        Keeps the first occurrence of each clause number; the "N/A" placeholder
+        is only returned when no chunk produced a real clause.
+        """
+        merged = []
+        seen_clauses = set()
+        for risks in risk_lists:
+            for risk in risks:
+                if risk["clause"] == "N/A":
+                    continue
+                clause_key = re.sub(r"\s+", " ", risk["clause"]).strip().lower()
+                if clause_key in seen_clauses:
+                    continue
+                seen_clauses.add(clause_key)
+                merged.append(risk)
+
+        logger.info(
+            "Merged chunked risk analysis, chunk_count=%d clause_count=%d",
+            len(risk_lists), len(merged)
+        )
+        if merged:
+            return merged
+        return risk_lists[0] if risk_lists else RiskParser.parse_ai_risk_analysis("")
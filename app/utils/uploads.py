@@ -0,0 +1,115 @@
+import hashlib
+import io
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Optional, Union
+from fastapi import UploadFile
+
+CHUNK_SIZE = 1024 * 1024
+
+UPLOAD_DIR = "uploads"
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit; the partial copy is discarded."""
+
+
+def _too_large(max_bytes: int) -> UploadTooLargeError:
+    return UploadTooLargeError(f"❌ Ukuran file melebihi batas {max_bytes // (1024 * 1024)} MB.")
+
+
+def _check_declared_size(file: UploadFile, max_bytes: Optional[int]):
+    """Rejects uploads whose size is already known to be too large before copying a byte."""
+    if max_bytes is not None and file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+
+
+def save_upload(file: UploadFile, destination: str, max_bytes: Optional[int] = None) -> str:
+    """Copies the upload to `destination` chunk by chunk, returning the SHA-256 of its bytes."""
+    _check_declared_size(file, max_bytes)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(destination, "wb") as buffer:
+            while chunk := file.file.read(CHUNK_SIZE):
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise _too_large(max_bytes)
+                digest.update(chunk)
+                buffer.write(chunk)
+    except BaseException:
+        os.remove(destination)
+        raise
+    return digest.hexdigest()
+
+
+def unique_upload_path(file_extension: str, directory: str = UPLOAD_DIR) -> str:
+    """Per-request path, so concurrent uploads of the same filename never overwrite each other."""
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=f".{file_extension}", dir=directory)
+    os.close(fd)
+    return path
+
+
+@dataclass
+class SpooledUpload:
+    """An upload held in memory (`data`) when small, or in a unique temp file (`path`) otherwise."""
+    content_hash: str
+    size: int
+    data: Optional[bytes] = None
+    path: Optional[str] = None
+
+    @property
+    def source(self) -> Union[bytes, str]:
+        """What the parsers accept: raw bytes are parsed from memory, a str is a file path."""
+        return self.data if self.data is not None else self.path
+
+    def cleanup(self):
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def spool_upload(
+    file: UploadFile,
+    file_extension: str,
+    max_bytes: Optional[int],
+    memory_max_bytes: int,
+    directory: str = UPLOAD_DIR,
+) -> SpooledUpload:
+    """
+    Reads the upload once, hashing as it goes. Uploads up to `memory_max_bytes` stay in memory
+    and never touch the disk; larger ones roll over to a unique temp file. `max_bytes` is
+    enforced while copying, so an oversized upload is never written out in full.
+    """
+    _check_declared_size(file, max_bytes)
+    digest = hashlib.sha256()
+    buffer = io.BytesIO()
+    upload = SpooledUpload(content_hash="", size=0)
+    disk = None
+    try:
+        while chunk := file.file.read(CHUNK_SIZE):
+            upload.size += len(chunk)
+            if max_bytes is not None and upload.size > max_bytes:
+                raise _too_large(max_bytes)
+            digest.update(chunk)
+            if disk is None and upload.size > memory_max_bytes:
+                upload.path = unique_upload_path(file_extension, directory)
+                disk = open(upload.path, "wb")
+                disk.write(buffer.getbuffer())
+                buffer = None
+            if disk is not None:
+                disk.write(chunk)
+            else:
+                buffer.write(chunk)
+    except BaseException:
+        if disk is not None:
+            disk.close()
+        upload.cleanup()
+        raise
+    if disk is not None:
+        disk.close()
+    else:
+        upload.data = buffer.getvalue()
+    upload.content_hash = digest.hexdigest()
+    return upload
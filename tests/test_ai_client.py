@@ -1,7 +1,16 @@
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock, ANY
 from app.utils.ai_client import AIClient
 
+@pytest.fixture(autouse=True)
+def reset_shared_client():
+    """Each test builds its own (mocked) shared client."""
+    AIClient._client = None
+    AIClient._semaphore = None
+    yield
+    AIClient._client = None
+    AIClient._semaphore = None
+
 @pytest.fixture
 def mock_ai_response():
     """Mock AI response with valid risk analysis output."""
@@ -17,58 +26,87 @@ def mock_ai_error_response():
     return Exception("API request failed")
 
 # ✅ Test 1: AIClient should return valid AI response when successful
-def test_ai_client_success(mock_ai_response):
-    with patch("app.utils.ai_client.OpenAI") as mock_openai:
+@pytest.mark.asyncio
+async def test_ai_client_success(mock_ai_response):
+    with patch("app.utils.ai_client.AsyncOpenAI") as mock_openai:
         mock_instance = mock_openai.return_value
-        mock_instance.chat.completions.create.return_value = mock_ai_response
+        mock_instance.chat.completions.create = AsyncMock(return_value=mock_ai_response)
 
         text = "Sample contract text"
-        response = AIClient.analyze_risk(text)
+        response = await AIClient.analyze_risk(text)
 
         assert "Klausul 1" in response, "AIClient did not return expected AI response."
 
 # ✅ Test 2: AIClient should return error message when API fails
-def test_ai_client_handles_api_error(mock_ai_error_response):
-    with patch("app.utils.ai_client.OpenAI") as mock_openai:
+@pytest.mark.asyncio
+async def test_ai_client_handles_api_error(mock_ai_error_response):
+    with patch("app.utils.ai_client.AsyncOpenAI") as mock_openai:
         mock_instance = mock_openai.return_value
-        mock_instance.chat.completions.create.side_effect = mock_ai_error_response
+        mock_instance.chat.completions.create = AsyncMock(side_effect=mock_ai_error_response)
 
         text = "Sample contract text"
-        response = AIClient.analyze_risk(text)
+        response = await AIClient.analyze_risk(text)
 
         assert "❌ Gagal menganalisis dokumen" in response, "AIClient did not handle API failure correctly."
 
 # ✅ Test 3: AIClient should handle empty input
-def test_ai_client_empty_input():
-    with patch("app.utils.ai_client.OpenAI") as mock_openai:
+@pytest.mark.asyncio
+async def test_ai_client_empty_input():
+    with patch("app.utils.ai_client.AsyncOpenAI") as mock_openai:
         mock_instance = mock_openai.return_value
-        mock_instance.chat.completions.create.return_value = MagicMock(choices=[MagicMock(message=MagicMock(content="Tidak ada risiko terdeteksi."))])
+        mock_instance.chat.completions.create = AsyncMock(return_value=MagicMock(choices=[MagicMock(message=MagicMock(content="Tidak ada risiko terdeteksi."))]))
 
-        response = AIClient.analyze_risk("")
+        response = await AIClient.analyze_risk("")
 
         assert response == "Tidak ada risiko terdeteksi.", "AIClient should return proper response for empty input."
 
 # ✅ Test 4: AIClient should handle slow response
-def test_ai_client_handles_slow_response(mock_ai_response):
-    with patch("app.utils.ai_client.OpenAI") as mock_openai:
+@pytest.mark.asyncio
+async def test_ai_client_handles_slow_response(mock_ai_response):
+    with patch("app.utils.ai_client.AsyncOpenAI") as mock_openai:
         with patch("time.sleep", return_value=None):  # Simulate delayed response
             mock_instance = mock_openai.return_value
-            mock_instance.chat.completions.create.return_value = mock_ai_response
+            mock_instance.chat.completions.create = AsyncMock(return_value=mock_ai_response)
 
-            response = AIClient.analyze_risk("Sample contract text")
+            response = await AIClient.analyze_risk("Sample contract text")
 
             assert "Klausul 1" in response, "AIClient should still return valid response after delay."
 
 # ✅ Test 5: AIClient should send API key
+@pytest.mark.asyncio
 @patch("app.utils.ai_client.settings")
-@patch("app.utils.ai_client.OpenAI")
-def test_ai_client_uses_api_key(mock_openai, mock_settings):
+@patch("app.utils.ai_client.AsyncOpenAI")
+async def test_ai_client_uses_api_key(mock_openai, mock_settings):
     """✅ Ensure AIClient initializes OpenAI with the correct API key."""
     mock_settings.OPENROUTER_API_KEY = "mock-api-key"
-    
-    AIClient.analyze_risk("Sample contract text")
+    mock_settings.OPENROUTER_MAX_CONNECTIONS = 4
+    mock_settings.OPENROUTER_MAX_CONCURRENCY = 2
+    mock_settings.OPENROUTER_TIMEOUT_SECONDS = 30
+    mock_openai.return_value.chat.completions.create = AsyncMock()
+
+    await AIClient.analyze_risk("Sample contract text")
 
     mock_openai.assert_called_with(
         base_url="https://openrouter.ai/api/v1",
-        api_key="mock-api-key"  # ✅ Now matches the mocked value
+        api_key="mock-api-key",  # ✅ Now matches the mocked value
+        timeout=30,
+        http_client=ANY,
     )
+
+# ✅ Test 6: AIClient should reuse one pooled client across requests
+@pytest.mark.asyncio
+async def test_ai_client_reuses_shared_client(mock_ai_response):
+    with patch("app.utils.ai_client.AsyncOpenAI") as mock_openai:
+        mock_instance = mock_openai.return_value
+        mock_instance.chat.completions.create = AsyncMock(return_value=mock_ai_response)
+        mock_instance.close = AsyncMock()
+
+        await AIClient.analyze_risk("Contract A")
+        await AIClient.analyze_risk("Contract B")
+
+        mock_openai.assert_called_once()
+        assert mock_instance.chat.completions.create.await_count == 2
+
+        await AIClient.close()
+        mock_instance.close.assert_awaited_once()
+        assert AIClient._client is None
@@ -4,6 +4,7 @@ from fastapi.testclient import TestClient
 from app.main import app
 from starlette.datastructures import UploadFile
 import io
+import json
 import fitz  # PyMuPDF
 from docx import Document
 from unittest.mock import patch
@@ -86,7 +87,7 @@ async def test_direct_call_analyze_document():
     fake_file = UploadFile(filename="test.pdf", file=io.BytesIO(pdf_bytes))
 
     with patch("app.utils.ai_client.AIClient.analyze_risk", return_value="Mocked AI response"):
-        response = await analyze_document(fake_file)
+        response = await analyze_document(fake_file, x_cache_bypass=None, chunked=None)
         assert "N/A" in response['risks'][0]['clause']
 
 @pytest.mark.asyncio
@@ -163,9 +164,145 @@ async def test_direct_call_extract_text_from_document():
     fake_file = UploadFile(filename="sample_test.pdf", file=io.BytesIO(pdf_bytes))
 
     # Call the endpoint function directly
-    response = await extract_text_from_document(fake_file)
+    response = await extract_text_from_document(fake_file, pages=None, max_pages=None)
 
     # Assertions
     assert "pages_text" in response
     assert isinstance(response["pages_text"], list)
-    assert any("test PDF" in page for page in response["pages_text"])
\ No newline at end of file
+    assert any("test PDF" in page for page in response["pages_text"])
+
+def test_stream_text_ndjson(mock_valid_pdf):
+    """✅ NDJSON streaming returns one JSON line per page."""
+    response = client.post("/extract_text/stream", files={"file": ("stream_test.pdf", mock_valid_pdf)})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["page"] == 1
+    assert "test PDF" in lines[0]["text"]
+    assert not os.path.exists("stream_test.pdf")
+
+def test_stream_text_sse(mock_valid_pdf):
+    """✅ SSE streaming emits page events followed by a done event."""
+    response = client.post("/extract_text/stream?format=sse", files={"file": ("stream_test.pdf", mock_valid_pdf)})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.startswith("event: page")
+    assert 'event: done\ndata: {"pages": 1}' in response.text
+
+def test_stream_text_unsupported_format(mock_unsupported_file):
+    """❌ Unsupported formats are rejected before streaming starts."""
+    response = client.post("/extract_text/stream", files={"file": mock_unsupported_file})
+    assert response.status_code == 400
+
+def test_extract_text_repeat_upload_uses_cache(mock_valid_docx):
+    """✅ Re-uploading identical bytes returns the cached extraction without parsing again."""
+    from app.utils.extraction_cache import extraction_cache
+    extraction_cache.clear()
+    content = mock_valid_docx.read()
+    with patch("app.routers.analyze.parser_pool.extract_text", return_value="Cached DOCX text") as mock_extract:
+        first = client.post("/extract_text/", files={"file": ("repeat.docx", content)})
+        second = client.post("/extract_text/", files={"file": ("repeat.docx", content)})
+
+    assert first.json() == second.json() == {"pages_text": "Cached DOCX text"}
+    mock_extract.assert_called_once()
+
+def test_extract_text_returns_503_when_parser_crashed(mock_valid_docx):
+    """❌ A request whose parser worker died gets a retryable 503."""
+    from app.utils.parser_pool import ParserCrashedError
+    from app.utils.extraction_cache import extraction_cache
+    extraction_cache.clear()
+    with patch("app.routers.analyze.parser_pool.extract_text", side_effect=ParserCrashedError("❌ Pemroses berhenti")):
+        response = client.post("/extract_text/", files={"file": ("crash.docx", mock_valid_docx.read())})
+    assert response.status_code == 503
+
+@pytest.mark.asyncio
+async def test_receive_upload_copies_off_the_event_loop():
+    """✅ Spooling and hashing the upload runs in the threadpool, not on the event loop thread."""
+    import threading
+    from app.routers.analyze import receive_upload
+    from app.utils.uploads import spool_upload
+    threads = []
+
+    def recording_spool(*args):
+        threads.append(threading.get_ident())
+        return spool_upload(*args)
+
+    with patch("app.routers.analyze.spool_upload", side_effect=recording_spool):
+        upload = await receive_upload(UploadFile(filename="a.pdf", file=io.BytesIO(b"%PDF")), "pdf")
+
+    assert upload.data == b"%PDF"
+    assert threads and threads[0] != threading.get_ident()
+
+def test_extract_text_rejects_oversized_upload(mock_valid_pdf, monkeypatch):
+    """❌ Uploads above UPLOAD_MAX_BYTES return 413 and leave no temp file behind."""
+    from app.config.settings import settings
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 16)
+    before = set(os.listdir("uploads"))
+    response = client.post("/extract_text/", files={"file": ("big.pdf", mock_valid_pdf)})
+    assert response.status_code == 413
+    assert set(os.listdir("uploads")) == before
+
+@pytest.fixture
+def multi_page_pdf():
+    doc = fitz.open()
+    for number in range(1, 5):
+        doc.new_page().insert_text((100, 100), f"Halaman {number}")
+    content = doc.write()
+    doc.close()
+    return content
+
+def test_extract_text_page_selection(multi_page_pdf):
+    """✅ Only the requested PDF pages are extracted, in document order."""
+    from app.utils.extraction_cache import extraction_cache
+    extraction_cache.clear()
+    response = client.post("/extract_text/?pages=3-,1", files={"file": ("pages.pdf", multi_page_pdf)})
+    assert response.status_code == 200
+    assert [page.strip() for page in response.json()["pages_text"]] == ["Halaman 1", "Halaman 3", "Halaman 4"]
+
+    response = client.post("/extract_text/?max_pages=2", files={"file": ("pages.pdf", multi_page_pdf)})
+    assert [page.strip() for page in response.json()["pages_text"]] == ["Halaman 1", "Halaman 2"]
+
+def test_extract_text_page_selection_from_cache(multi_page_pdf):
+    """✅ A cached full extraction serves page selections without parsing again."""
+    from app.utils.extraction_cache import extraction_cache
+    extraction_cache.clear()
+    client.post("/extract_text/", files={"file": ("pages.pdf", multi_page_pdf)})
+    with patch("app.routers.analyze.parser_pool.extract_text") as mock_extract:
+        response = client.post("/extract_text/?pages=2&max_pages=1", files={"file": ("pages.pdf", multi_page_pdf)})
+
+    assert [page.strip() for page in response.json()["pages_text"]] == ["Halaman 2"]
+    mock_extract.assert_not_called()
+
+def test_extract_text_page_selection_invalid(mock_valid_docx, multi_page_pdf):
+    """❌ Invalid ranges and page selections on non-PDF files return 400."""
+    response = client.post("/extract_text/?pages=5-2", files={"file": ("pages.pdf", multi_page_pdf)})
+    assert response.status_code == 400
+    response = client.post("/extract_text/?pages=1", files={"file": ("doc.docx", mock_valid_docx)})
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_analyze_text_flags_failed_analysis():
+    """❌ A failed model call is reported in failed_chunks instead of looking like a clean result."""
+    from app.routers.analyze import analyze_text
+    with patch("app.utils.ai_client.AIClient.analyze_risk", return_value="❌ Gagal menganalisis dokumen: timeout"):
+        response = await analyze_text("Isi kontrak singkat", bypass_cache=True, chunked=False)
+    assert response["failed_chunks"] == [1]
+
+def test_stream_text_rejected_when_parser_pool_full(mock_valid_pdf):
+    """❌ Streaming takes a parser pool slot and returns 503 when the pool is saturated."""
+    from app.utils.parser_pool import ParserPoolFullError
+    from app.utils.extraction_cache import extraction_cache
+    extraction_cache.clear()
+    with patch("app.routers.analyze.parser_pool.acquire", side_effect=ParserPoolFullError("❌ Antrean penuh")):
+        response = client.post("/extract_text/stream", files={"file": ("busy.pdf", mock_valid_pdf)})
+    assert response.status_code == 503
+
+def test_stream_text_releases_parser_pool_slot(mock_valid_pdf):
+    """✅ The streaming slot is released once the stream completes."""
+    from app.utils.parser_pool import parser_pool
+    from app.utils.extraction_cache import extraction_cache
+    extraction_cache.clear()
+    before = parser_pool._in_flight
+    response = client.post("/extract_text/stream", files={"file": ("slot.pdf", mock_valid_pdf)})
+    assert response.status_code == 200
+    assert parser_pool._in_flight == before
@@ -23,35 +23,34 @@ atau menyarankan pengeditan agar hasil dokumen lebih akurat.
 async def mock_deepseek_stream_response(system_prompt, query):
     """Mock DeepSeek's streaming response for testing"""
     WORDS = ["AI", "Response:", "Sky", "is", "blue."]
-    return WORDS
-    # for word in WORDS:
-    #     yield word + " "
-    #     await asyncio.sleep(0.01)
-
-
-# @patch("app.routers.legal_docs_generator.deepseek.deepseek_stream_response")
-# @pytest.mark.asyncio
-# async def test_deepseek_streaming_success(mock_deepseek):
-#     """✅ Should successfully stream DeepSeek responses"""
-#     mock_deepseek.side_effect = mock_deepseek_stream_response
-
-#     request_data = {
-#         "system_prompt": "Why is the sky blue?",
-#         "query": "Explain in simple terms."
-#     }
-
-#     with client.stream("POST", ROUTE, json=request_data) as response:
-#         assert response.status_code == 200  
-
-#         chunks = []
-#         for chunk in response.iter_text():
-#             chunks.append(chunk)
-#             assert len(chunk) > 0 
+    for word in WORDS:
+        yield word + " "
+        await asyncio.sleep(0.01)
+
+
+@patch("app.routers.legal_docs_generator.deepseek.generation_service.stream")
+@pytest.mark.asyncio
+async def test_deepseek_streaming_success(mock_deepseek):
+    """✅ Should successfully stream DeepSeek responses"""
+    mock_deepseek.side_effect = mock_deepseek_stream_response
+
+    request_data = {
+        "system_prompt": "Why is the sky blue?",
+        "query": "Explain in simple terms."
+    }
+
+    with client.stream("POST", ROUTE, json=request_data) as response:
+        assert response.status_code == 200  
+
+        chunks = []
+        for chunk in response.iter_text():
+            chunks.append(chunk)
+            assert len(chunk) > 0 
         
-#         full_response = "".join(chunks)
-#         assert "AI Response:" in full_response
+        full_response = "".join(chunks)
+        assert "AI Response:" in full_response
 
-@patch("app.routers.legal_docs_generator.deepseek.deepseek_stream_response")
+@patch("app.routers.legal_docs_generator.deepseek.generation_service.stream")
 @pytest.mark.asyncio
 async def test_deepseek_invalid_payload(mock_deepseek):
     """❌ Should return 400 when payload is missing required fields"""
@@ -65,7 +64,7 @@ async def test_deepseek_invalid_payload(mock_deepseek):
     assert "missing" in response.text  # Unprocessable entity, missing system_prompt (failed case)
 
 
-@patch("app.routers.legal_docs_generator.deepseek.deepseek_stream_response")
+@patch("app.routers.legal_docs_generator.deepseek.generation_service.stream")
 @pytest.mark.asyncio
 async def test_deepseek_empty_prompt(mock_deepseek):
     """❌ Should return 422 when system prompt is empty"""
@@ -80,7 +79,7 @@ async def test_deepseek_empty_prompt(mock_deepseek):
     assert "field required" in response.text # Unprocessable entity, empty system_prompt (corner case)
 
 
-@patch("app.routers.legal_docs_generator.deepseek.deepseek_stream_response")
+@patch("app.routers.legal_docs_generator.deepseek.generation_service.stream")
 @pytest.mark.asyncio
 async def test_deepseek_invalid_temperature(mock_deepseek):
     """❌ Should return 422 when temperature is out of range"""
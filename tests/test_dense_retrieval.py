@@ -1,33 +1,46 @@
 import pytest
-from app.services.retrieval.dense import DenseRetrieval
-from app.config.settings import settings
-
-# Create a fake client to avoid external calls during testing.
-class FakeClient:
-    def __init__(self, host):
-        self.host = host
+from app.services.retrieval.dense import DenseRetrieval, ANN_SEARCH, EXACT_SEARCH, SET_EF_SEARCH
+from app.services.retrieval.embedder import embedder
+from app.services.retrieval.embedding_cache import embedding_cache
 
 # A dummy DB session for testing purposes.
 class DummySession:
-    def exec(self, *args, **kwargs):
+    async def exec(self, *args, **kwargs):
         class FakeResult:
             def all(self):
                 return []
         return FakeResult()
 
-def test_init_sets_ollama_client(monkeypatch):
-    # Patch the Client in SparseRetrieval to use FakeClient.
-    monkeypatch.setattr("app.services.retrieval.dense.Client", FakeClient)
-    dummy_session = DummySession()
-    retriever = DenseRetrieval(dummy_session)
-    
-    # Verify that ollama_client is initialized with the correct host.
-    assert isinstance(retriever.ollama_client, FakeClient)
-    assert retriever.ollama_client.host == settings.OLLAMA_URL
+# Records every statement so tests can check the SQL that was issued.
+class RecordingSession:
+    def __init__(self, rows=()):
+        self.calls = []
+        self.rows = list(rows)
+
+    async def exec(self, statement, params=None):
+        self.calls.append((statement, params))
+        rows = self.rows
+
+        class FakeResult:
+            def all(self):
+                return rows
+        return FakeResult()
+
+@pytest.fixture(autouse=True)
+def clear_embedding_cache():
+    embedding_cache.clear()
+    yield
+    embedding_cache.clear()
+
+def test_init_uses_shared_embedder():
+    # Strategies are created per request, but they must not create their own Ollama client.
+    first = DenseRetrieval(DummySession())
+    second = DenseRetrieval(DummySession())
 
-def test_init_calls_parent(monkeypatch):
-    # Patch the Client to avoid external dependency.
-    monkeypatch.setattr("app.services.retrieval.dense.Client", FakeClient)
+    assert first.embedder is embedder
+    assert second.embedder is embedder
+
+def test_init_calls_parent():
     dummy_session = DummySession()
     retriever = DenseRetrieval(dummy_session)
     
@@ -35,10 +48,8 @@ def test_init_calls_parent(monkeypatch):
     assert hasattr(retriever, "db_session")
     assert retriever.db_session == dummy_session
 
-def test_retrieve_calls_ollama(monkeypatch):
-    # Patch the Client to avoid external dependency.
-    monkeypatch.setattr("app.services.retrieval.dense.Client", FakeClient)
-    
+@pytest.mark.asyncio
+async def test_retrieve_calls_ollama(monkeypatch):
     # We don't need this since we're adding exec to DummySession class
     # def fake_execute(*args, **kwargs):
     #     return []
@@ -51,7 +62,7 @@ def test_retrieve_calls_ollama(monkeypatch):
     # Mock the __embed_query method to avoid external calls.
     embed_called = False
     
-    def fake_embed_query(query):
+    async def fake_embed_query(query):
         nonlocal embed_called
         embed_called = True
         return [1, 2, 3]
@@ -59,8 +70,65 @@ def test_retrieve_calls_ollama(monkeypatch):
     monkeypatch.setattr(retriever, "_DenseRetrieval__embed_query", fake_embed_query)
 
     # Call retrieve with a dummy query.
-    retriever.retrieve("dummy query")
+    await retriever.retrieve("dummy query")
     
     # Verify that __embed_query was called
     assert embed_called
-    assert retriever._DenseRetrieval__embed_query("dummy query") == [1, 2, 3]
\ No newline at end of file
+    assert await retriever._DenseRetrieval__embed_query("dummy query") == [1, 2, 3]
+
+@pytest.mark.asyncio
+async def test_retrieve_reuses_cached_embedding(monkeypatch):
+    retriever = DenseRetrieval(DummySession())
+    embedded = []
+
+    async def fake_embed_query(query):
+        embedded.append(query)
+        return [0.5, 0.25]
+
+    monkeypatch.setattr(retriever, "_DenseRetrieval__embed_query", fake_embed_query)
+
+    await retriever.retrieve("Hukum  Pidana")
+    await retriever.retrieve("hukum pidana ")
+
+    # Both spellings normalize to the same query, so the model runs once
+    assert embedded == ["hukum pidana"]
+
+async def fake_embed(query):
+    return [0.5, 0.25]
+
+@pytest.mark.asyncio
+async def test_ann_mode_sets_ef_search_and_limits_candidates(monkeypatch):
+    monkeypatch.setattr("app.services.retrieval.dense.settings.DENSE_SEARCH_MODE", "ann")
+    monkeypatch.setattr("app.services.retrieval.dense.settings.DENSE_ANN_EF_SEARCH", 64)
+    monkeypatch.setattr("app.services.retrieval.dense.settings.DENSE_ANN_CANDIDATES", 40)
+    session = RecordingSession(rows=[(3, "doc-1", 0.9)])
+    retriever = DenseRetrieval(session)
+    monkeypatch.setattr(retriever, "_DenseRetrieval__embed_query", fake_embed)
+
+    result = await retriever.retrieve("kontrak kerja")
+
+    assert result == [{"document_id": "doc-1", "page_number": 3}]
+    (ef_statement, ef_params), (statement, params) = session.calls
+    assert ef_statement is SET_EF_SEARCH and ef_params == {"ef_search": "64"}
+    assert statement is ANN_SEARCH
+    assert params["candidates"] == 40
+    assert params["query_embedding"] == "[0.5,0.25]"
+
+@pytest.mark.asyncio
+async def test_exact_mode_runs_single_statement(monkeypatch):
+    monkeypatch.setattr("app.services.retrieval.dense.settings.DENSE_SEARCH_MODE", "exact")
+    session = RecordingSession()
+    retriever = DenseRetrieval(session)
+    monkeypatch.setattr(retriever, "_DenseRetrieval__embed_query", fake_embed)
+
+    await retriever.retrieve("kontrak kerja")
+
+    assert [statement for statement, _ in session.calls] == [EXACT_SEARCH]
+
+def test_distance_is_computed_once_per_chunk():
+    # The threshold filters the already computed distance instead of re-evaluating <=>
+    for statement in (ANN_SEARCH, EXACT_SEARCH):
+        sql = statement.text
+        assert sql.count("AS distance") == 1
+        assert sql.count("<=>") == 1
+        assert "chunk.distance < 1 - :threshold" in sql
\ No newline at end of file
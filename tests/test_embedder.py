@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from app.services.retrieval.embedder import BatchingEmbedder
+
+
+class FakeAsyncClient:
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+    async def embed(self, model, input):
+        self.calls.append(list(input))
+        if self.fail:
+            raise RuntimeError("ollama down")
+        return SimpleNamespace(embeddings=[[float(len(text))] for text in input])
+
+
+def make_embedder(client, max_batch_size=8, max_wait_ms=20):
+    embedder = BatchingEmbedder(model="bge-m3", max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    embedder._client = client
+    return embedder
+
+
+@pytest.mark.asyncio
+async def test_concurrent_queries_share_one_call():
+    """✅ Queries arriving within the window are embedded with a single call."""
+    client = FakeAsyncClient()
+    embedder = make_embedder(client)
+
+    results = await asyncio.gather(embedder.embed("a"), embedder.embed("bb"), embedder.embed("a"))
+
+    assert results == [[1.0], [2.0], [1.0]]
+    # Duplicate queries are sent once
+    assert client.calls == [["a", "bb"]]
+
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_without_waiting():
+    """✅ A full batch is sent immediately instead of waiting for the window."""
+    client = FakeAsyncClient()
+    embedder = make_embedder(client, max_batch_size=2, max_wait_ms=10_000)
+
+    results = await asyncio.wait_for(asyncio.gather(embedder.embed("a"), embedder.embed("bb")), timeout=1)
+
+    assert results == [[1.0], [2.0]]
+    assert client.calls == [["a", "bb"]]
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_propagates_to_every_caller():
+    """❌ A failed model call fails every query in the batch."""
+    embedder = make_embedder(FakeAsyncClient(fail=True))
+
+    results = await asyncio.gather(embedder.embed("a"), embedder.embed("b"), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_close_drops_client():
+    client = FakeAsyncClient()
+    embedder = make_embedder(client)
+    await embedder.close()
+    assert embedder._client is None
+    assert client.closed
+
+
+@pytest.mark.asyncio
+async def test_close_waits_for_in_flight_batches_and_fails_pending():
+    embedder = make_embedder(FakeAsyncClient(), max_batch_size=1, max_wait_ms=1000)
+    in_flight = asyncio.ensure_future(embedder.embed("sent"))
+    await asyncio.sleep(0)
+    embedder.max_batch_size = 8
+    waiting = asyncio.ensure_future(embedder.embed("waiting"))
+    await asyncio.sleep(0)
+
+    assert len(embedder._batches) == 1
+    await embedder.close()
+
+    assert await in_flight == [4.0]
+    with pytest.raises(RuntimeError, match="shutting down"):
+        await waiting
+    assert not embedder._batches
@@ -0,0 +1,35 @@
+import os
+from array import array
+import pytest
+from app.services.retrieval.embedding_cache import EmbeddingCache, EMBEDDING_CACHE_MISSES
+
+
+def test_make_key_normalizes_query():
+    """✅ Queries differing only in case and whitespace share one entry, models do not."""
+    assert EmbeddingCache.make_key("bge-m3", "  Hukum  Pidana\n") == EmbeddingCache.make_key("bge-m3", "hukum pidana")
+    assert EmbeddingCache.make_key("bge-m3", "hukum pidana") != EmbeddingCache.make_key("other", "hukum pidana")
+
+
+def test_set_stores_float32_array():
+    """✅ Stored embeddings come back as compact float32 arrays."""
+    cache = EmbeddingCache(max_entries=2, ttl_seconds=60)
+    misses = EMBEDDING_CACHE_MISSES._value.get()
+
+    assert cache.get("k") is None
+    stored = cache.set("k", [0.5, 0.25, 1.0])
+    vector = cache.get("k")
+
+    assert vector is stored
+    assert isinstance(vector, array) and vector.typecode == "f"
+    assert list(vector) == [0.5, 0.25, 1.0]
+    assert EMBEDDING_CACHE_MISSES._value.get() == misses + 1
+
+
+def test_disk_tier_stores_raw_float32(tmp_path):
+    """✅ Embeddings are persisted as 4 bytes per dimension and read back by a fresh cache."""
+    EmbeddingCache(max_entries=2, ttl_seconds=60, disk_dir=str(tmp_path)).set("k", [0.5, 0.75])
+
+    vector = EmbeddingCache(max_entries=2, ttl_seconds=60, disk_dir=str(tmp_path)).get("k")
+
+    assert list(vector) == [0.5, 0.75]
+    assert os.path.getsize(tmp_path / "k.f32") == 2 * 4
@@ -0,0 +1,34 @@
+import hashlib
+import io
+import pytest
+from starlette.datastructures import UploadFile
+from app.utils.extraction_cache import ExtractionCache, EXTRACTION_CACHE_HITS
+from app.utils.uploads import save_upload
+
+
+def test_make_key_includes_file_type():
+    assert ExtractionCache.make_key("abc", "PDF") == "abc.pdf"
+
+
+def test_entries_do_not_expire_and_count_hits_by_tier(tmp_path):
+    """✅ Content-addressed entries have no TTL; disk hits are reported under their own tier."""
+    cache = ExtractionCache(max_entries=2, disk_dir=str(tmp_path))
+    hits = EXTRACTION_CACHE_HITS.labels(tier="disk")._value.get()
+
+    cache.set("a.docx", "Isi dokumen")
+    cache.clear()
+
+    assert cache.ttl_seconds is None
+    assert cache.get("a.docx") == "Isi dokumen"
+    assert EXTRACTION_CACHE_HITS.labels(tier="disk")._value.get() == hits + 1
+
+
+def test_save_upload_returns_sha256(tmp_path):
+    """✅ The upload is written to disk and hashed in the same pass."""
+    content = b"%PDF-1.4 contoh" * 1000
+    destination = tmp_path / "upload.pdf"
+
+    digest = save_upload(UploadFile(filename="upload.pdf", file=io.BytesIO(content)), str(destination))
+
+    assert digest == hashlib.sha256(content).hexdigest()
+    assert destination.read_bytes() == content
@@ -0,0 +1,168 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.services.legal_docs_generator import generation_service as module
+from app.services.legal_docs_generator.generation_service import (
+    LegalDocumentGenerationService, LLM_TIME_TO_FIRST_TOKEN, STREAM_INTERRUPTED_MARKER,
+)
+from app.routers.legal_docs_generator import deepseek
+from app.routers.legal_docs_generator.legal_docs import fetch_deepseek_response
+
+
+async def failing_stream(system_prompt, query):
+    raise ConnectionError("backend down")
+    yield  # pragma: no cover
+
+
+async def fallback_stream(system_prompt, query):
+    yield "Dari "
+    yield "Ollama"
+
+
+async def markup_stream(system_prompt, query):
+    yield f"<h1>{query}</h1>"
+
+
+@pytest.mark.asyncio
+async def test_stream_falls_back_before_first_token(monkeypatch):
+    """✅ A backend failing before any token is replaced by the Ollama fallback"""
+    monkeypatch.setattr(module.settings, "LLM_BACKEND", "gemini")
+    monkeypatch.setattr(module.settings, "OLLAMA_URL", "http://ollama:11434")
+    service = LegalDocumentGenerationService({"gemini": failing_stream, "ollama": fallback_stream})
+    observed = LLM_TIME_TO_FIRST_TOKEN.labels(backend="ollama")._sum.get()
+
+    tokens = [token async for token in service.stream("system", "query")]
+
+    assert tokens == ["Dari ", "Ollama"]
+    assert LLM_TIME_TO_FIRST_TOKEN.labels(backend="ollama")._sum.get() > observed
+
+
+@pytest.mark.asyncio
+async def test_stream_raises_without_fallback(monkeypatch):
+    """❌ Errors surface when no fallback backend is configured"""
+    monkeypatch.setattr(module.settings, "LLM_BACKEND", "gemini")
+    monkeypatch.setattr(module.settings, "OLLAMA_URL", None)
+    service = LegalDocumentGenerationService({"gemini": failing_stream})
+
+    with pytest.raises(ConnectionError):
+        [token async for token in service.stream("system", "query")]
+
+
+async def interrupted_stream(system_prompt, query):
+    yield "Pasal 1 "
+    raise ConnectionError("connection reset")
+
+
+@pytest.mark.asyncio
+async def test_stream_marks_failure_after_first_token(monkeypatch):
+    """❌ A backend failing mid-document ends the stream with an in-band error marker"""
+    monkeypatch.setattr(module.settings, "LLM_BACKEND", "gemini")
+    monkeypatch.setattr(module.settings, "OLLAMA_URL", "http://ollama:11434")
+    service = LegalDocumentGenerationService({"gemini": interrupted_stream, "ollama": fallback_stream})
+
+    tokens = [token async for token in service.stream("system", "query")]
+
+    assert tokens == ["Pasal 1 ", STREAM_INTERRUPTED_MARKER]
+
+
+@pytest.fixture
+def deepseek_client(monkeypatch):
+    monkeypatch.setattr(deepseek.limiter, "enabled", False)
+    monkeypatch.setattr(module.settings, "LLM_BACKEND", "gemini")
+    monkeypatch.setattr(module.settings, "OLLAMA_URL", None)
+    app = FastAPI()
+    app.include_router(deepseek.router)
+    return TestClient(app)
+
+
+def test_deepseek_failure_before_first_token_returns_502(deepseek_client, monkeypatch):
+    """❌ Nothing streamed yet, so the failure becomes a proper error status"""
+    monkeypatch.setitem(module.generation_service.backends, "gemini", failing_stream)
+
+    response = deepseek_client.post("/deepseek", json={"system_prompt": "s", "query": "q"})
+
+    assert response.status_code == 502
+    assert "backend down" in response.json()["detail"]
+
+
+def test_deepseek_failure_mid_stream_is_signalled(deepseek_client, monkeypatch):
+    """❌ Once the 200 is sent, a failure shows up as the marker at the end of the body"""
+    monkeypatch.setitem(module.generation_service.backends, "gemini", interrupted_stream)
+
+    response = deepseek_client.post("/deepseek", json={"system_prompt": "s", "query": "q"})
+
+    assert response.status_code == 200
+    assert response.text == "Pasal 1 " + STREAM_INTERRUPTED_MARKER
+
+
+@pytest.mark.asyncio
+async def test_fetch_deepseek_response_calls_service_in_process(monkeypatch):
+    """✅ The generator router streams from the service directly, escaping HTML, without an HTTP hop"""
+    monkeypatch.setattr(module.settings, "LLM_BACKEND", "gemini")
+    monkeypatch.setitem(module.generation_service.backends, "gemini", markup_stream)
+
+    chunks = [chunk async for chunk in fetch_deepseek_response({"system_prompt": "s", "query": "MoU"})]
+
+    assert chunks == ["&lt;h1&gt;MoU&lt;/h1&gt;"]
+
+
+def test_gemini_client_is_shared(monkeypatch):
+    """✅ One pooled Gemini client is built and reused across requests"""
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    mock_client_class = MagicMock()
+    monkeypatch.setattr(module.genai, "Client", mock_client_class)
+    service = LegalDocumentGenerationService()
+
+    service.start()
+    assert service.get_gemini_client() is service.get_gemini_client()
+
+    mock_client_class.assert_called_once()
+    http_options = mock_client_class.call_args.kwargs["http_options"]
+    assert "limits" in http_options.async_client_args
+
+
+@pytest.mark.asyncio
+async def test_close_releases_both_clients():
+    """✅ Closing the service closes the pooled Gemini and Ollama HTTP clients"""
+    service = LegalDocumentGenerationService()
+    gemini, ollama_client = MagicMock(), MagicMock()
+    gemini.aio.aclose = AsyncMock()
+    ollama_client.close = AsyncMock()
+    service._gemini, service._ollama = gemini, ollama_client
+
+    await service.close()
+
+    gemini.aio.aclose.assert_awaited_once()
+    ollama_client.close.assert_awaited_once()
+    assert service._gemini is None and service._ollama is None
+
+
+@pytest.mark.asyncio
+async def test_model_semaphore_bounds_concurrent_generations(monkeypatch):
+    """✅ Concurrent generations on one model never exceed the per-model limit"""
+    monkeypatch.setattr(module.settings, "LLM_MAX_CONCURRENCY_PER_MODEL", 1)
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_stream():
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        yield MagicMock(text="token")
+        in_flight -= 1
+
+    gemini = MagicMock()
+    gemini.aio.models.generate_content_stream = AsyncMock(side_effect=lambda **_: fake_stream())
+    service = LegalDocumentGenerationService()
+    service._gemini = gemini
+
+    async def collect():
+        return [token async for token in service.gemini_stream("system", "query")]
+
+    results = await asyncio.gather(collect(), collect())
+
+    assert results == [["token"], ["token"]]
+    assert max_in_flight == 1
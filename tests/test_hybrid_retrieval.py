@@ -0,0 +1,93 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import MagicMock
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.services.retrieval.hybrid import HybridRetrieval, reciprocal_rank_fusion, RETRIEVAL_LEG_SECONDS
+from app.services.retrieval.retrieval_service import RetrievalServiceFactory
+
+
+def ref(document_id, page_number):
+    return {"document_id": document_id, "page_number": page_number}
+
+
+def mock_session():
+    session = MagicMock(spec=AsyncSession)
+    session.bind = None  # The sparse leg opens its own session on the same engine
+    return session
+
+
+def test_rrf_rewards_pages_found_by_both_legs():
+    dense = [ref("a", 1), ref("b", 2), ref("c", 3)]
+    sparse = [ref("c", 3), ref("d", 4)]
+
+    fused = reciprocal_rank_fusion([dense, sparse], k=60)
+
+    # c is ranked by both legs, so it outscores a (first in dense only)
+    assert fused[0] == ref("c", 3)
+    assert fused[1] == ref("a", 1)
+    assert len(fused) == 4
+
+
+def test_rrf_empty_rankings():
+    assert reciprocal_rank_fusion([[], []], k=60) == []
+
+
+def test_factory_creates_hybrid():
+    strategy = RetrievalServiceFactory("hybrid").create(MagicMock(spec=AsyncSession))
+    assert isinstance(strategy, HybridRetrieval)
+
+
+@pytest.mark.asyncio
+async def test_legs_run_concurrently(monkeypatch):
+    async def slow_dense(self, query):
+        await asyncio.sleep(0.2)
+        return [ref("a", 1)]
+
+    async def slow_sparse(self, query):
+        await asyncio.sleep(0.2)
+        return [ref("b", 2)]
+
+    monkeypatch.setattr("app.services.retrieval.dense.DenseRetrieval.retrieve", slow_dense)
+    monkeypatch.setattr("app.services.retrieval.sparse.SparseRetrieval.retrieve", slow_sparse)
+    observed = RETRIEVAL_LEG_SECONDS.labels("dense")._sum.get()
+    retriever = HybridRetrieval(mock_session())
+
+    started = time.perf_counter()
+    result = await retriever.retrieve("perjanjian sewa")
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.35  # Sequential legs would take at least 0.4s
+    assert {(r["document_id"], r["page_number"]) for r in result} == {("a", 1), ("b", 2)}
+    assert not retriever.degraded
+    assert RETRIEVAL_LEG_SECONDS.labels("dense")._sum.get() >= observed + 0.2
+
+
+@pytest.mark.asyncio
+async def test_failed_leg_falls_back_to_other(monkeypatch):
+    async def failing_dense(self, query):
+        raise RuntimeError("ollama down")
+
+    async def sparse(self, query):
+        return [ref("b", 2)]
+
+    monkeypatch.setattr("app.services.retrieval.dense.DenseRetrieval.retrieve", failing_dense)
+    monkeypatch.setattr("app.services.retrieval.sparse.SparseRetrieval.retrieve", sparse)
+
+    strategy = HybridRetrieval(mock_session())
+    result = await strategy.retrieve("perjanjian sewa")
+
+    assert result == [ref("b", 2)]
+    assert strategy.degraded
+
+
+@pytest.mark.asyncio
+async def test_both_legs_failing_raises(monkeypatch):
+    async def failing(self, query):
+        raise RuntimeError("down")
+
+    monkeypatch.setattr("app.services.retrieval.dense.DenseRetrieval.retrieve", failing)
+    monkeypatch.setattr("app.services.retrieval.sparse.SparseRetrieval.retrieve", failing)
+
+    with pytest.raises(RuntimeError):
+        await HybridRetrieval(mock_session()).retrieve("perjanjian sewa")
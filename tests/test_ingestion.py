@@ -0,0 +1,223 @@
+import asyncio
+import io
+import os
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import UUID, uuid4
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.routers.retrieval import ingest
+from app.services.ingestion.chunking import chunk_page
+from app.services.ingestion.ingestion_service import (
+    IngestionService, IngestionResult, DELETE_CHUNKS, DELETE_PAGES, INSERT_CHUNK, INSERT_PAGE, SELECT_PAGE_HASHES,
+    INGEST_CHUNKS, INGEST_PAGES, INGEST_PAGES_UNCHANGED,
+)
+from app.services.jobs.job_queue import InMemoryJobQueue, JobWorkerPool
+
+
+class FakeEmbedClient:
+    def __init__(self):
+        self.batches = []
+
+    async def embed(self, model, input):
+        self.batches.append(list(input))
+        return SimpleNamespace(embeddings=[[0.5, 0.25] for _ in input])
+
+
+@pytest.fixture
+def embed_client(monkeypatch):
+    client = FakeEmbedClient()
+    monkeypatch.setattr("app.services.ingestion.ingestion_service.embedder.get_client", lambda: client)
+    return client
+
+
+class FakeConnection:
+    """Records executed statements and answers the page hash lookup from `stored_hashes`."""
+
+    def __init__(self):
+        self.calls = []
+        self.stored_hashes = {}
+
+    async def execute(self, statement, params=None):
+        self.calls.append((statement, params))
+        result = MagicMock()
+        result.all.return_value = list(self.stored_hashes.items()) if statement is SELECT_PAGE_HASHES else []
+        return result
+
+    def params_for(self, statement):
+        return [params for executed, params in self.calls if executed is statement]
+
+
+@pytest.fixture
+def conn():
+    return FakeConnection()
+
+
+@pytest.fixture
+def session(conn):
+    session = MagicMock(spec=AsyncSession)
+    session.connection = AsyncMock(return_value=conn)
+    session.exec.return_value = MagicMock()
+    return session
+
+
+def make_service(**overrides):
+    options = dict(db=None, chunk_tokens=25, overlap_tokens=5, embed_batch_size=2, embed_concurrency=2)
+    options.update(overrides)
+    return IngestionService(**options)
+
+
+def test_chunk_page_overlaps_on_word_boundaries():
+    text = " ".join(f"w{i:03d}" for i in range(100))
+
+    chunks = chunk_page(text, chunk_tokens=25, overlap_tokens=5)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert all(chunk == chunk.strip() for chunk in chunks)
+    # Consecutive chunks share the tail of the previous one
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.split()[0] in previous.split()
+    assert chunks[-1].endswith("w099")
+
+
+def test_chunk_page_short_and_empty():
+    assert chunk_page("Pasal 1", chunk_tokens=25, overlap_tokens=5) == ["Pasal 1"]
+    assert chunk_page("   ", chunk_tokens=25, overlap_tokens=5) == []
+
+
+@pytest.mark.asyncio
+async def test_ingest_embeds_in_batches_and_writes_once(embed_client, session, conn):
+    service = make_service()
+    document_id = uuid4()
+    pages = ["Pasal 1 " * 30, "Pasal 2"]
+    page_count, chunk_count = INGEST_PAGES._value.get(), INGEST_CHUNKS._value.get()
+
+    result = await service.ingest(session, document_id, "Kontrak", pages)
+
+    assert result.pages == result.pages_changed == 2
+    assert result.chunks == len(service.chunk_pages(dict(enumerate(pages, start=1))))
+    assert all(len(batch) <= 2 for batch in embed_client.batches)
+    assert sum(len(batch) for batch in embed_client.batches) == result.chunks
+
+    [page_rows] = conn.params_for(INSERT_PAGE)
+    assert [row["page_number"] for row in page_rows] == [1, 2]
+    assert page_rows[0]["content_hash"] == service.page_hash(pages[0])
+    [chunk_rows] = conn.params_for(INSERT_CHUNK)
+    assert len(chunk_rows) == result.chunks
+    assert chunk_rows[0]["embedding"] == "[0.5,0.25]"
+    assert chunk_rows[-1]["page_number"] == 2
+    session.commit.assert_awaited_once()
+
+    assert INGEST_PAGES._value.get() == page_count + 2
+    assert INGEST_CHUNKS._value.get() == chunk_count + result.chunks
+
+
+
+@pytest.mark.asyncio
+async def test_reindex_only_touches_changed_and_removed_pages(embed_client, session, conn):
+    service = make_service()
+    document_id = uuid4()
+    old_pages = ["Pasal 1 tetap", "Pasal 2 lama", "Pasal 3 tetap", "Pasal 4 dihapus"]
+    conn.stored_hashes = {number: service.page_hash(page) for number, page in enumerate(old_pages, start=1)}
+    unchanged = INGEST_PAGES_UNCHANGED._value.get()
+
+    result = await service.ingest(session, document_id, "Kontrak", ["Pasal 1 tetap", "Pasal 2 baru", "Pasal 3 tetap"])
+
+    assert result.pages_changed == 1
+    # Only the edited page is embedded
+    assert embed_client.batches == [["Pasal 2 baru"]]
+    # Chunks and pages of the edited and the removed page go in one bulk delete each
+    assert conn.params_for(DELETE_CHUNKS) == [{"document_id": document_id, "page_numbers": [2, 4]}]
+    assert conn.params_for(DELETE_PAGES) == [{"document_id": document_id, "page_numbers": [2, 4]}]
+    [page_rows] = conn.params_for(INSERT_PAGE)
+    assert [row["page_number"] for row in page_rows] == [2]
+    assert INGEST_PAGES_UNCHANGED._value.get() == unchanged + 2
+
+
+@pytest.mark.asyncio
+async def test_reindex_unchanged_document_writes_nothing(embed_client, session, conn):
+    service = make_service()
+    pages = ["Pasal 1", "Pasal 2"]
+    conn.stored_hashes = {number: service.page_hash(page) for number, page in enumerate(pages, start=1)}
+
+    result = await service.ingest(session, uuid4(), "Kontrak", pages)
+
+    assert result.pages_changed == 0 and result.chunks == 0
+    assert embed_client.batches == []
+    assert conn.params_for(DELETE_PAGES) == [] and conn.params_for(INSERT_CHUNK) == []
+    # No corpus change, so cached search results stay valid
+    session.exec.assert_not_called()
+
+
+def test_page_hash_depends_on_chunking_setup():
+    assert make_service().page_hash("Pasal 1") == make_service().page_hash("Pasal 1")
+    assert make_service().page_hash("Pasal 1") != make_service(chunk_tokens=50).page_hash("Pasal 1")
+
+@pytest.fixture
+def ingest_client(monkeypatch):
+    queue = InMemoryJobQueue(kind="ingestion")
+    monkeypatch.setattr(ingest, "ingestion_queue", queue)
+    app = FastAPI()
+    app.include_router(ingest.router)
+    pool = JobWorkerPool(queue, ingest.run_ingestion_job, workers=1, poll_interval=0.01, heartbeat_interval=60)
+    return TestClient(app), queue, pool
+
+
+def test_ingest_endpoint_queues_job_and_reports_result(ingest_client):
+    """✅ The 202 carries a job id whose status ends with the indexing counts."""
+    client, queue, pool = ingest_client
+    response = client.post(
+        "/ingest/",
+        files={"file": ("kontrak.pdf", io.BytesIO(b"%PDF"), "application/pdf")},
+        data={"title": "Kontrak Sewa"},
+    )
+    assert response.status_code == 202
+    body = response.json()
+    assert client.get(f"/ingest/jobs/{body['job_id']}").json()["status"] == "queued"
+
+    job = asyncio.run(queue.claim(pool.owner))
+    file_path = job.file_path
+    document_id = UUID(body["document_id"])
+    result = IngestionResult(document_id=document_id, pages=2, chunks=3, pages_changed=2)
+    with patch("app.routers.retrieval.ingest.ingestion_service.run", AsyncMock(return_value=result)) as mock_run:
+        asyncio.run(pool.run(job))
+
+    mock_run.assert_awaited_once_with("pdf", file_path, document_id, "Kontrak Sewa")
+    assert not os.path.exists(file_path)
+    assert client.get(f"/ingest/jobs/{body['job_id']}").json() == {
+        "job_id": body["job_id"],
+        "status": "succeeded",
+        "result": {"document_id": body["document_id"], "pages": 2, "chunks": 3, "pages_changed": 2},
+    }
+
+
+def test_failed_ingestion_is_reported(ingest_client, monkeypatch):
+    """❌ A failed ingestion shows up in the job status and its upload is removed."""
+    client, queue, pool = ingest_client
+    extract = AsyncMock(side_effect=ValueError("broken pdf"))
+    monkeypatch.setattr("app.services.ingestion.ingestion_service.parser_pool.extract_text", extract)
+    job_id = client.post("/ingest/", files={"file": ("kontrak.pdf", io.BytesIO(b"%PDF"), "application/pdf")}).json()["job_id"]
+
+    job = asyncio.run(queue.claim(pool.owner))
+    file_path = job.file_path
+    asyncio.run(pool.run(job))
+
+    assert client.get(f"/ingest/jobs/{job_id}").json()["error"] == "broken pdf"
+    assert extract.await_args.kwargs["bounded"] is False  # Waits for a parser slot, never rejected as full
+    assert not os.path.exists(file_path)
+
+
+def test_unknown_ingestion_job_returns_404(ingest_client):
+    client, _, _ = ingest_client
+    assert client.get("/ingest/jobs/00000000-0000-0000-0000-000000000000").status_code == 404
+
+
+def test_ingest_endpoint_rejects_unsupported_type(ingest_client):
+    client, _, _ = ingest_client
+
+    response = client.post("/ingest/", files={"file": ("notes.txt", io.BytesIO(b"x"), "text/plain")})
+
+    assert response.status_code == 400
@@ -0,0 +1,398 @@
+import asyncio
+import json
+import os
+import pytest
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.commons.db.postgres import Postgres
+from app.model.analysis_job import AnalysisJob
+from app.routers import analyze
+from app.services.jobs.job_queue import (
+    DatabaseJobQueue, InMemoryJobQueue, JobWorkerPool, create_job_queue, _utcnow,
+)
+
+client = TestClient(app)
+
+
+def make_job(**overrides):
+    fields = {"file_type": "pdf", "file_path": "uploads/missing.pdf", "content_hash": "abc"}
+    fields.update(overrides)
+    return AnalysisJob(**fields)
+
+
+@pytest.fixture
+def db():
+    db = Postgres("sqlite:///:memory:")
+    yield db
+    asyncio.run(db.dispose())
+
+
+def test_create_job_queue_rejects_unknown_backend():
+    """❌ Unknown queue backends are rejected."""
+    with pytest.raises(ValueError, match="Invalid job queue backend"):
+        create_job_queue("redis", None, 60, 3)
+
+
+@pytest.mark.asyncio
+async def test_in_memory_queue_lifecycle():
+    """✅ Jobs are claimed oldest first and carry their result once finished."""
+    queue = InMemoryJobQueue()
+    first = await queue.enqueue(make_job())
+    second = await queue.enqueue(make_job())
+
+    claimed = await queue.claim("worker-a")
+    assert claimed.id == first.id and claimed.status == "running" and claimed.owner == "worker-a"
+    assert await queue.finish(first.id, "worker-a", result={"risks": []})
+
+    job = await queue.get(first.id)
+    assert job.status == "succeeded" and json.loads(job.result) == {"risks": []}
+    assert (await queue.claim("worker-a")).id == second.id
+    assert await queue.claim("worker-a") is None
+
+
+@pytest.mark.asyncio
+async def test_database_queue_claims_each_job_once(db):
+    """✅ Concurrent workers never claim the same job twice."""
+    queue = DatabaseJobQueue(db, lease_seconds=60, max_attempts=2)
+    jobs = [await queue.enqueue(make_job()) for _ in range(3)]
+
+    claimed = await asyncio.gather(*(queue.claim(f"worker-{n}") for n in range(5)))
+    claimed_ids = [job.id for job in claimed if job is not None]
+
+    assert sorted(claimed_ids) == sorted(job.id for job in jobs)
+    assert await queue.claim("worker-0") is None
+
+
+@pytest.mark.asyncio
+async def test_database_queues_only_see_their_own_kind(db):
+    """✅ Analysis and ingestion jobs share the table but are claimed and looked up separately."""
+    analysis = DatabaseJobQueue(db, lease_seconds=60, max_attempts=2)
+    ingestion = DatabaseJobQueue(db, lease_seconds=60, max_attempts=2, kind="ingestion")
+    job = await ingestion.enqueue(make_job(params='{"title": "Kontrak"}'))
+
+    assert await analysis.claim("worker-a") is None
+    assert await analysis.get(job.id) is None
+    claimed = await ingestion.claim("worker-a")
+    assert claimed.kind == "ingestion" and claimed.params == '{"title": "Kontrak"}'
+
+
+@pytest.mark.asyncio
+async def test_database_queue_persists_failure(db):
+    """❌ Failed jobs keep their error message."""
+    queue = DatabaseJobQueue(db, lease_seconds=60, max_attempts=2)
+    job = await queue.enqueue(make_job())
+    await queue.claim("worker-a")
+    assert await queue.finish(job.id, "worker-a", error="❌ Pemrosesan dokumen melebihi batas waktu.")
+
+    stored = await queue.get(job.id)
+    assert stored.status == "failed"
+    assert stored.error.startswith("❌")
+    assert stored.result is None
+
+
+async def expire_lease(db, job_id):
+    async for session in db.get_async_session():
+        stored = await session.get(AnalysisJob, job_id)
+        stored.lease_expires_at = _utcnow() - timedelta(seconds=1)
+        session.add(stored)
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_database_queue_recovers_only_expired_leases(db):
+    """✅ Jobs whose owner stopped heartbeating are requeued; leased jobs are left alone."""
+    queue = DatabaseJobQueue(db, lease_seconds=60, max_attempts=2)
+    dead = await queue.enqueue(make_job())
+    alive = await queue.enqueue(make_job())
+    await queue.claim("dead-worker")
+    await queue.claim("live-worker")
+    await expire_lease(db, dead.id)
+
+    await queue.recover()
+
+    assert (await queue.get(dead.id)).status == "queued"
+    assert (await queue.get(alive.id)).status == "running"
+    assert (await queue.claim("live-worker")).id == dead.id
+    # The worker that lost its lease can no longer record an outcome
+    assert not await queue.finish(dead.id, "dead-worker", result={"risks": []})
+    assert await queue.finish(dead.id, "live-worker", result={"risks": []})
+
+
+@pytest.mark.asyncio
+async def test_database_queue_heartbeat_extends_lease(db):
+    """✅ Heartbeats push the lease forward, but only for the owner's jobs."""
+    queue = DatabaseJobQueue(db, lease_seconds=60, max_attempts=2)
+    job = await queue.enqueue(make_job())
+    await queue.claim("worker-a")
+    await expire_lease(db, job.id)
+
+    await queue.heartbeat("worker-b", [job.id])
+    assert (await queue.get(job.id)).lease_expires_at.replace(tzinfo=None) < _utcnow().replace(tzinfo=None)
+    await queue.heartbeat("worker-a", [job.id])
+    await queue.recover()
+
+    assert (await queue.get(job.id)).status == "running"
+
+
+@pytest.mark.asyncio
+async def test_database_queue_fails_jobs_out_of_attempts(db):
+    """❌ A job that keeps killing its worker is failed instead of requeued forever."""
+    queue = DatabaseJobQueue(db, lease_seconds=60, max_attempts=2)
+    job = await queue.enqueue(make_job())
+    for _ in range(2):
+        await queue.claim("worker-a")
+        await expire_lease(db, job.id)
+        await queue.recover()
+
+    stored = await queue.get(job.id)
+    assert stored.status == "failed" and stored.attempts == 2
+    assert "2 percobaan" in stored.error
+
+
+@pytest.mark.asyncio
+async def test_database_queue_tracks_unreaped_uploads(db):
+    """✅ Only finished jobs with an upload still on record are handed out for reaping."""
+    queue = DatabaseJobQueue(db, lease_seconds=60, max_attempts=2)
+    finished = await queue.enqueue(make_job())
+    pending = await queue.enqueue(make_job())
+    await queue.claim("worker-a")
+    await queue.finish(finished.id, "worker-a", error="boom")
+
+    assert [job.id for job in await queue.unreaped(10)] == [finished.id]
+    await queue.mark_reaped([finished.id])
+    assert await queue.unreaped(10) == []
+    assert (await queue.get(pending.id)).file_path is not None
+
+
+@pytest.mark.asyncio
+async def test_database_queue_purges_only_old_reaped_jobs(db):
+    """✅ Retention deletes finished jobs whose upload is gone, never running or unreaped ones."""
+    queue = DatabaseJobQueue(db, lease_seconds=60, max_attempts=2)
+    reaped, unreaped, running = [await queue.enqueue(make_job()) for _ in range(3)]
+    for job in (reaped, unreaped, running):
+        await queue.claim("worker-a")
+    await queue.finish(reaped.id, "worker-a", result={"risks": []})
+    await queue.finish(unreaped.id, "worker-a", error="boom")
+    await queue.mark_reaped([reaped.id])
+
+    assert await queue.purge(_utcnow() - timedelta(hours=1)) == 0
+    assert await queue.purge(_utcnow() + timedelta(seconds=1)) == 1
+    assert await queue.get(reaped.id) is None
+    assert await queue.get(unreaped.id) is not None and await queue.get(running.id) is not None
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_purges_past_retention():
+    """✅ The pool's sweep removes finished jobs older than its retention, keeping recent ones."""
+    queue = InMemoryJobQueue()
+    old, recent = [await queue.enqueue(make_job(file_path=None)) for _ in range(2)]
+    for job in (old, recent):
+        await queue.claim("worker-a")
+        await queue.finish(job.id, "worker-a", result={})
+    old.updated_at = _utcnow() - timedelta(days=8)
+
+    await JobWorkerPool(queue, AsyncMock(), workers=1, poll_interval=0.01, heartbeat_interval=60,
+                        retention_seconds=7 * 24 * 3600).purge()
+
+    assert await queue.get(old.id) is None
+    assert await queue.get(recent.id) is not None
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_runs_and_records_outcomes():
+    """✅ Workers run queued jobs and store both results and handler errors."""
+    queue = InMemoryJobQueue()
+
+    async def handler(job):
+        if job.content_hash == "bad":
+            raise RuntimeError("parser crashed")
+        return {"risks": [job.content_hash]}
+
+    pool = JobWorkerPool(queue, handler, workers=2, poll_interval=0.01, heartbeat_interval=60)
+    await pool.start()
+    try:
+        good = await queue.enqueue(make_job(content_hash="good"))
+        bad = await queue.enqueue(make_job(content_hash="bad"))
+        pool.notify()
+        for _ in range(100):
+            if (await queue.get(bad.id)).status == "failed" and (await queue.get(good.id)).status == "succeeded":
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await pool.stop()
+
+    assert json.loads((await queue.get(good.id)).result) == {"risks": ["good"]}
+    assert (await queue.get(bad.id)).error == "parser crashed"
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_heartbeat_keeps_long_jobs_leased():
+    """✅ A job running longer than the lease is not requeued while its pool is alive."""
+    queue = InMemoryJobQueue(lease_seconds=0.05, max_attempts=3)
+    handled = []
+
+    async def handler(job):
+        handled.append(job.id)
+        await asyncio.sleep(0.3)
+        return {"risks": []}
+
+    pool = JobWorkerPool(queue, handler, workers=2, poll_interval=0.01, heartbeat_interval=0.01)
+    await pool.start()
+    try:
+        job = await queue.enqueue(make_job())
+        pool.notify()
+        for _ in range(100):
+            if (await queue.get(job.id)).status == "succeeded":
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await pool.stop()
+
+    assert handled == [job.id]
+    assert (await queue.get(job.id)).status == "succeeded"
+
+
+@pytest.mark.asyncio
+async def test_worker_survives_failing_finish():
+    """❌ A storage error while recording an outcome is retried and never stops the worker."""
+    queue = InMemoryJobQueue()
+    failures = {"left": 4}
+    finish = queue.finish
+
+    async def flaky_finish(job_id, owner, **kwargs):
+        if failures["left"]:
+            failures["left"] -= 1
+            raise ConnectionError("database restarting")
+        return await finish(job_id, owner, **kwargs)
+
+    queue.finish = flaky_finish
+    handled = []
+
+    async def handler(job):
+        handled.append(job.id)
+        return {"risks": []}
+
+    pool = JobWorkerPool(queue, handler, workers=1, poll_interval=0.001, heartbeat_interval=60)
+    await pool.start()
+    try:
+        lost = await queue.enqueue(make_job())  # All three finish attempts fail
+        kept = await queue.enqueue(make_job())  # Second attempt succeeds
+        pool.notify()
+        for _ in range(200):
+            if (await queue.get(kept.id)).status == "succeeded":
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await pool.stop()
+
+    assert handled == [lost.id, kept.id]
+    assert (await queue.get(lost.id)).status == "running"
+    assert (await queue.get(kept.id)).status == "succeeded"
+
+
+@pytest.mark.asyncio
+async def test_upload_kept_until_outcome_recorded(tmp_path):
+    """✅ A recovered job still finds its upload; it is removed only once the job finished."""
+    upload = tmp_path / "kontrak.pdf"
+    upload.write_bytes(b"%PDF")
+    queue = InMemoryJobQueue(lease_seconds=60, max_attempts=3)
+    job = await queue.enqueue(make_job(file_path=str(upload)))
+
+    async def crash(job):
+        raise asyncio.CancelledError()  # Worker killed mid-analysis
+
+    pool = JobWorkerPool(queue, crash, workers=1, poll_interval=0.01, heartbeat_interval=60)
+    with pytest.raises(asyncio.CancelledError):
+        await pool.run(await queue.claim(pool.owner))
+    job.lease_expires_at = _utcnow() - timedelta(seconds=1)
+    await queue.recover()
+    assert upload.exists() and job.status == "queued"
+
+    async def analyze_upload(job):
+        assert os.path.exists(job.file_path)
+        return {"risks": []}
+
+    pool.handler = analyze_upload
+    await pool.run(await queue.claim(pool.owner))
+    assert job.status == "succeeded"
+    assert not upload.exists() and job.file_path is None
+
+
+@pytest.mark.asyncio
+async def test_reap_removes_uploads_of_abandoned_jobs(tmp_path):
+    """✅ Uploads of jobs failed by recovery are reaped."""
+    upload = tmp_path / "kontrak.pdf"
+    upload.write_bytes(b"%PDF")
+    queue = InMemoryJobQueue(lease_seconds=60, max_attempts=1)
+    job = await queue.enqueue(make_job(file_path=str(upload)))
+    await queue.claim("dead-worker")
+    job.lease_expires_at = _utcnow() - timedelta(seconds=1)
+    await queue.recover()
+
+    pool = JobWorkerPool(queue, AsyncMock(), workers=1, poll_interval=0.01, heartbeat_interval=60)
+    await pool.reap()
+
+    assert job.status == "failed"
+    assert not upload.exists() and job.file_path is None
+
+
+@pytest.fixture
+def memory_queue(monkeypatch):
+    queue = InMemoryJobQueue()
+    monkeypatch.setattr(analyze, "analysis_queue", queue)
+    return queue
+
+
+def test_submit_job_returns_202_and_reports_result(memory_queue):
+    """✅ Submitting returns a job id immediately; the result is available once the job ran."""
+    response = client.post("/analyze/jobs", files={"file": ("kontrak.docx", b"not parsed here")})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert client.get(f"/analyze/jobs/{job_id}").json()["status"] == "queued"
+
+    pool = JobWorkerPool(memory_queue, analyze.run_analysis_job, workers=1, poll_interval=0.01, heartbeat_interval=60)
+    job = asyncio.run(memory_queue.claim(pool.owner))
+    file_path = job.file_path
+    with patch("app.routers.analyze.extract_cached", AsyncMock(return_value="Isi kontrak")), \
+            patch("app.routers.analyze.analyze_text", AsyncMock(return_value={"risks": []})):
+        asyncio.run(pool.run(job))
+
+    body = client.get(f"/analyze/jobs/{job_id}").json()
+    assert body == {"job_id": job_id, "status": "succeeded", "result": {"risks": []}}
+    assert not os.path.exists(file_path)
+
+
+def test_analysis_job_waits_for_parser_slot():
+    """✅ Queued jobs parse with bounded=False, so a briefly saturated pool doesn't fail them."""
+    job = make_job(content_hash="job-waits-for-slot")
+    with patch("app.routers.analyze.parser_pool.extract_text", AsyncMock(return_value="Isi kontrak")) as extract, \
+            patch("app.routers.analyze.analyze_text", AsyncMock(return_value={"risks": []})):
+        asyncio.run(analyze.run_analysis_job(job))
+
+    assert extract.await_args.kwargs["bounded"] is False
+
+
+def test_job_events_stream_final_error(memory_queue):
+    """❌ The SSE stream ends with an error event for failed jobs."""
+    job = asyncio.run(memory_queue.enqueue(make_job()))
+    asyncio.run(memory_queue.claim("worker-a"))
+    asyncio.run(memory_queue.finish(job.id, "worker-a", error="boom"))
+
+    response = client.get(f"/analyze/jobs/{job.id}/events")
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert 'event: status\ndata: {"status": "failed"}' in response.text
+    assert 'event: error\ndata: {"error": "boom"}' in response.text
+
+
+def test_unknown_job_returns_404(memory_queue):
+    """❌ Unknown job ids return 404."""
+    response = client.get("/analyze/jobs/00000000-0000-0000-0000-000000000000")
+    assert response.status_code == 404
+
+
+def test_submit_job_unsupported_format(memory_queue):
+    """❌ Unsupported formats are rejected before anything is queued."""
+    response = client.post("/analyze/jobs", files={"file": ("notes.txt", b"text")})
+    assert response.status_code == 400
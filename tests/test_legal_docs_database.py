@@ -1,18 +1,23 @@
+import json
 import pytest
 from unittest.mock import MagicMock, patch
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from uuid import UUID, uuid4
 from datetime import date
 
 from fastapi import FastAPI
 from app.model.legal_docs_generator import LegalDocument
-from app.routers.legal_docs_generator.databases import router, get_session
+from app.commons.db.postgres import Postgres
+from app.routers.legal_docs_generator.databases import router, get_session, encode_cursor, decode_cursor
 
 class TestLegalDocsDatabase:
     @pytest.fixture
     def mock_db_session(self):
-        return MagicMock(spec=Session)
+        session = MagicMock(spec=AsyncSession)
+        # exec() is awaited, the result it resolves to is synchronous
+        session.exec.return_value = MagicMock()
+        return session
 
     @pytest.fixture
     def client(self, mock_db_session):
@@ -154,3 +159,114 @@ class TestLegalDocsDatabase:
         assert len(result) == 3
         assert all(doc["author"] == author for doc in result)
         assert [doc["id"] for doc in result] == [str(doc.id) for doc in mock_docs]
+
+
+    def test_list_documents_sets_next_cursor(self, client, mock_db_session):
+        mock_docs = [
+            LegalDocument(title=f"Doc {i}", prompt="p", content="c", time=date(2025, 4, 3 - i), author="pager")
+            for i in range(3)
+        ]
+        # One row beyond the limit means there is another page
+        mock_db_session.exec.return_value.all.return_value = mock_docs
+        response = client.get("/legal-docs-generator/documents/?limit=2")
+        assert response.status_code == 200
+        assert [doc["title"] for doc in response.json()] == ["Doc 0", "Doc 1"]
+        assert decode_cursor(response.headers["X-Next-Cursor"]) == (mock_docs[1].time, mock_docs[1].id)
+
+        mock_db_session.exec.return_value.all.return_value = mock_docs[2:]
+        response = client.get(f"/legal-docs-generator/documents/?limit=2&cursor={response.headers['X-Next-Cursor']}")
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_list_documents_invalid_cursor(self, client):
+        response = client.get("/legal-docs-generator/documents/?cursor=not-a-cursor")
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+
+    def test_list_documents_limit_is_bounded(self, client):
+        response = client.get("/legal-docs-generator/documents/?limit=0")
+        assert response.status_code == 422
+
+    def test_cursor_round_trip(self):
+        doc_id = uuid4()
+        assert decode_cursor(encode_cursor(date(2025, 4, 1), doc_id)) == (date(2025, 4, 1), doc_id)
+    def test_bulk_create_batches_in_one_transaction(self, client, mock_db_session, monkeypatch):
+        monkeypatch.setattr("app.routers.legal_docs_generator.databases.settings.LEGAL_DOCS_BULK_BATCH_SIZE", 2)
+        payload = [
+            {"title": f"Doc {i}", "prompt": "p", "content": "c", "time": "2025-04-01", "author": "importer"}
+            for i in range(5)
+        ]
+
+        response = client.post("/legal-docs-generator/documents/bulk", json=payload)
+
+        assert response.status_code == 200
+        assert response.json()["created"] == 5
+        assert len(set(response.json()["ids"])) == 5
+        # Three batches (2 + 2 + 1), each a single executemany, committed together
+        inserts = [call for call in mock_db_session.execute.await_args_list if len(call.args) > 1]
+        assert mock_db_session.commit.await_count == 1
+        assert [len(call.args[1]) for call in inserts] == [2, 2, 1]
+        assert inserts[0].args[1][0]["time"] == date(2025, 4, 1)
+        mock_db_session.refresh.assert_not_called()
+
+    def test_bulk_create_rejects_oversized_request(self, client, mock_db_session, monkeypatch):
+        monkeypatch.setattr("app.routers.legal_docs_generator.databases.settings.LEGAL_DOCS_BULK_MAX_ITEMS", 1)
+        doc = {"title": "Doc", "prompt": "p", "content": "c", "time": "2025-04-01", "author": "importer"}
+
+        response = client.post("/legal-docs-generator/documents/bulk", json=[doc, doc])
+
+        assert response.status_code == 413
+        mock_db_session.execute.assert_not_called()
+
+    def test_bulk_delete_sums_batches(self, client, mock_db_session, monkeypatch):
+        monkeypatch.setattr("app.routers.legal_docs_generator.databases.settings.LEGAL_DOCS_BULK_BATCH_SIZE", 2)
+        mock_db_session.execute.return_value = MagicMock(rowcount=2)
+
+        response = client.post(
+            "/legal-docs-generator/documents/bulk-delete",
+            json={"ids": [str(uuid4()) for _ in range(4)]},
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {"deleted": 4}
+        assert mock_db_session.execute.await_count == 2
+        assert mock_db_session.commit.await_count == 1
+
+    def test_bulk_create_failure_rolls_back_every_batch(self, mock_db_session, monkeypatch):
+        """❌ A failing batch rolls back the batches before it, nothing is left half-imported."""
+        monkeypatch.setattr("app.routers.legal_docs_generator.databases.settings.LEGAL_DOCS_BULK_BATCH_SIZE", 1)
+        mock_db_session.execute.side_effect = [MagicMock(), RuntimeError("connection lost")]
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_session] = lambda: mock_db_session
+        doc = {"title": "Doc", "prompt": "p", "content": "c", "time": "2025-04-01", "author": "importer"}
+
+        response = TestClient(app, raise_server_exceptions=False).post("/legal-docs-generator/documents/bulk", json=[doc, doc])
+
+        assert response.status_code == 500
+        mock_db_session.commit.assert_not_called()
+        mock_db_session.rollback.assert_awaited_once()
+
+
+def test_export_streams_json_array(monkeypatch):
+    db = Postgres("sqlite:///:memory:")
+    monkeypatch.setattr("app.routers.legal_docs_generator.databases.postgres_db", db)
+    app = FastAPI()
+    app.include_router(router)
+
+    async def seed():
+        async for session in db.get_async_session():
+            for i in range(3):
+                session.add(LegalDocument(title=f"Doc {i}", prompt="p", content="c", time=date(2025, 4, 1 + i), author="exporter"))
+            await session.commit()
+
+    with TestClient(app) as client:
+        client.portal.call(seed)
+        response = client.get("/legal-docs-generator/documents/export?fields=summary")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    docs = json.loads(response.text)
+    assert [doc["title"] for doc in docs] == ["Doc 2", "Doc 1", "Doc 0"]
+    assert "content" not in docs[0]
\ No newline at end of file
@@ -0,0 +1,98 @@
+import os
+import time
+import pytest
+from app.utils.lru_cache import LRUCache
+
+
+class CountingCache(LRUCache):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        self.evictions = 0
+
+    def _on_hit(self, tier):
+        self.hits[tier] += 1
+
+    def _on_miss(self):
+        self.misses += 1
+
+    def _on_evict(self):
+        self.evictions += 1
+
+
+def test_get_miss_then_hit():
+    """✅ A stored entry is returned on the next lookup and counted as a memory hit."""
+    cache = CountingCache(max_entries=2)
+
+    assert cache.get("a") is None
+    cache.set("a", ["Page 1"])
+    assert cache.get("a") == ["Page 1"]
+
+    assert cache.misses == 1
+    assert cache.hits["memory"] == 1
+
+
+def test_lru_eviction():
+    """✅ The least recently used entry is evicted once the cache is full."""
+    cache = CountingCache(max_entries=2)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    cache.get("a")  # "b" becomes least recently used
+    cache.set("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+    assert cache.evictions == 1
+
+
+def test_expired_entry_is_a_miss(monkeypatch):
+    """❌ Entries older than the TTL are dropped."""
+    cache = CountingCache(max_entries=2, ttl_seconds=10)
+    now = time.monotonic()
+    monkeypatch.setattr("app.utils.lru_cache.time.monotonic", lambda: now)
+    cache.set("k", "v")
+    assert cache.get("k") == "v"
+    monkeypatch.setattr("app.utils.lru_cache.time.monotonic", lambda: now + 11)
+
+    assert cache.get("k") is None
+    assert cache.misses == 1
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    """✅ Entries persisted on disk are served (and promoted) by a fresh cache, e.g. another worker."""
+    CountingCache(max_entries=2, disk_dir=str(tmp_path)).set("k", {"isi": "dokumen"})
+    cache = CountingCache(max_entries=2, disk_dir=str(tmp_path))
+
+    assert cache.get("k") == {"isi": "dokumen"}
+    assert cache.get("k") == {"isi": "dokumen"}
+    assert cache.hits == {"memory": 1, "disk": 1}
+    assert os.listdir(tmp_path) == ["k.json"]
+
+
+def test_clear_keeps_disk_tier(tmp_path):
+    cache = CountingCache(max_entries=2, disk_dir=str(tmp_path))
+    cache.set("k", "v")
+    cache.clear()
+
+    assert cache.get("k") == "v"
+    assert cache.hits["disk"] == 1
+
+
+def test_expired_disk_entry_is_a_miss(tmp_path):
+    """❌ Disk entries older than the TTL are ignored."""
+    CountingCache(max_entries=2, ttl_seconds=60, disk_dir=str(tmp_path)).set("k", "v")
+    old = time.time() - 120
+    os.utime(tmp_path / "k.json", (old, old))
+
+    assert CountingCache(max_entries=2, ttl_seconds=60, disk_dir=str(tmp_path)).get("k") is None
+
+
+def test_disk_tier_ignores_corrupt_entry(tmp_path):
+    """❌ A corrupt cache file is treated as a miss instead of failing the request."""
+    cache = CountingCache(max_entries=2, disk_dir=str(tmp_path))
+    (tmp_path / "k.json").write_text("{not json")
+
+    assert cache.get("k") is None
+    assert cache.misses == 1
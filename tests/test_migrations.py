@@ -0,0 +1,163 @@
+import pytest
+from datetime import date, timedelta
+from uuid import uuid4
+from sqlalchemy import create_engine, inspect, text
+from sqlmodel import Session, select
+from unittest.mock import MagicMock
+from app.commons.db.migrations import (
+    MIGRATIONS, SEARCH_INDEXES, Migration, build_search_indexes, has_index, run_migrations, schema_migrations,
+)
+from app.commons.db.postgres import Postgres
+from app.model.legal_docs_generator import LegalDocument
+
+
+def applied_versions(engine):
+    with engine.connect() as conn:
+        return list(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def test_fresh_database_records_migrations():
+    pg = Postgres("sqlite:///:memory:")
+    assert applied_versions(pg.engine) == [m.version for m in MIGRATIONS]
+
+
+def test_migrations_run_once():
+    engine = create_engine("sqlite://")
+    calls = []
+    migrations = [Migration(1, "count runs", lambda conn: calls.append(1))]
+
+    with engine.begin() as conn:
+        run_migrations(conn, migrations)
+    with engine.begin() as conn:
+        run_migrations(conn, migrations)
+
+    assert calls == [1]
+
+
+def test_existing_table_gains_indexes(tmp_path):
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    # Schema as created before the listing indexes were declared
+    legacy = create_engine(url)
+    with legacy.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE legaldocument (id CHAR(32) PRIMARY KEY, title VARCHAR, prompt VARCHAR, "
+            "content VARCHAR, time DATE, author VARCHAR)"
+        ))
+    legacy.dispose()
+
+    pg = Postgres(url)
+
+    indexes = {index["name"] for index in inspect(pg.engine).get_indexes("legaldocument")}
+    assert {"ix_legaldocument_author_time", "ix_legaldocument_time"} <= indexes
+
+
+
+def test_has_index_matches_access_method_and_column():
+    conn = MagicMock()
+    conn.execute.return_value.scalars.return_value = [
+        "CREATE UNIQUE INDEX legal_document_pages_pkey ON public.legal_document_pages USING btree (id)",
+        "CREATE INDEX fts_idx ON public.legal_document_pages USING gin (full_text_search)",
+    ]
+
+    assert has_index(conn, "legal_document_pages", "gin", "full_text_search")
+    assert not has_index(conn, "legal_document_pages", "hnsw", "embedding")
+
+class RecordingConnection:
+    """Postgres-flavoured connection double that records the SQL it is given."""
+
+    def __init__(self):
+        self.dialect = MagicMock()
+        self.dialect.name = "postgresql"
+        self.statements = []
+        self.isolation_level = None
+
+    def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+        result = MagicMock()
+        result.scalar.return_value = None
+        result.scalars.return_value = []
+        return result
+
+    def execution_options(self, isolation_level=None):
+        self.isolation_level = isolation_level
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def existing_tables(monkeypatch):
+    inspector = MagicMock()
+    inspector.has_table.return_value = True
+    monkeypatch.setattr("app.commons.db.migrations.inspect", lambda conn: inspector)
+
+
+def test_startup_migrations_do_not_build_search_indexes(existing_tables):
+    """✅ The startup transaction never builds GIN/HNSW indexes on existing (possibly huge) tables."""
+    conn = RecordingConnection()
+    for migration in MIGRATIONS[1:]:  # 1 only adds the legaldocument listing indexes
+        migration.upgrade(conn)
+
+    assert not [sql for sql in conn.statements if "USING gin" in sql or "USING hnsw" in sql]
+
+
+def test_build_search_indexes_runs_concurrently_without_timeout(existing_tables):
+    """✅ The offline build uses CONCURRENTLY on an autocommit connection with no statement timeout."""
+    conn = RecordingConnection()
+    engine = MagicMock()
+    engine.dialect.name = "postgresql"
+    engine.connect.return_value = conn
+
+    build_search_indexes(engine)
+
+    assert conn.isolation_level == "AUTOCOMMIT"
+    assert conn.statements[0] == "SET statement_timeout = 0"
+    builds = [sql for sql in conn.statements if sql.startswith("CREATE INDEX")]
+    assert [index.name for index in SEARCH_INDEXES] == [sql.split()[6] for sql in builds]
+    assert all(sql.startswith("CREATE INDEX CONCURRENTLY") for sql in builds)
+
+
+@pytest.fixture(scope="module")
+def seeded_db():
+    """A large legaldocument table spread over a few hundred authors."""
+    pg = Postgres("sqlite:///:memory:")
+    start = date(2020, 1, 1)
+    rows = [
+        {"id": uuid4(), "title": f"Doc {i}", "prompt": "p", "content": "c", "time": start + timedelta(days=i % 1500), "author": f"author-{i % 500}"}
+        for i in range(50_000)
+    ]
+    with pg.engine.begin() as conn:
+        conn.execute(LegalDocument.__table__.insert(), rows)
+    return pg
+
+
+def author_listing():
+    return (
+        select(LegalDocument.id, LegalDocument.title, LegalDocument.time, LegalDocument.author)
+        .where(LegalDocument.author == "author-42")
+        .order_by(LegalDocument.time.desc(), LegalDocument.id.desc())
+        .limit(50)
+    )
+
+
+def test_author_listing_uses_index(seeded_db):
+    with seeded_db.engine.connect() as conn:
+        compiled = author_listing().compile(conn, compile_kwargs={"literal_binds": True})
+        plan = " ".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+
+    assert "USING INDEX ix_legaldocument_author_time" in plan
+    # The index already yields rows in listing order
+    assert "TEMP B-TREE" not in plan
+
+
+def test_author_listing_benchmark(benchmark, seeded_db):
+    def run():
+        with Session(seeded_db.engine) as session:
+            return session.exec(author_listing()).all()
+
+    rows = benchmark(run)
+    assert len(rows) == 50  # Timing is reported by pytest-benchmark, index use is asserted above
@@ -0,0 +1,125 @@
+import asyncio
+import os
+import threading
+import pytest
+from unittest.mock import patch
+from app.utils.parser_pool import ParserPool, ParserCrashedError, ParserPoolFullError, PARSER_JOBS_QUEUED, PARSER_JOBS_RUNNING
+
+
+@pytest.fixture
+def thread_pool():
+    pool = ParserPool(mode="thread", workers=1, max_queue=1, timeout=5)
+    yield pool
+    pool.shutdown()
+
+
+def test_invalid_mode():
+    """❌ Unknown pool modes are rejected."""
+    with pytest.raises(ValueError, match="Invalid parser pool mode"):
+        ParserPool(mode="fiber", workers=1, max_queue=1, timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_extract_text_runs_parser(thread_pool):
+    """✅ The selected parser runs inside the pool and its result is returned."""
+    with patch("app.utils.parsers.PDFParser.extract_text", return_value=["Page 1"]) as mock_extract:
+        result = await thread_pool.extract_text("pdf", "dummy.pdf")
+
+    assert result == ["Page 1"]
+    mock_extract.assert_called_once_with("dummy.pdf")
+
+
+@pytest.mark.asyncio
+async def test_extract_text_unsupported_format(thread_pool):
+    """❌ Unsupported formats fail before a job is queued."""
+    with pytest.raises(ValueError, match="tidak didukung"):
+        await thread_pool.extract_text("txt", "dummy.txt")
+    assert thread_pool._in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_submit_rejects_when_queue_full(thread_pool):
+    """❌ Jobs beyond workers + max_queue are rejected and the gauges reflect the backlog."""
+    release = threading.Event()
+    running = asyncio.ensure_future(thread_pool.submit(release.wait))
+    queued = asyncio.ensure_future(thread_pool.submit(release.wait))
+    await asyncio.sleep(0.05)
+
+    assert PARSER_JOBS_RUNNING._value.get() == 1
+    assert PARSER_JOBS_QUEUED._value.get() == 1
+    with pytest.raises(ParserPoolFullError):
+        await thread_pool.submit(release.wait)
+
+    release.set()
+    await asyncio.gather(running, queued)
+    await asyncio.sleep(0.05)
+    assert thread_pool._in_flight == 0
+    assert PARSER_JOBS_RUNNING._value.get() == 0
+
+
+@pytest.mark.asyncio
+async def test_unbounded_submit_waits_instead_of_rejecting(thread_pool):
+    """✅ Background jobs (bounded=False) queue behind a full pool rather than fail."""
+    release = threading.Event()
+    blockers = [asyncio.ensure_future(thread_pool.submit(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0.05)
+
+    waiting = asyncio.ensure_future(thread_pool.submit(abs, -3, bounded=False))
+    await asyncio.sleep(0.05)
+    assert thread_pool._in_flight == 3
+    release.set()
+
+    assert await waiting == 3
+    await asyncio.gather(*blockers)
+
+
+@pytest.mark.asyncio
+async def test_submit_times_out():
+    """❌ Jobs exceeding the per-job timeout raise TimeoutError."""
+    pool = ParserPool(mode="thread", workers=1, max_queue=0, timeout=0.05)
+    release = threading.Event()
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.submit(release.wait)
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_extract_text_forwards_parser_options(thread_pool):
+    """✅ Page selection options reach the parser running in the pool."""
+    with patch("app.utils.parsers.PDFParser.extract_text", return_value=["Page 2"]) as mock_extract:
+        await thread_pool.extract_text("pdf", "dummy.pdf", page_range=[(2, 2)], max_pages=None)
+
+    mock_extract.assert_called_once_with("dummy.pdf", page_range=[(2, 2)], max_pages=None)
+
+
+def test_acquire_counts_against_queue_limit(thread_pool):
+    """❌ Slots reserved for streaming share the queue limit; releasing twice frees one slot."""
+    first = thread_pool.acquire()
+    second = thread_pool.acquire()
+    with pytest.raises(ParserPoolFullError):
+        thread_pool.acquire()
+
+    first.release()
+    first.release()
+    assert thread_pool._in_flight == 1
+    second.release()
+    assert thread_pool._in_flight == 0
+    assert PARSER_JOBS_RUNNING._value.get() == 0
+
+
+@pytest.mark.asyncio
+async def test_dead_worker_process_is_replaced():
+    """❌ A parser process dying fails its job, but the pool recovers for the next one."""
+    pool = ParserPool(mode="process", workers=1, max_queue=1, timeout=30)
+    try:
+        with pytest.raises(ParserCrashedError):
+            await pool.submit(os._exit, 1)  # Stands in for an OOM kill or a segfault
+
+        assert await pool.submit(abs, -3) == 3
+        await asyncio.sleep(0.05)
+        assert pool._in_flight == 0
+    finally:
+        pool.shutdown()
@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import patch, MagicMock
-from app.utils.parsers import PDFParser, DOCXParser, ParserFactory, DocumentParser  # Adjust import paths accordingly
+from app.utils.parsers import PDFParser, DOCXParser, ParserFactory, DocumentParser, parse_page_range, pages_to_open, select_pages  # Adjust import paths accordingly
 
 # ==========================
 # Mock Objects
@@ -206,3 +206,83 @@ def test_extract_text_docx_general_exception():
         parser = DOCXParser()
         with pytest.raises(RuntimeError, match="❌ Terjadi kesalahan saat memproses DOCX: Unexpected error"):
             parser.extract_text("error.docx")
+
+
+# ==========================
+# Tests for Page Streaming
+# ==========================
+
+def test_iter_pages_pdf_yields_incrementally(mock_pdf_multi_page):
+    """✅ Pages are yielded one at a time and each page cache is released after parsing."""
+    with patch("pdfplumber.open", return_value=mock_pdf_multi_page):
+        pages = PDFParser().iter_pages("dummy.pdf")
+        assert next(pages) == "Page 1 content"
+        mock_pdf_multi_page.pages[0].close.assert_called_once()
+        mock_pdf_multi_page.pages[1].extract_text.assert_not_called()
+        assert list(pages) == ["Page 2 content"]
+
+def test_iter_pages_docx_yields_single_item(mock_docx_with_text):
+    """✅ Formats without pages yield the whole text once."""
+    with patch("docx.Document", return_value=mock_docx_with_text):
+        assert list(DOCXParser().iter_pages("dummy.docx")) == ["Sample extracted text from DOCX"]
+
+def test_iter_pages_pdf_general_exception():
+    """✅ Streaming keeps the same error translation as extract_text."""
+    with patch("pdfplumber.open", side_effect=Exception("Unexpected error")):
+        with pytest.raises(RuntimeError, match="❌ Terjadi kesalahan saat memproses PDF: Unexpected error"):
+            next(PDFParser().iter_pages("error.pdf"))
+
+
+def test_extract_text_from_in_memory_bytes(mock_pdf_with_text, mock_docx_with_text):
+    """✅ Raw upload bytes are parsed from a file object instead of a path."""
+    with patch("pdfplumber.open", return_value=mock_pdf_with_text) as mock_open:
+        assert PDFParser().extract_text(b"%PDF-1.7") == ["Sample extracted text from PDF"]
+        assert mock_open.call_args.args[0].read() == b"%PDF-1.7"
+    with patch("docx.Document", return_value=mock_docx_with_text) as mock_document:
+        DOCXParser().extract_text(b"PK")
+        assert mock_document.call_args.args[0].read() == b"PK"
+
+# ==========================
+# Tests for Page Selection
+# ==========================
+
+def test_parse_page_range():
+    """✅ Page selections accept single pages, closed and open-ended ranges."""
+    assert parse_page_range("1-3, 7,10-") == [(1, 3), (7, 7), (10, None)]
+
+@pytest.mark.parametrize("spec", ["", "0", "3-1", "a-b", "1-2-3", "200000"])
+def test_parse_page_range_invalid(spec):
+    """❌ Malformed or out-of-bounds selections are rejected."""
+    with pytest.raises(ValueError, match="Rentang halaman tidak valid"):
+        parse_page_range(spec)
+
+def test_pages_to_open():
+    """✅ Closed selections are resolved up front so pdfplumber never loads the other pages."""
+    assert pages_to_open(None, None) is None
+    assert pages_to_open(None, 2) == [1, 2]
+    assert pages_to_open([(5, 6), (1, 2)], 3) == [1, 2, 5]
+    assert pages_to_open([(3, None)], 2) is None
+
+def test_iter_pages_pdf_open_ended_selection(mock_pdf_multi_page):
+    """✅ Open-ended ranges are filtered while iterating; skipped pages are never extracted."""
+    for number, page in enumerate(mock_pdf_multi_page.pages, start=1):
+        page.page_number = number
+    with patch("pdfplumber.open", return_value=mock_pdf_multi_page) as mock_open:
+        assert PDFParser().extract_text("dummy.pdf", page_range=[(2, None)]) == ["Page 2 content"]
+    assert mock_open.call_args.kwargs["pages"] is None
+    mock_pdf_multi_page.pages[0].extract_text.assert_not_called()
+
+def test_iter_pages_pdf_max_pages(mock_pdf_multi_page):
+    """✅ max_pages opens only the first pages and stops once enough pages were yielded."""
+    for number, page in enumerate(mock_pdf_multi_page.pages, start=1):
+        page.page_number = number
+    with patch("pdfplumber.open", return_value=mock_pdf_multi_page) as mock_open:
+        assert PDFParser().extract_text("dummy.pdf", max_pages=1) == ["Page 1 content"]
+    assert mock_open.call_args.kwargs["pages"] == [1]
+    mock_pdf_multi_page.pages[1].extract_text.assert_not_called()
+
+def test_select_pages_from_cached_extraction():
+    """✅ A selection applied to a full extraction matches what the parser would return."""
+    pages = ["p1", "p2", "p3", "p4"]
+    assert select_pages(pages, [(2, 2), (4, None)], None) == ["p2", "p4"]
+    assert select_pages(pages, None, 3) == ["p1", "p2", "p3"]
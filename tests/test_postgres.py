@@ -58,3 +58,39 @@ def test_get_session(monkeypatch):
     # Verify generator is exhausted
     with pytest.raises(StopIteration):
         next(session_generator)
+
+
+def test_get_database_shares_engine(tmp_path):
+    # Routers asking for the same URL must share one engine (and pool)
+    from app.commons.db.postgres import get_database
+    url = f"sqlite:///{tmp_path / 'shared.db'}"
+
+    assert get_database(url) is get_database(url)
+    assert get_database(url).engine is get_database(url).engine
+
+
+def test_pool_options_from_settings(monkeypatch):
+    from app.commons.db import postgres
+    monkeypatch.setattr(postgres.settings, "DB_POOL_SIZE", 7)
+    monkeypatch.setattr(postgres.settings, "DB_MAX_OVERFLOW", 3)
+    monkeypatch.setattr(postgres.settings, "DB_POOL_PRE_PING", True)
+    monkeypatch.setattr(postgres.settings, "DB_STATEMENT_TIMEOUT_MS", 5000)
+
+    options = Postgres._Postgres__pool_options()
+
+    assert options["pool_size"] == 7
+    assert options["max_overflow"] == 3
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"] == {"options": "-c statement_timeout=5000"}
+
+
+def test_pool_metrics_exposed(tmp_path):
+    from prometheus_client import REGISTRY
+    from app.commons.db.postgres import get_database
+    db = get_database(f"sqlite:///{tmp_path / 'metrics.db'}")
+
+    with Session(db.engine) as session:
+        session.connection()
+        assert REGISTRY.get_sample_value("db_pool_checked_out", {"database": db.engine.url.database, "engine": "sync"}) == 1
+
+    assert REGISTRY.get_sample_value("db_pool_checked_out", {"database": db.engine.url.database, "engine": "sync"}) == 0
@@ -7,7 +7,8 @@ from app.services.retrieval.sparse import SparseRetrieval
 from sqlmodel import Session
 
 class TestRetrievalService:
-    def test_retrieve_calls_strategy_retrieve(self):
+    @pytest.mark.asyncio
+    async def test_retrieve_calls_strategy_retrieve(self):
         # Arrange
         mock_strategy = Mock(spec=RetrievalStrategy)
         mock_strategy.retrieve.return_value = ["result1", "result2"]
@@ -16,10 +17,10 @@ class TestRetrievalService:
         query = "test query"
         
         # Act
-        result = service.retrieve(query)
+        result = await service.retrieve(query)
         
         # Assert
-        mock_strategy.retrieve.assert_called_once_with(query)
+        mock_strategy.retrieve.assert_awaited_once_with(query)
         assert result == ["result1", "result2"]
 
 class TestRetrievalServiceFactory:
@@ -0,0 +1,87 @@
+import pytest
+from datetime import timedelta
+from unittest.mock import patch
+from sqlmodel import Session, select
+from app.commons.db.postgres import Postgres
+from app.model.risk_analysis_cache import RiskAnalysisCache
+from app.services.risk_analysis.risk_cache import RiskCache, _utcnow
+from app.services.risk_analysis.risk_analysis_service import RiskAnalysisService
+
+MODEL = "test-model"
+
+
+@pytest.fixture
+def cache():
+    return RiskCache(Postgres(None), ttl_seconds=3600, max_entries=2)
+
+
+def test_normalize_text_joins_pages_and_collapses_whitespace():
+    assert RiskCache.normalize_text(["Pasal 1\n\n  isi", "Pasal 2 "]) == "Pasal 1 isi Pasal 2"
+
+
+def test_make_key_depends_on_model_prompt_and_text():
+    key = RiskCache.make_key(MODEL, "1", "Pasal 1")
+    assert key == RiskCache.make_key(MODEL, "1", ["Pasal  1"])
+    assert key != RiskCache.make_key(MODEL, "2", "Pasal 1")
+    assert key != RiskCache.make_key("other-model", "1", "Pasal 1")
+
+
+def test_get_returns_stored_response(cache):
+    """✅ A stored analysis is returned for the same normalized text."""
+    assert cache.get(MODEL, "1", "Pasal 1") is None
+    cache.set(MODEL, "1", "Pasal 1", "Klausul 1: 'x' Alasan: 'y'")
+    assert cache.get(MODEL, "1", " Pasal 1 ") == "Klausul 1: 'x' Alasan: 'y'"
+
+
+def test_get_ignores_expired_entries(cache):
+    """✅ Entries older than the TTL are treated as misses."""
+    cache.set(MODEL, "1", "Pasal 1", "old")
+    with Session(cache.db.engine) as session:
+        entry = session.exec(select(RiskAnalysisCache)).one()
+        entry.created_at = _utcnow() - timedelta(hours=2)
+        session.add(entry)
+        session.commit()
+
+    assert cache.get(MODEL, "1", "Pasal 1") is None
+
+
+def test_set_evicts_least_recently_used(cache):
+    """✅ The cache never grows beyond max_entries, dropping the least recently used entry."""
+    cache.set(MODEL, "1", "A", "a")
+    cache.set(MODEL, "1", "B", "b")
+    cache.get(MODEL, "1", "A")
+    cache.set(MODEL, "1", "C", "c")
+
+    assert cache.get(MODEL, "1", "B") is None
+    assert cache.get(MODEL, "1", "A") == "a"
+    assert cache.get(MODEL, "1", "C") == "c"
+
+
+def test_get_treats_db_errors_as_miss(cache):
+    """❌ Database failures never propagate out of the cache."""
+    with patch("app.services.risk_analysis.risk_cache.Session", side_effect=Exception("db down")):
+        assert cache.get(MODEL, "1", "Pasal 1") is None
+        cache.set(MODEL, "1", "Pasal 1", "ignored")
+
+
+@pytest.mark.asyncio
+async def test_service_skips_llm_on_cache_hit(cache):
+    """✅ Identical text is analyzed once; bypass forces a fresh call."""
+    service = RiskAnalysisService(cache)
+    with patch("app.utils.ai_client.AIClient.analyze_risk", return_value="Klausul 1: 'a' Alasan: 'b'") as mock_ai:
+        assert await service.analyze(["Pasal 1"]) == "Klausul 1: 'a' Alasan: 'b'"
+        assert await service.analyze(["Pasal 1"]) == "Klausul 1: 'a' Alasan: 'b'"
+        assert mock_ai.call_count == 1
+
+        await service.analyze(["Pasal 1"], bypass_cache=True)
+        assert mock_ai.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_service_does_not_cache_failures(cache):
+    """❌ Failed analyses are retried on the next request."""
+    service = RiskAnalysisService(cache)
+    with patch("app.utils.ai_client.AIClient.analyze_risk", return_value="❌ Gagal menganalisis dokumen: timeout") as mock_ai:
+        await service.analyze("Pasal 1")
+        await service.analyze("Pasal 1")
+        assert mock_ai.call_count == 2
@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from app.commons.db.postgres import Postgres
+from app.services.risk_analysis.chunker import chunk_pages, estimate_tokens, split_text
+from app.services.risk_analysis.risk_cache import RiskCache
+from app.services.risk_analysis.risk_analysis_service import RiskAnalysisService
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcde") == 2
+
+
+def test_chunk_pages_packs_pages_within_budget():
+    """✅ Consecutive pages share a window until the token budget is reached."""
+    pages = ["a" * 40, "b" * 40, "c" * 40]  # 10 tokens each
+    assert chunk_pages(pages, token_budget=20) == ["a" * 40 + "\n" + "b" * 40, "c" * 40]
+
+
+def test_chunk_pages_accepts_plain_text():
+    assert chunk_pages("Pasal 1", token_budget=20) == ["Pasal 1"]
+
+
+def test_split_text_cuts_oversized_page_on_whitespace():
+    """✅ A page larger than the budget is split without breaking words."""
+    pieces = split_text("kata " * 20, token_budget=5)
+    assert all(estimate_tokens(piece) <= 5 for piece in pieces)
+    assert " ".join(pieces).split() == ["kata"] * 20
+
+
+@pytest.mark.asyncio
+async def test_analyze_chunked_runs_bounded_fan_out_and_merges():
+    """✅ Windows are analyzed concurrently (bounded) and duplicate clauses merged."""
+    service = RiskAnalysisService(RiskCache(Postgres(None), 3600, 100), chunk_token_budget=3, chunk_concurrency=2)
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_analyze_risk(text):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return f'Klausul 1: "sama". Alasan: "x".\nKlausul {text[-1]}: "{text}". Alasan: "y".'
+
+    pages = ["halaman A", "halaman B", "halaman C", "halaman D"]
+    with patch("app.utils.ai_client.AIClient.analyze_risk", side_effect=fake_analyze_risk) as mock_ai:
+        ai_response, risks, failed_chunks = await service.analyze_chunked(pages)
+
+    assert mock_ai.call_count == 4
+    assert max_in_flight == 2
+    assert [risk["clause"] for risk in risks] == ["Klausul 1", "Klausul A", "Klausul B", "Klausul C", "Klausul D"]
+    assert ai_response.count("Klausul 1") == 4
+    assert failed_chunks == []
+
+
+@pytest.mark.asyncio
+async def test_analyze_chunked_retries_and_reports_failed_chunks():
+    """❌ Failed windows are retried; those still failing are reported instead of silently dropped."""
+    service = RiskAnalysisService(RiskCache(Postgres(None), 3600, 100), chunk_token_budget=3, chunk_retries=1)
+    attempts = {}
+
+    async def fake_analyze_risk(text):
+        attempts[text] = attempts.get(text, 0) + 1
+        if text == "halaman C" or (text == "halaman B" and attempts[text] == 1):
+            return "❌ Gagal menganalisis dokumen: timeout"
+        return f'Klausul {text[-1]}: "{text}". Alasan: "y".'
+
+    pages = ["halaman A", "halaman B", "halaman C"]
+    with patch("app.utils.ai_client.AIClient.analyze_risk", side_effect=fake_analyze_risk), \
+            patch.object(service.cache, "get", return_value=None), patch.object(service.cache, "set"):
+        _, risks, failed_chunks = await service.analyze_chunked(pages)
+
+    assert attempts == {"halaman A": 1, "halaman B": 2, "halaman C": 2}
+    assert [risk["clause"] for risk in risks] == ["Klausul A", "Klausul B"]
+    assert failed_chunks == [3]
+
+
+def test_needs_chunking():
+    service = RiskAnalysisService(RiskCache(Postgres(None), 3600, 100), chunk_token_budget=10)
+    assert not service.needs_chunking(["pendek"])
+    assert service.needs_chunking(["a" * 40, "b" * 40])
@@ -128,4 +128,31 @@ def test_parse_ai_risk_analysis_unexpected_error(caplog):
     # Verify fallback response
     assert parsed_data[0]["clause"] == "N/A"
     assert parsed_data[0]["risky_text"] == "Parsing gagal"
-    assert parsed_data[0]["reason"] == "Kesalahan sistem saat mengolah dokumen"
\ No newline at end of file
+    assert parsed_data[0]["reason"] == "Kesalahan sistem saat mengolah dokumen"
+
+# ==========================
+# Merging Chunked Results
+# ==========================
+
+def test_merge_risks_deduplicates_by_clause():
+    """✅ Clauses reported by several chunks are kept once, in first-seen order."""
+    first = [{"clause": "Klausul 2", "risky_text": "a", "reason": "x"}]
+    second = [
+        {"clause": "Klausul  2", "risky_text": "a (lagi)", "reason": "x"},
+        {"clause": "Klausul 5", "risky_text": "b", "reason": "y"},
+    ]
+    merged = RiskParser.merge_risks([first, second])
+    assert [r["clause"] for r in merged] == ["Klausul 2", "Klausul 5"]
+    assert merged[0]["risky_text"] == "a"
+
+def test_merge_risks_drops_placeholders_when_real_clauses_exist():
+    """✅ "N/A" results from clean chunks do not hide risks found elsewhere."""
+    empty = RiskParser.parse_ai_risk_analysis("Tidak ada")
+    real = [{"clause": "Klausul 1", "risky_text": "a", "reason": "x"}]
+    assert RiskParser.merge_risks([empty, real]) == real
+
+def test_merge_risks_all_placeholders():
+    """✅ When no chunk has risks, the placeholder is returned once."""
+    empty = RiskParser.parse_ai_risk_analysis("Tidak ada")
+    assert RiskParser.merge_risks([empty, empty]) == empty
+    assert RiskParser.merge_risks([])[0]["clause"] == "N/A"
@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+from sqlmodel import select
+from app.commons.db.postgres import Postgres
+from app.model.search_index_generation import SearchIndexGeneration
+from app.services.retrieval.retrieval_service import RetrievalService
+from app.services.retrieval.retrieval_strategy import RetrievalStrategy
+from app.services.retrieval.search_cache import (
+    SearchResultCache, bump_generation, current_generation, SEARCH_CACHE_HITS, SEARCH_CACHE_MISSES,
+)
+
+
+def make_strategy(results):
+    strategy = Mock(spec=RetrievalStrategy)
+    strategy.retrieve = AsyncMock(return_value=results)
+    strategy.top_k = 20
+    strategy.degraded = False
+    strategy.db_session = object()
+    return strategy
+
+
+def test_make_key_normalizes_query_and_includes_generation():
+    key = SearchResultCache.make_key("DenseRetrieval", "Hukum  Pidana", 20, 1)
+    assert key == SearchResultCache.make_key("DenseRetrieval", "hukum pidana ", 20, 1)
+    assert key != SearchResultCache.make_key("SparseRetrieval", "hukum pidana", 20, 1)
+    assert key != SearchResultCache.make_key("DenseRetrieval", "hukum pidana", 10, 1)
+    assert key != SearchResultCache.make_key("DenseRetrieval", "hukum pidana", 20, 2)
+
+
+@pytest.mark.asyncio
+async def test_repeated_search_served_from_cache(monkeypatch):
+    generation = AsyncMock(return_value=3)
+    monkeypatch.setattr("app.services.retrieval.retrieval_service.current_generation", generation)
+    strategy = make_strategy([{"document_id": 1, "page_number": 2}])
+    service = RetrievalService(strategy, cache=SearchResultCache(max_entries=8, ttl_seconds=60))
+    hits, misses = SEARCH_CACHE_HITS._value.get(), SEARCH_CACHE_MISSES._value.get()
+
+    first = await service.retrieve("perjanjian sewa")
+    second = await service.retrieve("Perjanjian  sewa")
+
+    assert first == second == [{"document_id": 1, "page_number": 2}]
+    strategy.retrieve.assert_awaited_once()
+    assert SEARCH_CACHE_HITS._value.get() == hits + 1
+    assert SEARCH_CACHE_MISSES._value.get() == misses + 1
+
+
+@pytest.mark.asyncio
+async def test_degraded_results_are_not_cached(monkeypatch):
+    monkeypatch.setattr("app.services.retrieval.retrieval_service.current_generation", AsyncMock(return_value=1))
+    strategy = make_strategy([{"document_id": 1, "page_number": 2}])
+    strategy.degraded = True
+    service = RetrievalService(strategy, cache=SearchResultCache(max_entries=8, ttl_seconds=60))
+
+    await service.retrieve("perjanjian sewa")
+    await service.retrieve("perjanjian sewa")
+
+    assert strategy.retrieve.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_generation_bump_invalidates(monkeypatch):
+    generation = AsyncMock(side_effect=[1, 2])
+    monkeypatch.setattr("app.services.retrieval.retrieval_service.current_generation", generation)
+    strategy = make_strategy([])
+    service = RetrievalService(strategy, cache=SearchResultCache(max_entries=8, ttl_seconds=60))
+
+    await service.retrieve("perjanjian sewa")
+    await service.retrieve("perjanjian sewa")
+
+    assert strategy.retrieve.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_bump_generation_persists_counter():
+    db = Postgres("sqlite:///:memory:")
+    async for session in db.get_async_session():
+        assert await current_generation(session) == 0
+        await bump_generation(session)
+        await session.commit()
+        await bump_generation(session)
+        await session.commit()
+        assert await current_generation(session) == 2
+        assert len((await session.exec(select(SearchIndexGeneration))).all()) == 1
+    await db.dispose()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_bumps_do_not_conflict():
+    db = Postgres("sqlite:///:memory:")
+
+    async def bump():
+        async for session in db.get_async_session():
+            await bump_generation(session)
+            await session.commit()
+
+    async for session in db.get_async_session():
+        assert await current_generation(session) == 0  # Creates the tables before the race
+    await asyncio.gather(bump(), bump())
+    async for session in db.get_async_session():
+        assert await current_generation(session) == 2
+    await db.dispose()
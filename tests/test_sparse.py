@@ -1,19 +1,23 @@
 import pytest
-from unittest.mock import MagicMock, patch
-from app.services.retrieval.sparse import SparseRetrieval
-from sqlmodel import Session
+from unittest.mock import MagicMock
+from app.services.retrieval.sparse import SparseRetrieval, SPARSE_SEARCH, build_search_query
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 class TestSparseRetrieval:
     
     @pytest.fixture
     def mock_db_session(self):
-        return MagicMock(spec=Session)
+        session = MagicMock(spec=AsyncSession)
+        # exec() is awaited, the result it resolves to is synchronous
+        session.exec.return_value = MagicMock()
+        return session
     
     @pytest.fixture
     def sparse_retrieval(self, mock_db_session):
         return SparseRetrieval(mock_db_session)
     
-    def test_retrieve_valid_query(self, sparse_retrieval, mock_db_session):
+    @pytest.mark.asyncio
+    async def test_retrieve_valid_query(self, sparse_retrieval, mock_db_session):
         # Mock the query result - the actual result is a list of tuples with (document_id, page_number, rank)
         mock_result = [
             (1, 1, 0.8),
@@ -22,7 +26,7 @@ class TestSparseRetrieval:
         mock_db_session.exec.return_value.all.return_value = mock_result
         
         # Test with a valid query
-        result = sparse_retrieval.retrieve("legal document search")
+        result = await sparse_retrieval.retrieve("legal document search")
         
         # Assert the result - now it's a list of dicts with document_id and page_number
         expected_result = [
@@ -34,25 +38,48 @@ class TestSparseRetrieval:
         # Verify exec was called with appropriate parameters
         mock_db_session.exec.assert_called_once()
 
-    def test_retrieve_empty_query(self, sparse_retrieval, mock_db_session):
+    @pytest.mark.asyncio
+    async def test_retrieve_empty_query(self, sparse_retrieval, mock_db_session):
         # Test with an empty query
-        result = sparse_retrieval.retrieve("")
+        result = await sparse_retrieval.retrieve("")
         
         # Assert the result is an empty list
         assert result == []
-    @patch('app.services.retrieval.sparse.text')
-    def test_query_construction(self, mock_text, sparse_retrieval, mock_db_session):
+    @pytest.mark.asyncio
+    async def test_query_construction(self, sparse_retrieval, mock_db_session):
         # Arrange
-        mock_text.return_value = "sql_query"
         mock_db_session.exec.return_value.all.return_value = []
-        
+
         # Act
-        sparse_retrieval.retrieve("legal document search")
-        
-        # Assert - verify the query was built correctly
-        mock_text.assert_called_once()
-        # Verify params were passed correctly
-        mock_db_session.exec.assert_called_once_with("sql_query", params={
+        await sparse_retrieval.retrieve("legal document search")
+
+        # Assert - one precompiled statement, the raw words go to websearch_to_tsquery
+        mock_db_session.exec.assert_called_once_with(SPARSE_SEARCH, params={
             "lang": "indonesian",
-            "ts_query": "legal & document & search"
-        })
\ No newline at end of file
+            "query": "legal document search",
+            "top_k": 20,
+        })
+
+    @pytest.mark.asyncio
+    async def test_punctuation_only_query(self, sparse_retrieval, mock_db_session):
+        result = await sparse_retrieval.retrieve("&&& !!! ::")
+
+        assert result == []
+        mock_db_session.exec.assert_not_called()
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("pasal 1338 KUHPerdata", "pasal 1338 KUHPerdata"),
+    ("sewa & (rumah) | tanah!", "sewa (rumah) tanah!"),
+    ('"wanprestasi kontrak" or -pidana', '"wanprestasi kontrak" or -pidana'),
+    ("ab cd", ""),
+    ("tab\tand\x00null", "tab and null"),
+])
+def test_build_search_query(query, expected):
+    assert build_search_query(query) == expected
+
+
+def test_tsquery_is_built_once():
+    sql = SPARSE_SEARCH.text
+    assert sql.count("websearch_to_tsquery") == 1
+    assert "DISTINCT" not in sql
@@ -0,0 +1,52 @@
+import io
+import os
+import pytest
+from starlette.datastructures import UploadFile
+from app.utils.uploads import UploadTooLargeError, save_upload, spool_upload, unique_upload_path
+
+
+def make_upload(content: bytes) -> UploadFile:
+    return UploadFile(filename="kontrak.pdf", file=io.BytesIO(content))
+
+
+def test_small_upload_stays_in_memory(tmp_path):
+    """✅ Uploads under the memory threshold are never written to disk."""
+    upload = spool_upload(make_upload(b"small"), "pdf", max_bytes=1024, memory_max_bytes=64, directory=str(tmp_path))
+
+    assert upload.source == b"small"
+    assert upload.path is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_large_upload_rolls_over_to_unique_file(tmp_path, monkeypatch):
+    """✅ Larger uploads spill to a unique temp file holding every byte, hashed the same way."""
+    monkeypatch.setattr("app.utils.uploads.CHUNK_SIZE", 4)
+    content = b"0123456789" * 3
+    first = spool_upload(make_upload(content), "pdf", max_bytes=None, memory_max_bytes=8, directory=str(tmp_path))
+    second = spool_upload(make_upload(content), "pdf", max_bytes=None, memory_max_bytes=8, directory=str(tmp_path))
+
+    assert first.path != second.path and first.path.endswith(".pdf")
+    with open(first.path, "rb") as f:
+        assert f.read() == content
+    assert first.content_hash == second.content_hash == spool_upload(
+        make_upload(content), "pdf", max_bytes=None, memory_max_bytes=1024).content_hash
+
+    first.cleanup()
+    second.cleanup()
+    assert os.listdir(tmp_path) == []
+
+
+def test_oversized_upload_rejected_while_streaming(tmp_path, monkeypatch):
+    """❌ The size limit stops the copy midway and discards the partial file."""
+    monkeypatch.setattr("app.utils.uploads.CHUNK_SIZE", 4)
+    with pytest.raises(UploadTooLargeError, match="melebihi batas"):
+        spool_upload(make_upload(b"x" * 64), "pdf", max_bytes=16, memory_max_bytes=8, directory=str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+
+def test_save_upload_enforces_limit(tmp_path):
+    """❌ save_upload removes the destination when the upload is too large."""
+    destination = unique_upload_path("docx", str(tmp_path))
+    with pytest.raises(UploadTooLargeError):
+        save_upload(make_upload(b"x" * 32), destination, max_bytes=16)
+    assert not os.path.exists(destination)